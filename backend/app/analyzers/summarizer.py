@@ -1,3 +1,7 @@
+from collections import Counter
+from backend.app.core.ir_schema.scopes import max_depth
+
+
 def summarize(ir: dict) -> dict:
     statements = ir.get("statements", [])
     control_flow = ir.get("control_flow", [])
@@ -19,12 +23,7 @@ def summarize(ir: dict) -> dict:
         # STATEMENTS
         # -----------------------------
         "total_statements": len(statements),
-        "statement_types": {
-            stmt["type"]: sum(
-                1 for s in statements if s["type"] == stmt["type"]
-            )
-            for stmt in statements
-        },
+        "statement_types": dict(Counter(s["type"] for s in statements)),
 
         # -----------------------------
         # CONTROL FLOW
@@ -47,18 +46,14 @@ def summarize(ir: dict) -> dict:
         # FILE OPERATIONS
         # -----------------------------
         "total_file_operations": len(file_ops),
-        "file_operation_types": {
-            op["operation"]: sum(
-                1 for f in file_ops if f["operation"] == op["operation"]
-            )
-            for op in file_ops
-        },
+        "file_operation_types": dict(Counter(f["operation"] for f in file_ops)),
 
         # -----------------------------
         # PROCEDURE STRUCTURE
         # -----------------------------
         "total_paragraphs": len(ir.get("paragraphs", [])),
         "total_performs": len(ir.get("performs", [])),
+        "max_nesting_depth": max_depth(ir["scopes"]) if ir.get("scopes") else None,
 
         # -----------------------------
         # WARNINGS
@@ -1,7 +1,177 @@
 import os
+import sys
+
+
+def _worker_count() -> int:
+    """
+    Worker processes serving the app: WEB_CONCURRENCY (uvicorn and
+    gunicorn read it), UVICORN_WORKERS, or --workers / -w on the server
+    command line (worker processes inherit the parent's sys.argv).
+    """
+    for name in ("WEB_CONCURRENCY", "UVICORN_WORKERS"):
+        if os.getenv(name):
+            return int(os.getenv(name))
+
+    args = sys.argv[1:]
+    for i, arg in enumerate(args):
+        if arg.startswith("--workers="):
+            return int(arg.split("=", 1)[1])
+        if arg in ("--workers", "-w") and i + 1 < len(args) and args[i + 1].isdigit():
+            return int(args[i + 1])
+    return 1
+
 
 class Settings:
+    # Worker processes serving the app
+    WORKERS = _worker_count()
+
     LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
     GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instan")
 
+    # Deadlines: a request gets REQUEST_TIMEOUT_SECONDS end to end; each
+    # LLM call at most LLM_TIMEOUT_SECONDS of whatever is left. Work for
+    # a client that disconnected is cancelled.
+    REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+    # Hedged LLM requests: when the first token is later than the p95 of
+    # recent ones, race a second request (costs up to twice the tokens)
+    LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+    LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+    # Chat memory: recent messages sent verbatim, older ones summarized
+    CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "6"))
+    CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "4"))
+    CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1500"))
+    CHAT_MESSAGE_MAX_CHARS = int(os.getenv("CHAT_MESSAGE_MAX_CHARS", "1200"))
+
+    # History API: largest page GET /sessions/{id}/messages returns
+    CHAT_PAGE_MAX = int(os.getenv("CHAT_PAGE_MAX", "200"))
+
+    # CPU-bound stages (parse, summarize) run in a process pool
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))  # 0 = one per core
+    INLINE_PARSE_MAX_BYTES = int(os.getenv("INLINE_PARSE_MAX_BYTES", "32768"))
+
+    # Batch analysis: members processed concurrently per request
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    BATCH_MAX_MEMBERS = int(os.getenv("BATCH_MAX_MEMBERS", "5000"))
+
+    # Background jobs: local worker tasks, state kept in SQLite. Running
+    # jobs heartbeat every JOB_HEARTBEAT_SECONDS; every worker process
+    # requeues jobs silent for JOB_STALE_SECONDS (their process died) and
+    # picks up queued ones every JOB_RECOVER_SECONDS
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+    JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+    JOB_RECOVER_SECONDS = float(os.getenv("JOB_RECOVER_SECONDS", "30"))
+
+    # Responses smaller than this are sent uncompressed
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    # Responses for programs at least this large (or of unknown size) are
+    # serialized and compressed in a thread, off the event loop
+    INLINE_ENCODE_MAX_BYTES = int(os.getenv("INLINE_ENCODE_MAX_BYTES", "32768"))
+
+    # On-demand profiling (X-Profile header, or sample a fraction of requests)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+    PROFILE_DIR = os.getenv(
+        "PROFILE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "profiles")
+    )
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+    # Database file; defaults to backend/app/db/chat.db. Put it on local
+    # disk: WAL mode needs shared memory, so no network filesystems.
+    DB_PATH = os.getenv("DB_PATH", "")
+
+    # Cross-worker cache tier (LLM responses, IRs) in its own WAL-mode
+    # SQLite file. On by default when running several workers.
+    SHARED_CACHE = os.getenv("SHARED_CACHE", "1" if WORKERS > 1 else "0") == "1"
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")  # default: cache.db next to the DB
+    SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+    # Build the COBOL scope tree (ir["scopes"]): divisions, sections,
+    # paragraphs and nested IF/EVALUATE/PERFORM blocks with line ranges
+    IR_SCOPES = os.getenv("IR_SCOPES", "1") == "1"
+
+    # Compile DATA DIVISION record layouts (ir["layouts"]): byte offsets,
+    # sizes and usages, used to decode the program's data files
+    IR_LAYOUTS = os.getenv("IR_LAYOUTS", "1") == "1"
+    RECORD_UPLOAD_MAX_BYTES = int(os.getenv("RECORD_UPLOAD_MAX_BYTES", str(1024 * 1024 * 1024)))
+    RECORD_DECODE_MAX_ROWS = int(os.getenv("RECORD_DECODE_MAX_ROWS", "10000"))
+
+    # Raw mainframe members (POST /analyze/member, archives): code page
+    # ("auto" tells EBCDIC from ASCII) and record length of RECFM=FB data
+    MEMBER_CODEPAGE = os.getenv("MEMBER_CODEPAGE", "auto")
+    MEMBER_LRECL = int(os.getenv("MEMBER_LRECL", "80"))
+    MEMBER_MAX_BYTES = int(os.getenv("MEMBER_MAX_BYTES", str(16 * 1024 * 1024)))
+
+    # IR warehouse: statements, control flow, file operations, variables
+    # and performs of every analyzed program in indexed tables (wh_*)
+    WAREHOUSE = os.getenv("WAREHOUSE", "1") == "1"
+    WAREHOUSE_QUERY_LIMIT = int(os.getenv("WAREHOUSE_QUERY_LIMIT", "1000"))
+    WAREHOUSE_QUERY_TIMEOUT_SECONDS = float(os.getenv("WAREHOUSE_QUERY_TIMEOUT_SECONDS", "5"))
+
+    # Rule-based explanations for simple programs: "auto" uses them below
+    # TEMPLATE_MAX_COMPLEXITY and calls the LLM otherwise, "only" never
+    # calls the LLM when a template applies, "off" always calls the LLM
+    TEMPLATE_EXPLAIN_MODE = os.getenv("TEMPLATE_EXPLAIN_MODE", "auto").lower()
+    TEMPLATE_MAX_COMPLEXITY = int(os.getenv("TEMPLATE_MAX_COMPLEXITY", "30"))
+
+    # Speculative answers: after /analyze, a low-priority background thread
+    # answers these "|"-separated questions, plus one per paragraph (or JCL
+    # step) up to PRECOMPUTE_MAX_PARAGRAPHS. /chat serves them when the
+    # normalized question matches. Costs LLM tokens whether asked or not.
+    PRECOMPUTE = os.getenv("PRECOMPUTE", "0") == "1"
+    PRECOMPUTE_QUESTIONS = os.getenv(
+        "PRECOMPUTE_QUESTIONS",
+        "What does this program do?|What files does it use?|Explain the IF logic"
+    )
+    PRECOMPUTE_MAX_PARAGRAPHS = int(os.getenv("PRECOMPUTE_MAX_PARAGRAPHS", "10"))
+    PRECOMPUTE_MAX_PENDING = int(os.getenv("PRECOMPUTE_MAX_PENDING", "32"))
+
+    # Paraphrase cache: /chat reuses an earlier answer in the session (or
+    # a precomputed one) when the question's TF-IDF character n-gram
+    # cosine similarity reaches SIMILARITY_THRESHOLD. 0 (the default)
+    # disables it: a wrong match serves a wrong answer as a cached hit.
+    # See backend/benchmarks/eval_similarity.py for choosing a threshold.
+    SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0"))
+    SIMILARITY_MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", "200"))
+
+    # SQLite tuning (connections are pooled per thread, WAL mode)
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+    DB_CACHE_KB = int(os.getenv("DB_CACHE_KB", "20000"))
+    DB_MMAP_BYTES = int(os.getenv("DB_MMAP_BYTES", str(256 * 1024 * 1024)))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS", "256"))
+
+    # Session retention: sessions unused for SESSION_TTL_SECONDS are
+    # deleted (0 keeps them forever). The sweeper removes them in
+    # batches and then reclaims free pages with an incremental vacuum.
+    SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+    SESSION_TOUCH_SECONDS = float(os.getenv("SESSION_TOUCH_SECONDS", "60"))
+    SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "300"))
+    SWEEP_BATCH = int(os.getenv("SWEEP_BATCH", "200"))
+    VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "1000"))
+
+    # In-process LRU cache of decoded IRs, bounded by their JSON size
+    # (decoded dicts take a few times that in memory). 0 disables it.
+    IR_CACHE_MAX_BYTES = int(os.getenv("IR_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    # Write-behind queue: per write type, "sync" waits for the commit and
+    # "async" returns once queued. Analyses are sync with several workers:
+    # pending IRs are only visible inside the process that queued them.
+    # Chat messages are always sync; the next turn reads them back.
+    WRITE_DURABILITY = os.getenv(
+        "WRITE_DURABILITY",
+        "session=async,ir=async,touch=async,answer=async,warehouse=async,"
+        + ("analysis=sync" if WORKERS > 1 else "analysis=async")
+    )
+    WRITE_QUEUE_MAX = int(os.getenv("WRITE_QUEUE_MAX", "10000"))
+    WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "500"))
+
 settings = Settings()
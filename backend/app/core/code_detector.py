@@ -1,7 +1,10 @@
 import re
 from typing import Optional
 
+from backend.app.core.metrics import instrument
 
+
+@instrument("detect")
 def detect_code_type(code: str) -> Optional[str]:
     """
     Detect input code type.
@@ -0,0 +1,82 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class RequestAborted(Exception):
+    """
+    The request's work should stop: it ran out of time or nobody is
+    waiting for the answer any more.
+    """
+
+
+class DeadlineExceeded(RequestAborted):
+    pass
+
+
+class RequestCancelled(RequestAborted):
+    pass
+
+
+class Deadline:
+    """
+    End-to-end time budget for one request, plus a cancel token. The
+    same object is seen by every thread the request's context is copied
+    into (asyncio.to_thread does this), so cancel() from the event loop
+    stops an LLM stream running in a worker thread.
+    """
+
+    __slots__ = ("expires_at", "cancelled")
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self.cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise RequestCancelled("Request was cancelled")
+        if self.expired():
+            raise DeadlineExceeded("Request deadline exceeded")
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+@contextmanager
+def deadline_context(seconds: float):
+    """
+    Gives the work inside the block `seconds` to finish.
+    """
+    deadline = Deadline(seconds)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def check_deadline():
+    """
+    Raises if the current request has expired or been cancelled.
+    A no-op outside a deadline_context.
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
@@ -1,19 +1,49 @@
-from backend.app.core.parser_factory import get_parser
+import asyncio
+
+from backend.app.core import metrics
+from backend.app.core.deadline import check_deadline, RequestAborted
+from backend.app.core.executor import run_cpu_bound
+from backend.app.core.profiling import profile_call
+from backend.app.core.parser_factory import parse_code
 from backend.app.llm.explainer import explain
 from backend.app.analyzers.summarizer import summarize
+from backend.app.services.artifact_service import content_hash, load_artifact
+
+# Analyses currently running, by content hash: identical concurrent
+# submissions wait for the first one instead of repeating it
+_inflight: dict = {}
 
 
-def run_pipeline(code: str, language: str = "cobol") -> dict:
+async def run_pipeline(code: str, language: str = "cobol", on_stage=None) -> dict:
+    """
+    Parses, summarizes and explains code.
+
+    Args:
+        on_stage: optional async callback, awaited with "parsed",
+            "summarized" and "explained" as each stage completes
+    """
     language = language.lower()
+    size = len(code)
+    metrics.record_input(code, language)
 
-    parser = get_parser(language)
-    ir = parser.parse(code)
+    # Parse + summarize are CPU-bound: keep them off the event loop
+    with metrics.timed("parse"):
+        ir = await run_cpu_bound(parse_code, code, language, size=size)
+    metrics.record_ir(ir, language)
+    await _report(on_stage, "parsed")
 
     analysis = {}
     if language == "cobol":
-        analysis = summarize(ir)
+        with metrics.timed("summarize"):
+            analysis = await run_cpu_bound(summarize, ir, size=size)
+    await _report(on_stage, "summarized")
+
+    # Don't start the LLM call for a request that is already over
+    check_deadline()
 
-    explanation = explain(ir, language)
+    # The LLM call is I/O-bound: await it from a thread
+    explanation = await asyncio.to_thread(explain, ir, language)
+    await _report(on_stage, "explained")
 
     return {
         "language": language,
@@ -21,3 +51,99 @@ def run_pipeline(code: str, language: str = "cobol") -> dict:
         "analysis": analysis,
         "explanation": explanation
     }
+
+
+def run_pipeline_sync(code: str, language: str = "cobol") -> dict:
+    """
+    The whole pipeline in the calling thread. Used for profiled requests,
+    where every stage must run where the profiler can see it.
+    """
+    language = language.lower()
+    metrics.record_input(code, language)
+
+    with metrics.timed("parse"):
+        ir = parse_code(code, language)
+    metrics.record_ir(ir, language)
+
+    analysis = {}
+    if language == "cobol":
+        with metrics.timed("summarize"):
+            analysis = summarize(ir)
+
+    return {
+        "language": language,
+        "intermediate_representation": ir,
+        "analysis": analysis,
+        "explanation": explain(ir, language)
+    }
+
+
+async def run_profiled_pipeline(code: str, language: str, mode: str):
+    """
+    Runs the uncached pipeline under a profiler.
+
+    Returns:
+        tuple: (result shaped like run_cached_pipeline's, profile text)
+    """
+    language = language.lower()
+    result, profile = await asyncio.to_thread(
+        profile_call, mode, run_pipeline_sync, code, language
+    )
+    return {**result, "content_hash": content_hash(code, language), "cached": False}, profile
+
+
+async def run_cached_pipeline(code: str, language: str = "cobol", on_stage=None) -> dict:
+    """
+    run_pipeline behind the content-addressed artifact store.
+
+    A byte-identical (after normalization) program analyzed before is
+    returned straight from storage, skipping parse, summarize and the LLM.
+    The result carries "content_hash" and "cached" so callers can persist
+    a session that references the shared artifact.
+    """
+    language = language.lower()
+    key = content_hash(code, language)
+
+    artifact = await asyncio.to_thread(load_artifact, key)
+    metrics.ANALYSIS_CACHE.inc(result="hit" if artifact is not None else "miss")
+    if artifact is not None:
+        for stage in ("parsed", "summarized", "explained"):
+            await _report(on_stage, stage)
+        return {**artifact, "content_hash": key, "cached": True}
+
+    while key in _inflight:
+        try:
+            result = await asyncio.shield(_inflight[key])
+        except (RequestAborted, asyncio.CancelledError):
+            if asyncio.current_task().cancelling():
+                raise  # this request was cancelled, not the leader
+            # The leader's client went away or ran out of time; this
+            # request still wants the answer, so it takes over
+            continue
+
+        for stage in ("parsed", "summarized", "explained"):
+            await _report(on_stage, stage)
+        # Not marked cached: the leader may not have persisted it yet
+        return {**result, "content_hash": key, "cached": False}
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await run_pipeline(code, language, on_stage=on_stage)
+        future.set_result(result)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody is waiting
+        raise
+    finally:
+        del _inflight[key]
+
+    return {**result, "content_hash": key, "cached": False}
+
+
+async def _report(on_stage, stage: str):
+    if on_stage is not None:
+        await on_stage(stage)
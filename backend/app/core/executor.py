@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.app.config.settings import settings
+
+_process_pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool for CPU-bound work, creating it on first use.
+
+    Workers never fork the app itself: by the time the pool starts, the
+    db-writer and precompute threads are running, and a child forked
+    while one of them holds a lock can deadlock on it.
+    """
+    global _process_pool
+
+    if _process_pool is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PARSE_WORKERS or None,
+            mp_context=multiprocessing.get_context(method)
+        )
+
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def run_cpu_bound(func, *args, size: int = 0):
+    """
+    Runs a CPU-bound function without blocking the event loop.
+
+    Small inputs run inline, where pickling to a worker process would cost
+    more than the work itself. Everything else is sent to the process pool,
+    so a huge program only occupies one core instead of stalling the worker.
+
+    Args:
+        func: Top-level (picklable) function
+        size (int): Input size in bytes, used to pick inline vs pool
+    """
+    if size < settings.INLINE_PARSE_MAX_BYTES:
+        return func(*args)
+
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args)
+
+    try:
+        return await loop.run_in_executor(get_process_pool(), call)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); start a fresh pool and retry once
+        shutdown_process_pool()
+        return await loop.run_in_executor(get_process_pool(), call)
@@ -1,3 +1,9 @@
+# Version of the parsers' output. Part of every artifact's content hash,
+# so bumping it makes stored analyses of known programs miss and get
+# parsed again. Bump it whenever any parser's output changes.
+IR_VERSION = 4
+
+
 def empty_cobol_ir():
     return {
         "program_info": {},        # PROGRAM-ID, author, etc.
@@ -9,5 +15,6 @@ def empty_cobol_ir():
         "conditions": [],           # IF conditions only
         "file_operations": [],      # READ, WRITE, OPEN, CLOSE
         "performs": [],             # PERFORM call graph
+        "unrecognized": [],         # Procedure verbs no extractor captured
         "warnings": []               # Parser warnings
     }
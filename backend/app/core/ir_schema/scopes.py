@@ -0,0 +1,154 @@
+"""
+Line lookups over the COBOL scope tree (ir["scopes"]).
+
+Scopes nest properly, so the deepest scope containing a line only
+changes at scope boundaries. ScopeIndex flattens the tree into those
+boundaries once; each lookup is then a single bisect.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+# IR sections whose entries carry a "line"
+LINE_SECTIONS = ("statements", "control_flow", "file_operations", "performs")
+
+
+class ScopeIndex:
+    """
+    Interval index over a scope tree: line -> deepest containing scope
+    in O(log n) after an O(n) build.
+    """
+
+    def __init__(self, root: dict):
+        self.root = root
+        self._starts = []    # first line of each segment
+        self._owners = []    # deepest scope over that segment (None past the end)
+        self._parents = {}   # id(scope) -> parent scope
+        self._paragraphs = {}
+
+        self._walk(root, None)
+        self._mark(root["end"] + 1, None)
+
+    def deepest(self, line: int) -> Optional[dict]:
+        """
+        The innermost scope containing line, or None outside the program.
+        """
+        position = bisect_right(self._starts, line) - 1
+        if position < 0:
+            return None
+        return self._owners[position]
+
+    def path(self, line: int) -> list:
+        """
+        Scopes containing line, outermost (the program) first.
+        """
+        node = self.deepest(line)
+        path = []
+        while node is not None:
+            path.append(node)
+            node = self._parents.get(id(node))
+        return path[::-1]
+
+    def enclosing(self, line: int, kind: str) -> Optional[dict]:
+        """
+        The innermost scope of the given type containing line,
+        e.g. enclosing(n, "PARAGRAPH").
+        """
+        for node in reversed(self.path(line)):
+            if node["type"] == kind:
+                return node
+        return None
+
+    def paragraph(self, name: str) -> Optional[dict]:
+        return self._paragraphs.get(name.upper())
+
+    # ---------------- build ----------------
+
+    def _walk(self, node, parent):
+        self._parents[id(node)] = parent
+        if node["type"] == "PARAGRAPH" and node.get("name"):
+            self._paragraphs.setdefault(node["name"], node)
+
+        self._mark(node["start"], node)
+        for child in node["children"]:
+            self._walk(child, node)
+            # Back in this scope after the child ends
+            self._mark(child["end"] + 1, node)
+
+    def _mark(self, line, owner):
+        # Marks arrive in line order; at a tied line the last one wins,
+        # which is the deeper scope, or the parent once a child has ended
+        if self._starts and self._starts[-1] == line:
+            self._owners[-1] = owner
+        else:
+            self._starts.append(line)
+            self._owners.append(owner)
+
+
+def slice_ir(ir: dict, scopes: list) -> dict:
+    """
+    The IR restricted to the given scopes: line-bearing sections keep
+    only entries inside one of them; program info, data items and
+    warnings are kept whole. The scopes themselves replace the tree.
+    """
+    ranges = [(scope["start"], scope["end"]) for scope in scopes]
+    sliced = {
+        key: value for key, value in ir.items()
+        if key not in LINE_SECTIONS and key not in ("scopes", "paragraphs", "conditions")
+    }
+
+    for section in LINE_SECTIONS + ("paragraphs",):
+        entries = ir.get(section, [])
+        # Parsers emit every section in line order, so each range is a bisect
+        lines = [entry.get("line", 0) for entry in entries]
+        kept = []
+        for start, end in ranges:
+            kept.extend(entries[bisect_left(lines, start):bisect_right(lines, end)])
+        sliced[section] = kept
+
+    sliced["conditions"] = [
+        entry["condition"] for entry in sliced["control_flow"] if entry.get("type") == "IF"
+    ]
+    sliced["scopes"] = scopes
+    return sliced
+
+
+def focus_ir(ir: dict, question: str) -> Optional[dict]:
+    """
+    Slices the IR to what the question is about, when it names
+    paragraphs ("what does CALC-PAY do") or lines ("line 40").
+    Returns None when the question is about the whole program.
+    """
+    root = ir.get("scopes")
+    if not root or not question:
+        return None
+
+    index = ScopeIndex(root)
+    wanted = []
+
+    for token in re.findall(r"[A-Z0-9][A-Z0-9\-]*", question.upper()):
+        scope = index.paragraph(token)
+        if scope is not None and not any(scope is w for w in wanted):
+            wanted.append(scope)
+
+    for number in re.findall(r"\bLINES?\s+(\d+)", question, re.IGNORECASE):
+        scope = index.enclosing(int(number), "PARAGRAPH") or index.deepest(int(number))
+        if scope is not None and scope is not root and not any(scope is w for w in wanted):
+            wanted.append(scope)
+
+    if not wanted:
+        return None
+    return slice_ir(ir, wanted)
+
+
+def max_depth(node: dict) -> int:
+    """
+    Nesting depth of IF/EVALUATE/PERFORM blocks under node.
+    """
+    deepest = 0
+    for child in node.get("children", []):
+        depth = max_depth(child)
+        if child["type"] in ("IF", "EVALUATE", "PERFORM"):
+            depth += 1
+        deepest = max(deepest, depth)
+    return deepest
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import uuid
+
+from backend.app.core.engine import run_cached_pipeline
+from backend.app.llm.usage import usage_context
+from backend.app.services.chat_service import save_analyses
+from backend.app.services.job_service import (
+    create_job,
+    update_job,
+    get_job,
+    claim_job,
+    touch_job,
+    requeue_unfinished_jobs,
+    DONE,
+    FAILED
+)
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    In-process job queue: a fixed number of worker tasks on the app's
+    event loop pull job ids and run the pipeline. Job state lives in
+    SQLite, so nothing is lost with a process.
+
+    Running jobs heartbeat every heartbeat_every seconds. Every
+    recover_every seconds the queue requeues running jobs silent for
+    stale_after seconds (their process died) and takes up every queued
+    job in the table, including those stranded in a dead process's
+    memory; claim_job keeps each job to one runner.
+    """
+
+    def __init__(self, workers: int = 2, stale_after: float = 120,
+                 recover_every: float = 30, heartbeat_every: float = 30):
+        self.worker_count = max(workers, 1)
+        self.stale_after = stale_after
+        self.recover_every = max(recover_every, 1)
+        self.heartbeat_every = max(heartbeat_every, 0.1)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers = []
+        self._queued = set()    # Ids in self.queue, to not queue them twice
+
+    async def start(self):
+        await self.recover()
+        self.workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.worker_count)
+        ]
+        self.workers.append(asyncio.create_task(self._recover_loop()))
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, code: str, language: str) -> str:
+        job_id = str(uuid.uuid4())
+        await asyncio.to_thread(create_job, job_id, code, language)
+        self._enqueue(job_id)
+        return job_id
+
+    async def recover(self) -> int:
+        """
+        Requeues stale running jobs and queues every queued job not
+        already waiting here. Returns the number of jobs queued.
+        """
+        pending = await asyncio.to_thread(requeue_unfinished_jobs, self.stale_after)
+        return sum(self._enqueue(job_id) for job_id in pending)
+
+    def _enqueue(self, job_id) -> bool:
+        if job_id in self._queued:
+            return False
+        self._queued.add(job_id)
+        self.queue.put_nowait(job_id)
+        return True
+
+    async def _recover_loop(self):
+        while True:
+            await asyncio.sleep(self.recover_every)
+            try:
+                await self.recover()
+            except Exception:
+                logger.exception("Job recovery failed")
+
+    # ---------------- worker ----------------
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Job %s crashed", job_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        session_id = str(uuid.uuid4())
+        if not await asyncio.to_thread(claim_job, job_id, session_id):
+            return
+
+        job = await asyncio.to_thread(get_job, job_id, True)
+
+        async def on_stage(stage):
+            await asyncio.to_thread(update_job, job_id, session_id, stage=stage)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, session_id))
+        try:
+            with usage_context(session_id):
+                result = await run_cached_pipeline(
+                    code=job["code"],
+                    language=job["language"],
+                    on_stage=on_stage
+                )
+
+            result["session_id"] = session_id
+            await asyncio.to_thread(save_analyses, [result])
+
+            # Only while this runner still holds the claim: if its job
+            # went stale and was claimed again, the new runner reports
+            await asyncio.to_thread(
+                update_job,
+                job_id,
+                session_id,
+                status=DONE,
+                result={
+                    "session_id": session_id,
+                    "language": result["language"],
+                    "explanation": result.get("explanation", ""),
+                    "analysis": result.get("analysis", {}),
+                    "cached": result["cached"]
+                }
+            )
+        except Exception as e:
+            await asyncio.to_thread(update_job, job_id, session_id, status=FAILED, error=str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id, session_id):
+        # Keeps the job from looking stale to other processes' recovery
+        while True:
+            await asyncio.sleep(self.heartbeat_every)
+            try:
+                await asyncio.to_thread(touch_job, job_id, session_id)
+            except Exception:
+                logger.exception("Heartbeat of job %s failed", job_id)
@@ -0,0 +1,278 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds: sub-millisecond parsing up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+SIZE_BUCKETS = (
+    1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000
+)
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() is one bisect plus one locked update.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self._series.get(key)
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# ==========================================================
+# PIPELINE METRICS
+# ==========================================================
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "lce_stage_duration_seconds",
+    "Latency of each pipeline stage.",
+    ["stage"]
+)
+STAGE_ERRORS = registry.counter(
+    "lce_stage_errors_total",
+    "Exceptions raised per pipeline stage.",
+    ["stage"]
+)
+INPUT_BYTES = registry.histogram(
+    "lce_input_bytes",
+    "Size of submitted source code.",
+    ["language"],
+    buckets=SIZE_BUCKETS
+)
+INPUT_BYTES_TOTAL = registry.counter(
+    "lce_input_bytes_total",
+    "Total bytes of source code analyzed.",
+    ["language"]
+)
+IR_ELEMENTS = registry.counter(
+    "lce_ir_elements_total",
+    "IR elements produced by parsing, per IR section.",
+    ["language", "kind"]
+)
+ANALYSIS_CACHE = registry.counter(
+    "lce_analysis_cache_total",
+    "Content-addressed artifact lookups.",
+    ["result"]
+)
+LLM_TTFT = registry.histogram(
+    "lce_llm_time_to_first_token_seconds",
+    "Time from sending a completion request to its first streamed token."
+)
+LLM_HEDGES = registry.counter(
+    "lce_llm_hedges_total",
+    "Hedged LLM requests: sent, and which attempt streamed first.",
+    ["outcome"]
+)
+REQUESTS_ABORTED = registry.counter(
+    "lce_requests_aborted_total",
+    "Requests stopped before finishing.",
+    ["reason"]
+)
+EXPLANATIONS = registry.counter(
+    "lce_explanations_total",
+    "Program explanations, by whether a template or the LLM wrote them.",
+    ["language", "source"]
+)
+PRECOMPUTED_ANSWERS = registry.counter(
+    "lce_precomputed_answers_total",
+    "Speculative chat answers: computed, failed, skipped, and served or missed in /chat.",
+    ["event"]
+)
+SIMILAR_ANSWERS = registry.counter(
+    "lce_similar_answers_total",
+    "Chat questions answered from an earlier answer to a paraphrase.",
+    ["result"]
+)
+IR_CACHE = registry.counter(
+    "lce_ir_cache_total",
+    "In-process IR cache lookups.",
+    ["result"]
+)
+IR_CACHE_EVICTIONS = registry.counter(
+    "lce_ir_cache_evictions_total",
+    "IRs dropped from the in-process cache to stay within its byte budget."
+)
+SHARED_CACHE = registry.counter(
+    "lce_shared_cache_total",
+    "Cross-worker cache lookups.",
+    ["namespace", "result"]
+)
+EVICTED_ROWS = registry.counter(
+    "lce_evicted_rows_total",
+    "Rows deleted by the session sweeper, per table.",
+    ["table"]
+)
+WRITE_BATCH_SIZE = registry.histogram(
+    "lce_db_write_batch_size",
+    "Writes grouped into each write-behind commit.",
+    buckets=COUNT_BUCKETS
+)
+
+
+class timed:
+    """
+    Context manager recording the block's latency under stage, and
+    counting it as an error if it raises. A plain class rather than
+    @contextmanager keeps the per-use overhead around a microsecond.
+    """
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, stage=self.stage)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(stage=self.stage)
+        return False
+
+
+def instrument(stage: str):
+    """
+    Decorator form of timed() for synchronous functions.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_input(code: str, language: str):
+    size = len(code)
+    INPUT_BYTES.observe(size, language=language)
+    INPUT_BYTES_TOTAL.inc(size, language=language)
+
+
+def record_ir(ir: dict, language: str):
+    for kind, value in ir.items():
+        if isinstance(value, list):
+            IR_ELEMENTS.inc(len(value), language=language, kind=kind)
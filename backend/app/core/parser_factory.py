@@ -1,15 +1,36 @@
-from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
-from backend.app.parsers.jcl_parser.parser import JCLParser
+import importlib
+
+# language -> (module, class); modules are imported on first use
+PARSERS = {
+    "cobol": ("backend.app.parsers.regex_parser.cobol_regex_parser", "CobolRegexParser"),
+    "jcl": ("backend.app.parsers.jcl_parser.parser", "JCLParser"),
+}
+
+_parser_classes = {}
 
 
 def get_parser(language: str = "cobol"):
     language = language.lower()
 
-    if language == "cobol":
-        return CobolRegexParser()
+    if language not in PARSERS:
+        raise ValueError(f"Unsupported language: {language}")
+
+    return _load_parser_class(language)()
+
+
+def parse_code(code: str, language: str = "cobol") -> dict:
+    """
+    Parses code into IR. Top-level so it can run in a worker process.
+    """
+    return get_parser(language).parse(code)
+
 
-    if language == "jcl":
-        return JCLParser()
+def _load_parser_class(language: str):
+    parser_class = _parser_classes.get(language)
 
-    raise ValueError(f"Unsupported language: {language}")
+    if parser_class is None:
+        module_name, class_name = PARSERS[language]
+        parser_class = getattr(importlib.import_module(module_name), class_name)
+        _parser_classes[language] = parser_class
 
+    return parser_class
@@ -0,0 +1,159 @@
+import logging
+import os
+import queue
+import threading
+
+from backend.app.config.settings import settings
+from backend.app.core.deadline import deadline_context, RequestAborted
+from backend.app.core.metrics import PRECOMPUTED_ANSWERS
+from backend.app.llm.explainer import explain_with_query
+from backend.app.llm.usage import usage_context
+from backend.app.services.answer_service import (
+    answered_questions,
+    normalize_question,
+    save_answer,
+    speculative_questions
+)
+
+logger = logging.getLogger(__name__)
+
+# Lowest CPU priority on Linux (nice 19), so precomputation only uses
+# cycles request handlers leave idle
+NICENESS = 19
+
+
+class Precomputer:
+    """
+    Answers the usual follow-up questions about a freshly analyzed
+    program before they are asked. One background thread works through
+    programs in arrival order, one LLM call at a time; answers are stored
+    per content hash, so every session of the program (in any worker)
+    can use them.
+
+    The queue is bounded: when analyses arrive faster than they can be
+    precomputed, new programs are skipped rather than piling up.
+    """
+
+    def __init__(self, max_pending: int = 32):
+        self.enabled = settings.PRECOMPUTE
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._thread = None
+        self._stopping = threading.Event()
+        self._current = None    # Deadline of the LLM call in progress
+
+    def start(self):
+        if not self.enabled or self._thread:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._worker,
+            name="precompute",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """
+        Abandons the call in progress and drops whatever is still queued.
+        """
+        thread, self._thread = self._thread, None
+        if not thread:
+            return
+
+        self._stopping.set()
+        current = self._current
+        if current is not None:
+            current.cancel()
+
+        # Drop the backlog, then wake the worker if it is waiting. Never
+        # a blocking put: the worker exits on _stopping without draining,
+        # so nothing would free a slot in a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def submit(self, content_hash: str, ir: dict, language: str, session_id: str = None) -> bool:
+        """
+        Queues a program for precomputation. Returns False if it was not
+        queued (disabled, or the queue is full).
+        """
+        if not self._thread or not content_hash:
+            return False
+        try:
+            self._queue.put_nowait((content_hash, ir, language, session_id))
+            return True
+        except queue.Full:
+            PRECOMPUTED_ANSWERS.inc(event="skipped")
+            return False
+
+    # ---------------- worker thread ----------------
+
+    def _worker(self):
+        _lower_priority()
+
+        while not self._stopping.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self.precompute(*item)
+            except Exception:
+                logger.exception("Precomputation failed for %s", item[0])
+
+    def precompute(self, content_hash: str, ir: dict, language: str, session_id: str = None) -> int:
+        """
+        Answers every speculative question not answered yet for this
+        program. LLM usage is billed to session_id.
+
+        Returns:
+            int: answers stored
+        """
+        done = answered_questions(content_hash)
+        stored = 0
+
+        for question in speculative_questions(ir, language):
+            if self._stopping.is_set():
+                break
+
+            key = normalize_question(question)
+            if key in done:
+                continue
+            done.add(key)
+
+            try:
+                with usage_context(session_id), deadline_context(settings.LLM_TIMEOUT_SECONDS) as deadline:
+                    self._current = deadline
+                    answer = explain_with_query(ir, question, language)
+            except RequestAborted:
+                continue
+            finally:
+                self._current = None
+
+            # explain_with_query reports LLM failures in-band
+            if not answer or answer.startswith("ERROR"):
+                PRECOMPUTED_ANSWERS.inc(event="failed")
+                continue
+
+            save_answer(content_hash, question, answer)
+            PRECOMPUTED_ANSWERS.inc(event="computed")
+            stored += 1
+
+        return stored
+
+
+def _lower_priority():
+    # On Linux, setpriority on a thread id renices just that thread
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+precomputer = Precomputer(settings.PRECOMPUTE_MAX_PENDING)
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from backend.app.config.settings import settings
+
+SAMPLE = "sample"
+CPROFILE = "cprofile"
+
+
+def requested_mode(header_value, trusted=False):
+    """
+    Decides whether a request is profiled, and how.
+
+    "X-Profile: 1" (or "sample") samples stacks, "X-Profile: cprofile"
+    records a deterministic profile, and otherwise PROFILE_SAMPLE_RATE
+    selects a fraction of requests. The header is only honoured from a
+    trusted (admin) caller: a profiled run is slower and skips the
+    cache. Returns None for the usual case, at the cost of one header
+    lookup and one comparison.
+    """
+    if header_value and trusted:
+        value = header_value.strip().lower()
+        if value == CPROFILE:
+            return CPROFILE
+        if value in ("1", "true", "yes", SAMPLE):
+            return SAMPLE
+
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return SAMPLE
+
+    return None
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval and counts
+    collapsed stacks ("outer;inner;leaf"), ready for flamegraph.pl or
+    speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+
+            self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_call(mode: str, func, *args, **kwargs):
+    """
+    Runs func in the calling thread under the requested profiler.
+
+    Returns:
+        tuple: (func result, profile text)
+    """
+    if mode == CPROFILE:
+        # Only profiled requests pay for these imports
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+        return result, out.getvalue()
+
+    sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL_MS / 1000)
+    sampler.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        sampler.stop()
+
+    return result, sampler.collapsed()
+
+
+# ==========================================================
+# STORAGE
+# ==========================================================
+
+def save_profile(mode: str, text: str, meta: dict) -> str:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+
+    profile_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    extension = "pstats.txt" if mode == CPROFILE else "collapsed"
+
+    with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}"), "w") as f:
+        f.write(text)
+
+    with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.json"), "w") as f:
+        json.dump({"profile_id": profile_id, "mode": mode, "created_at": time.time(), **meta}, f)
+
+    _prune()
+    return profile_id
+
+
+def list_profiles() -> list:
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+
+    profiles = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        if name.endswith(".json"):
+            with open(os.path.join(settings.PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+
+    # Newest first
+    return sorted(profiles, key=lambda meta: meta["created_at"], reverse=True)
+
+
+def load_profile(profile_id: str):
+    """
+    Returns (mode, text) or None. profile_id is validated against the
+    stored metadata, so it cannot be used to read other files.
+    """
+    for meta in list_profiles():
+        if meta["profile_id"] == profile_id:
+            extension = "pstats.txt" if meta["mode"] == CPROFILE else "collapsed"
+            with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}")) as f:
+                return meta["mode"], f.read()
+    return None
+
+
+def _prune():
+    profiles = list_profiles()
+    for meta in profiles[settings.PROFILE_MAX_FILES:]:
+        for name in os.listdir(settings.PROFILE_DIR):
+            if name.startswith(meta["profile_id"] + "."):
+                os.remove(os.path.join(settings.PROFILE_DIR, name))
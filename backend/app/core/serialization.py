@@ -0,0 +1,116 @@
+import gzip
+import json
+import time
+from typing import Iterable, Optional
+
+from backend.app.config.settings import settings
+
+# Optional accelerators: used when installed, stdlib otherwise
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+def dumps(obj) -> bytes:
+    """
+    Encodes obj as compact UTF-8 JSON, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    """
+    Decodes JSON bytes or text, using orjson when available.
+
+    Raises:
+        ValueError: data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the best supported content encoding from an Accept-Encoding header.
+    """
+    accepted = set()
+
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if name and quality > 0:
+            accepted.add(name)
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=5)
+    return body
+
+
+def encode_payload(payload, accept_encoding: Optional[str] = None):
+    """
+    Serializes and (if worthwhile and accepted) compresses a payload.
+
+    Returns:
+        tuple: (body bytes, headers dict) where headers carry
+            Content-Encoding plus size and timing diagnostics
+    """
+    start = time.perf_counter()
+    raw = dumps(payload)
+
+    encoding = None
+    if len(raw) >= settings.COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(accept_encoding)
+
+    body = compress(raw, encoding)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    headers = {
+        "Vary": "Accept-Encoding",
+        "X-Raw-Bytes": str(len(raw)),
+        "X-Response-Bytes": str(len(body)),
+        "X-Encode-Ms": f"{elapsed_ms:.2f}"
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return body, headers
+
+
+def select_fields(payload: dict, fields: Optional[Iterable[str]], always=("session_id",)) -> dict:
+    """
+    Keeps only the requested top-level fields (plus the always-included ones).
+    """
+    if not fields:
+        return payload
+
+    wanted = set(fields) | set(always)
+    return {key: value for key, value in payload.items() if key in wanted}
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+
+from backend.app.services.retention_service import sweep_expired
+
+logger = logging.getLogger(__name__)
+
+
+class SessionSweeper:
+    """
+    Background task deleting expired sessions every interval seconds.
+    The sweep itself runs in a worker thread, in bounded batches.
+    """
+
+    def __init__(self, ttl: float, interval: float = 300, batch_size: int = 200, vacuum_pages: int = 1000):
+        self.ttl = ttl
+        self.interval = max(interval, 1)
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.task = None
+
+    def start(self):
+        if self.ttl > 0:
+            self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def sweep(self) -> dict:
+        deleted = await asyncio.to_thread(
+            sweep_expired, self.ttl, self.batch_size, self.vacuum_pages
+        )
+        if any(deleted.values()):
+            logger.info("Session sweep deleted %s", deleted)
+        return deleted
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Session sweep failed")
@@ -1,17 +1,119 @@
 import sqlite3
 import os
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.app.config.settings import settings
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_NAME = os.path.join(BASE_DIR, "chat.db")
+DB_NAME = settings.DB_PATH or os.path.join(BASE_DIR, "chat.db")
+
+# One long-lived connection per thread (FastAPI / asyncio worker threads
+# are a bounded pool, so this is effectively a connection pool)
+_local = threading.local()
+_pool = []
+_pool_lock = threading.Lock()
+_generation = 0     # Bumped by close_connections(); older connections are closed
+
 
 def get_connection():
-    return sqlite3.connect(DB_NAME, check_same_thread=False)
+    """
+    Opens a new, tuned connection. The caller owns it and must close it.
+    Request-path code should use transaction() instead.
+    """
+    conn = sqlite3.connect(
+        DB_NAME,
+        check_same_thread=False,
+        timeout=settings.DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=settings.DB_CACHED_STATEMENTS
+    )
+    _apply_pragmas(conn)
+    return conn
+
+
+@contextmanager
+def transaction():
+    """
+    Yields a cursor on this thread's pooled connection. Commits when the
+    block succeeds and rolls back if it raises. The connection (and its
+    prepared-statement cache) is reused by the thread's next call.
+    """
+    conn = _pooled_connection()
+    try:
+        yield conn.cursor()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def close_connections():
+    """
+    Closes every pooled connection (shutdown, tests). Threads holding one
+    open a fresh connection on their next transaction().
+    """
+    global _generation
+
+    with _pool_lock:
+        connections = list(_pool)
+        _pool.clear()
+        _generation += 1
+
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+    _local.__dict__.clear()
+
+
+def _pooled_connection():
+    conn = getattr(_local, "conn", None)
+
+    # DB_NAME can be repointed (tests), and close_connections() closes
+    # other threads' connections under them: never hand out either
+    if conn is None or _local.path != DB_NAME or _local.generation != _generation:
+        conn = get_connection()
+        with _pool_lock:
+            _pool.append(conn)
+            generation = _generation
+        _local.conn = conn
+        _local.path = DB_NAME
+        _local.generation = generation
+
+    return conn
+
+
+def _apply_pragmas(conn):
+    # WAL: readers never block the writer and commits append instead of
+    # rewriting pages. synchronous=NORMAL is durable across app crashes
+    # in WAL mode; only an OS crash can lose the last commits.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={settings.DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size=-{settings.DB_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={settings.DB_MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
 
 
 def init_db():
+    """
+    Creates and migrates the schema. Safe to run from several worker
+    processes at once: the work happens under BEGIN IMMEDIATE, so one
+    process migrates while the others wait and then find nothing to do.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(DB_NAME)), exist_ok=True)
+
     conn = get_connection()
+    conn.isolation_level = None  # explicit BEGIN / COMMIT below
     cur = conn.cursor()
 
+    # Only takes effect on a new file; existing ones convert in a migration
+    cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+    cur.execute("BEGIN IMMEDIATE")
+
     cur.execute("""
     CREATE TABLE IF NOT EXISTS sessions (
         session_id TEXT PRIMARY KEY,
@@ -34,5 +136,268 @@ def init_db():
     )
     """)
 
-    conn.commit()
-    conn.close()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS chat_summaries (
+        session_id TEXT PRIMARY KEY,
+        summary TEXT,
+        last_message_id INTEGER
+    )
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS llm_usage (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        template TEXT,
+        model TEXT,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        total_tokens INTEGER,
+        latency_ms REAL,
+        prompt_chars INTEGER,
+        status TEXT,
+        created_at REAL
+    )
+    """)
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_llm_usage_session
+    ON llm_usage (session_id)
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        status TEXT,
+        stage TEXT,
+        language TEXT,
+        code TEXT,
+        session_id TEXT,
+        result_json TEXT,
+        error TEXT,
+        created_at REAL,
+        updated_at REAL
+    )
+    """)
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_status
+    ON jobs (status)
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS artifacts (
+        content_hash TEXT PRIMARY KEY,
+        language TEXT,
+        ir_json TEXT,
+        analysis_json TEXT,
+        explanation TEXT,
+        created_at REAL
+    )
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS precomputed_answers (
+        content_hash TEXT,
+        question_key TEXT,
+        question TEXT,
+        answer TEXT,
+        created_at REAL,
+        PRIMARY KEY (content_hash, question_key)
+    )
+    """)
+
+    # IR warehouse: the IR sections of every analyzed program as rows
+    # (see services/warehouse_service.py)
+    for statement in WAREHOUSE_SCHEMA:
+        cur.execute(statement)
+
+    try:
+        _migrate(cur)
+        cur.execute("COMMIT")
+    except BaseException:
+        cur.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+WAREHOUSE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS wh_programs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        program TEXT UNIQUE,
+        language TEXT,
+        content_hash TEXT,
+        session_id TEXT,
+        analyzed_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS wh_statements (
+        program_id INTEGER,
+        line INTEGER,
+        paragraph TEXT,
+        loop_depth INTEGER,
+        type TEXT,
+        target TEXT,
+        source TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wh_statements_program ON wh_statements (program_id, line)",
+    "CREATE INDEX IF NOT EXISTS idx_wh_statements_type ON wh_statements (type)",
+    """
+    CREATE TABLE IF NOT EXISTS wh_control_flow (
+        program_id INTEGER,
+        line INTEGER,
+        paragraph TEXT,
+        loop_depth INTEGER,
+        type TEXT,
+        condition TEXT,
+        target TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wh_control_flow_program ON wh_control_flow (program_id)",
+    "CREATE INDEX IF NOT EXISTS idx_wh_control_flow_type ON wh_control_flow (type)",
+    """
+    CREATE TABLE IF NOT EXISTS wh_file_operations (
+        program_id INTEGER,
+        line INTEGER,
+        paragraph TEXT,
+        loop_depth INTEGER,
+        operation TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wh_file_operations_program ON wh_file_operations (program_id)",
+    "CREATE INDEX IF NOT EXISTS idx_wh_file_operations_operation ON wh_file_operations (operation)",
+    """
+    CREATE TABLE IF NOT EXISTS wh_variables (
+        program_id INTEGER,
+        level TEXT,
+        name TEXT,
+        picture TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wh_variables_program ON wh_variables (program_id)",
+    "CREATE INDEX IF NOT EXISTS idx_wh_variables_name ON wh_variables (name)",
+    """
+    CREATE TABLE IF NOT EXISTS wh_performs (
+        program_id INTEGER,
+        line INTEGER,
+        paragraph TEXT,
+        loop_depth INTEGER,
+        target TEXT,
+        looped INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wh_performs_program ON wh_performs (program_id, paragraph)",
+    """
+    CREATE TABLE IF NOT EXISTS wh_references (
+        program_id INTEGER,
+        line INTEGER,
+        name TEXT,
+        kind TEXT,
+        role TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wh_references_program ON wh_references (program_id)",
+    "CREATE INDEX IF NOT EXISTS idx_wh_references_name ON wh_references (name, kind)",
+]
+
+
+# -----------------------------
+# Schema migrations
+# -----------------------------
+# Applied in order to existing databases; PRAGMA user_version records
+# how many have run. Append new migrations, never reorder them.
+
+def _add_sessions_content_hash(cur):
+    if not _has_column(cur, "sessions", "content_hash"):
+        cur.execute("ALTER TABLE sessions ADD COLUMN content_hash TEXT")
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sessions_content_hash
+    ON sessions (content_hash)
+    """)
+
+
+def _add_chat_message_ids(cur):
+    # The original table had no key, so rebuild it. Ids are copied from
+    # rowid, which chat_summaries.last_message_id already refers to.
+    if not _has_column(cur, "chat_messages", "id"):
+        cur.execute("ALTER TABLE chat_messages RENAME TO chat_messages_old")
+        cur.execute("""
+        CREATE TABLE chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            role TEXT,
+            message TEXT,
+            created_at REAL
+        )
+        """)
+        cur.execute("""
+        INSERT INTO chat_messages (id, session_id, role, message)
+        SELECT rowid, session_id, role, message FROM chat_messages_old
+        ORDER BY rowid
+        """)
+        cur.execute("DROP TABLE chat_messages_old")
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_session
+    ON chat_messages (session_id, id)
+    """)
+
+
+def _add_session_access_times(cur):
+    for column in ("created_at", "last_access"):
+        if not _has_column(cur, "sessions", column):
+            cur.execute(f"ALTER TABLE sessions ADD COLUMN {column} REAL")
+
+    # Existing sessions get a full TTL from now rather than expiring at once
+    cur.execute(
+        "UPDATE sessions SET created_at = ?, last_access = ? WHERE last_access IS NULL",
+        (time.time(), time.time())
+    )
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sessions_last_access
+    ON sessions (last_access)
+    """)
+
+
+def _enable_incremental_vacuum(cur):
+    # auto_vacuum can only change through a full VACUUM, which cannot run
+    # inside a transaction. This is a one-off cost on databases created
+    # before it; afterwards the sweeper reclaims space a few pages at a time.
+    if cur.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        cur.execute("COMMIT")
+        cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cur.execute("VACUUM")
+        # Another process may have migrated meanwhile; every migration
+        # is idempotent, so carrying on under a fresh lock is safe
+        cur.execute("BEGIN IMMEDIATE")
+
+
+MIGRATIONS = [
+    _add_sessions_content_hash,
+    _add_chat_message_ids,
+    _add_session_access_times,
+    _enable_incremental_vacuum,
+]
+
+
+def _migrate(cur):
+    for target, migration in enumerate(MIGRATIONS, start=1):
+        if _user_version(cur) < target:
+            migration(cur)
+            # Re-read: a migration that released the lock may have let
+            # another process get further than this one
+            cur.execute(f"PRAGMA user_version = {max(target, _user_version(cur))}")
+
+
+def _user_version(cur):
+    return cur.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _has_column(cur, table, column):
+    return any(row[1] == column for row in cur.execute(f"PRAGMA table_info({table})"))
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+
+from backend.app.config.settings import settings
+from backend.app.core.metrics import IR_CACHE, IR_CACHE_EVICTIONS
+
+
+class IRCache:
+    """
+    In-process LRU cache of decoded IRs, keyed by session id and bounded
+    by the total size of the entries' JSON. Cached IRs are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # session_id -> [ir, size, last_access]
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Returns (ir, last_access), or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+
+        IR_CACHE.inc(result="hit" if entry else "miss")
+        return (entry[0], entry[2]) if entry else None
+
+    def put(self, session_id, ir, size: int, last_access: float):
+        # A single IR bigger than the whole budget is not worth caching
+        if size > self.max_bytes:
+            self.invalidate(session_id)
+            return
+
+        with self._lock:
+            old = self._entries.pop(session_id, None)
+            if old:
+                self.size -= old[1]
+
+            self._entries[session_id] = [ir, size, last_access]
+            self.size += size
+
+            evicted = 0
+            while self.size > self.max_bytes:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self.size -= old_size
+                evicted += 1
+
+        if evicted:
+            IR_CACHE_EVICTIONS.inc(evicted)
+
+    def touch(self, session_id, last_access: float):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry[2] = last_access
+
+    def invalidate(self, *session_ids):
+        with self._lock:
+            for session_id in session_ids:
+                entry = self._entries.pop(session_id, None)
+                if entry:
+                    self.size -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        hits = IR_CACHE.value(result="hit")
+        misses = IR_CACHE.value(result="miss")
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "evictions": IR_CACHE_EVICTIONS.value()
+        }
+
+
+ir_cache = IRCache(settings.IR_CACHE_MAX_BYTES)
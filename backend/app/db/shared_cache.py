@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+
+from backend.app.config.settings import settings
+from backend.app.core.metrics import SHARED_CACHE
+from backend.app.db import database
+
+# Entries touched more recently than this are not re-stamped on read,
+# so cache hits stay read-only almost all the time
+TOUCH_SECONDS = 60
+
+# How many puts between checks of the total size
+EVICT_CHECK_EVERY = 64
+
+
+class SharedCache:
+    """
+    Key/value cache shared by every worker process on the host, stored
+    in its own WAL-mode SQLite file so cache traffic never contends with
+    the main database's writer. Values are bytes, grouped by namespace
+    ("llm", "ir"). Least recently used entries are evicted past max_bytes.
+
+    Losing the file only costs recomputation, so it is written with
+    synchronous=OFF.
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._local = threading.local()
+        self._puts = 0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, max_age: float = 0):
+        """
+        Returns the stored bytes, or None on a miss (or if older than
+        max_age seconds, when given).
+        """
+        if not self.enabled:
+            return None
+
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, created_at, last_used FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+
+        now = time.time()
+        if row is None or (max_age and now - row[1] > max_age):
+            SHARED_CACHE.inc(namespace=namespace, result="miss")
+            return None
+
+        if now - row[2] > TOUCH_SECONDS:
+            with conn:
+                conn.execute(
+                    "UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key)
+                )
+
+        SHARED_CACHE.inc(namespace=namespace, result="hit")
+        return row[0]
+
+    def put(self, namespace: str, key: str, value: bytes):
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (namespace, key, value, len(value), now, now)
+            )
+
+        with self._lock:
+            self._puts += 1
+            check = self._puts % EVICT_CHECK_EVERY == 0
+        if check:
+            self.evict()
+
+    def delete(self, namespace: str, *keys):
+        if not self.enabled or not keys:
+            return
+
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                [(namespace, key) for key in keys]
+            )
+
+    def evict(self):
+        """
+        Drops least recently used entries until the cache is back under
+        90% of max_bytes.
+        """
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        rows = conn.execute("SELECT rowid, size FROM cache ORDER BY last_used").fetchall()
+
+        doomed = []
+        for rowid, size in rows:
+            if freed >= target:
+                break
+            doomed.append((rowid,))
+            freed += size
+
+        with conn:
+            conn.executemany("DELETE FROM cache WHERE rowid = ?", doomed)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------------- connection ----------------
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Before connecting: SQLite will not create missing directories
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                timeout=settings.DB_BUSY_TIMEOUT_MS / 1000
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._init_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self, conn):
+        if self._ready:
+            return
+
+        # Several workers may get here at once; IMMEDIATE serializes them
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache (
+            namespace TEXT,
+            key TEXT,
+            value BLOB,
+            size INTEGER,
+            created_at REAL,
+            last_used REAL,
+            PRIMARY KEY (namespace, key)
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_used ON cache (last_used)")
+        conn.execute("COMMIT")
+        conn.isolation_level = ""
+
+        self._ready = True
+
+
+def _default_path():
+    return settings.SHARED_CACHE_PATH or os.path.join(
+        os.path.dirname(os.path.abspath(database.DB_NAME)), "cache.db"
+    )
+
+
+shared_cache = SharedCache(
+    _default_path(),
+    settings.SHARED_CACHE_MAX_BYTES,
+    enabled=settings.SHARED_CACHE
+)
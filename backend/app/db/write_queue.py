@@ -0,0 +1,209 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from backend.app.config.settings import settings
+from backend.app.core.metrics import WRITE_BATCH_SIZE, timed
+from backend.app.db.database import transaction
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"      # caller waits until its write is committed
+ASYNC = "async"    # caller returns once the write is queued
+
+_STOP = object()
+
+
+class _Write:
+    __slots__ = ("kind", "op", "args", "future", "pending")
+
+    def __init__(self, kind, op, args, pending):
+        self.kind = kind
+        self.op = op
+        self.args = args
+        self.future = Future()
+        self.pending = pending
+
+
+class WriteQueue:
+    """
+    Write-behind persistence. Request handlers enqueue writes and one
+    background thread commits them, grouping everything queued since the
+    previous commit into a single transaction.
+
+    Each write type has a durability level: "sync" writes block the
+    caller until committed (they still share the group commit), "async"
+    writes return immediately. Values a write will persist can be
+    registered as pending so reads see them before the commit lands.
+
+    Until start() is called (tests, scripts) writes run inline.
+    """
+
+    def __init__(self, durability: str = "", max_size: int = 10000, max_batch: int = 500):
+        self.durability = _parse_durability(durability)
+        self.max_size = max_size
+        self.max_batch = max(max_batch, 1)
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # Signalled by the writer when it frees queue slots
+        self._space = threading.Condition(self._lock)
+        self._pending = {}
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                return
+            self._queue = queue.Queue(maxsize=self.max_size)
+            self._thread = threading.Thread(
+                target=self._writer,
+                name="db-writer",
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops accepting writes and blocks until everything queued is committed.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            # Submitters waiting for space fall back to inline writes
+            self._space.notify_all()
+
+        if thread:
+            # Outside the lock: the writer needs it to finish writes and
+            # free the slot a full queue is waiting for
+            self._queue.put(_STOP)
+            thread.join()
+
+    def submit(self, kind: str, op, *args, pending: dict = None):
+        """
+        Queues op(cursor, *args) for the writer thread.
+
+        Args:
+            kind: write type, looked up in the durability settings
+            op: function applying the write to a cursor
+            pending: {key: value} readable through peek() until committed
+
+        Returns:
+            Future: resolved once the write is committed (or failed)
+        """
+        write = _Write(kind, op, args, pending)
+
+        with self._space:
+            running = self._thread is not None
+            if running and pending:
+                # Registered before the put so the writer cannot finish
+                # the write before its entries exist
+                self._pending.update(pending)
+            # Enqueued under the lock so nothing slips in behind stop(),
+            # but never blocking with it held: when the queue is full,
+            # wait() releases the lock until the writer frees a slot
+            while running:
+                try:
+                    self._queue.put_nowait(write)
+                    break
+                except queue.Full:
+                    self._space.wait()
+                    running = self._thread is not None
+
+        if not running:
+            self._commit([write])
+
+        if not running or self.durability.get(kind, SYNC) == SYNC:
+            write.future.result()
+
+        return write.future
+
+    def peek(self, key):
+        """
+        Returns the value of a queued-but-uncommitted write, or None.
+        """
+        return self._pending.get(key)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    # ---------------- writer thread ----------------
+
+    def _writer(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+
+            # Group commit: take whatever queued up during the last commit
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._space:
+                self._space.notify_all()
+
+            if _STOP in batch:
+                batch.remove(_STOP)
+                stopping = True
+
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch):
+        WRITE_BATCH_SIZE.observe(len(batch))
+
+        try:
+            with timed("db_commit"), transaction() as cur:
+                for write in batch:
+                    write.op(cur, *write.args)
+        except Exception as e:
+            if len(batch) == 1:
+                self._finish(batch[0], e)
+                return
+            # One bad write must not take the rest of the group with it
+            for write in batch:
+                self._commit([write])
+            return
+
+        for write in batch:
+            self._finish(write, None)
+
+    def _finish(self, write, error):
+        if write.pending:
+            with self._lock:
+                for key, value in write.pending.items():
+                    # A newer write for the same key keeps its entry
+                    if self._pending.get(key) is value:
+                        del self._pending[key]
+
+        if error is None:
+            write.future.set_result(None)
+            return
+
+        write.future.set_exception(error)
+        if self.durability.get(write.kind, SYNC) == ASYNC:
+            logger.error("Queued %s write failed", write.kind, exc_info=error)
+
+
+def _parse_durability(spec: str) -> dict:
+    """
+    "message=async,analysis=sync" -> {"message": "async", "analysis": "sync"}
+    """
+    levels = {}
+    for part in (spec or "").split(","):
+        kind, _, level = part.partition("=")
+        kind, level = kind.strip(), level.strip().lower()
+        if not kind:
+            continue
+        if level not in (SYNC, ASYNC):
+            raise ValueError(f"Unknown durability '{level}' for {kind} writes")
+        levels[kind] = level
+    return levels
+
+
+write_queue = WriteQueue(
+    durability=settings.WRITE_DURABILITY,
+    max_size=settings.WRITE_QUEUE_MAX,
+    max_batch=settings.WRITE_BATCH_MAX
+)
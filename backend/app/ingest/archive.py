@@ -0,0 +1,376 @@
+"""
+Streaming readers for member libraries: zip and tar bundles (tar.gz,
+tar.bz2, tar.xz) and IEBUPDTE PDS unloads ("./ ADD NAME=" control
+records, EBCDIC or ASCII).
+
+Archives are read front to back from a plain binary stream, one member
+at a time, and nothing is extracted to disk: zip entries are found by
+their local headers (no central directory, so no seeking), tar through
+tarfile's stream mode. Memory use is one member plus read buffers,
+whatever the archive size.
+
+IEBCOPY unloads (and XMIT files) are not supported; unload the PDS with
+IEBUPDTE or send a zip / tar.
+
+For request bodies, aiter_archive() runs the reader on worker threads
+and pulls body chunks only as the reader needs them, so a slow
+consumer slows the upload down instead of buffering it.
+"""
+import asyncio
+import io
+import re
+import struct
+import tarfile
+import zlib
+from typing import AsyncIterator, Iterator, Optional
+
+from backend.app.config.settings import settings
+from backend.app.ingest.ebcdic import iter_stream_lines, member_text, source_text
+
+ZIP = "zip"
+TAR = "tar"
+IEBUPDTE = "iebupdte"
+
+SNIFF_BYTES = 512
+READ_SIZE = 64 * 1024
+
+_ZIP_LOCAL = struct.Struct("<4sHHHHHIIIHH")
+_ZIP_LOCAL_SIGNATURE = b"PK\x03\x04"
+_ZIP_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+
+_CONTROL = re.compile(r"^\./\s*(\w+)\s*(.*)")
+_MEMBER_NAME = re.compile(r"\bNAME=([^,\s]+)")
+
+
+def archive_format(head: bytes) -> Optional[str]:
+    """
+    ZIP, TAR, IEBUPDTE or None, from the first bytes of an archive.
+    """
+    if head[:4] in (_ZIP_LOCAL_SIGNATURE, b"PK\x05\x06"):
+        return ZIP
+    if (
+        head[:2] == b"\x1f\x8b"              # gzip
+        or head[:3] == b"BZh"                # bzip2
+        or head[:6] == b"\xfd7zXZ\x00"       # xz
+        or head[257:262] == b"ustar"
+    ):
+        return TAR
+    # "./" in ASCII or EBCDIC
+    if head.lstrip(b" ")[:2] == b"./" or head.lstrip(b"\x40")[:2] == b"\x4b\x61":
+        return IEBUPDTE
+    return None
+
+
+def iter_archive(stream, fmt: Optional[str] = None, language: Optional[str] = None) -> Iterator[dict]:
+    """
+    Yields the members of an archive read from a binary stream, in
+    archive order, as {"name", "code", "language"} dicts ready for
+    batch_service.analyze_members. Members larger than
+    MEMBER_MAX_BYTES come back as {"name", "error"}.
+
+    Raises:
+        ValueError: unknown or corrupt archive
+    """
+    stream = _Reader(stream)
+    fmt = fmt or archive_format(stream.peek(SNIFF_BYTES))
+
+    if fmt == ZIP:
+        members = _zip_members(stream)
+    elif fmt == TAR:
+        members = _tar_members(stream)
+    elif fmt == IEBUPDTE:
+        yield from _iebupdte_members(stream, language)
+        return
+    else:
+        raise ValueError(
+            "Not a zip, tar or IEBUPDTE archive (IEBCOPY unloads are not supported)."
+        )
+
+    for name, data in members:
+        if data is None:
+            yield _too_large(name)
+            continue
+        member = member_text(
+            data, settings.MEMBER_CODEPAGE, settings.MEMBER_LRECL, language=language
+        )
+        yield {"name": name, "code": member["code"], "language": member["language"]}
+
+
+async def aiter_archive(chunks: AsyncIterator[bytes], language: Optional[str] = None):
+    """
+    iter_archive() over an async byte stream (a request body). Each
+    member is read on a worker thread; the thread fetches body chunks
+    from the event loop as it needs them.
+
+    Raises:
+        ValueError: from the first member on, for an unknown archive
+    """
+    loop = asyncio.get_running_loop()
+    stream = io.BufferedReader(_AsyncChunks(chunks, loop), READ_SIZE)
+    members = iter_archive(stream, language=language)
+
+    while True:
+        member = await asyncio.to_thread(next, members, None)
+        if member is None:
+            return
+        yield member
+
+
+def _too_large(name):
+    return {"name": name, "error": f"Member exceeds {settings.MEMBER_MAX_BYTES} bytes."}
+
+
+# ==========================================================
+# STREAMS
+# ==========================================================
+
+class _Reader:
+    """
+    A binary stream with peek() and unread(), reading exactly the
+    number of bytes asked for until the end.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._pending = b""
+
+    def peek(self, size: int) -> bytes:
+        if len(self._pending) < size:
+            self._pending += self._read_raw(size - len(self._pending))
+        return self._pending[:size]
+
+    def unread(self, data: bytes):
+        self._pending = data + self._pending
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            data, self._pending = self._pending + self._stream.read(), b""
+            return data
+        data = self._pending[:size]
+        self._pending = self._pending[size:]
+        if len(data) < size:
+            data += self._read_raw(size - len(data))
+        return data
+
+    def _read_raw(self, size):
+        parts = []
+        while size > 0:
+            part = self._stream.read(size)
+            if not part:
+                break
+            parts.append(part)
+            size -= len(part)
+        return b"".join(parts)
+
+
+class _AsyncChunks(io.RawIOBase):
+    """
+    A blocking raw stream over an async chunk iterator, for use from a
+    worker thread while the event loop runs.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop):
+        self._chunks = chunks
+        self._loop = loop
+        self._chunk = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            chunk = asyncio.run_coroutine_threadsafe(self._next(), self._loop).result()
+            if chunk is None:
+                return 0
+            self._chunk = chunk
+
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    async def _next(self):
+        return await anext(self._chunks, None)
+
+
+# ==========================================================
+# ZIP
+# ==========================================================
+
+def _zip_members(stream):
+    """
+    Yields (name, data or None if too large) per file entry, reading
+    local headers in order. Entries written with a data descriptor
+    (sizes after the data) are fine when deflated.
+    """
+    while stream.peek(4) == _ZIP_LOCAL_SIGNATURE:
+        header = stream.read(_ZIP_LOCAL.size)
+        if len(header) < _ZIP_LOCAL.size:
+            raise ValueError("Truncated zip archive.")
+        (_, _, flags, method, _, _, crc, compressed, size,
+         name_length, extra_length) = _ZIP_LOCAL.unpack(header)
+
+        raw_name = stream.read(name_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        compressed, size, zip64 = _zip64_sizes(stream.read(extra_length), compressed, size)
+
+        if flags & 0x01:
+            raise ValueError(f"{name}: encrypted zip entries are not supported.")
+        descriptor = bool(flags & 0x08)
+
+        if method == 0:
+            if descriptor and not compressed:
+                raise ValueError(f"{name}: stored entries with a data descriptor cannot be streamed.")
+            data = _read_stored(stream, compressed)
+        elif method == 8:
+            data = _inflate(stream, None if descriptor else compressed)
+        else:
+            raise ValueError(f"{name}: unsupported zip compression method {method}.")
+
+        if descriptor:
+            crc = _read_descriptor(stream, zip64)
+
+        if data is not None and zlib.crc32(data) != crc:
+            raise ValueError(f"{name}: CRC mismatch, the archive is corrupt.")
+
+        if not name.endswith("/"):
+            yield name, data
+
+    if stream.peek(4)[:2] != b"PK" and stream.peek(1):
+        raise ValueError("Unexpected data in zip archive.")
+
+
+def _zip64_sizes(extra, compressed, size):
+    # The zip64 extra field (id 1) holds the 8-byte sizes that are
+    # 0xFFFFFFFF in the header, uncompressed size first
+    position = 0
+    while position + 4 <= len(extra):
+        kind, length = struct.unpack_from("<HH", extra, position)
+        if kind == 0x0001:
+            values = iter(struct.unpack_from(f"<{length // 8}Q", extra, position + 4))
+            if size == 0xFFFFFFFF:
+                size = next(values)
+            if compressed == 0xFFFFFFFF:
+                compressed = next(values)
+            return compressed, size, True
+        position += 4 + length
+    return compressed, size, False
+
+
+def _read_stored(stream, length):
+    if length > settings.MEMBER_MAX_BYTES:
+        while length > 0:
+            skipped = len(stream.read(min(length, READ_SIZE)))
+            if not skipped:
+                raise ValueError("Truncated zip archive.")
+            length -= skipped
+        return None
+    data = stream.read(length)
+    if len(data) < length:
+        raise ValueError("Truncated zip archive.")
+    return data
+
+
+def _inflate(stream, length=None):
+    """
+    Inflates one entry. Without a length, reads until the deflate
+    stream ends and puts back what it read past it. Returns None when
+    the entry inflates past MEMBER_MAX_BYTES (it is still consumed).
+    """
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    parts, total, remaining = [], 0, length
+
+    while not decompressor.eof:
+        chunk = stream.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+        if not chunk:
+            raise ValueError("Truncated zip archive.")
+        if remaining is not None:
+            remaining -= len(chunk)
+
+        out = decompressor.decompress(chunk)
+        total += len(out)
+        if parts is not None:
+            parts.append(out)
+            if total > settings.MEMBER_MAX_BYTES:
+                parts = None
+
+    if decompressor.unused_data:
+        stream.unread(decompressor.unused_data)
+    return b"".join(parts) if parts is not None else None
+
+
+def _read_descriptor(stream, zip64) -> int:
+    # [signature] crc32, compressed size, size (8-byte sizes for zip64)
+    if stream.peek(4) == _ZIP_DESCRIPTOR_SIGNATURE:
+        stream.read(4)
+    descriptor = stream.read(20 if zip64 else 12)
+    return struct.unpack_from("<I", descriptor)[0]
+
+
+# ==========================================================
+# TAR
+# ==========================================================
+
+def _tar_members(stream):
+    try:
+        with tarfile.open(fileobj=stream, mode="r|*") as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                if info.size > settings.MEMBER_MAX_BYTES:
+                    yield info.name, None
+                    continue
+                yield info.name, archive.extractfile(info).read()
+    except tarfile.TarError as e:
+        raise ValueError(f"Corrupt tar archive: {e}")
+
+
+# ==========================================================
+# IEBUPDTE
+# ==========================================================
+
+def _iebupdte_members(stream, language):
+    """
+    Members of an IEBUPDTE unload: each starts at a "./ ADD NAME=" (or
+    REPL) control record and runs to the next control record; "./ ENDUP"
+    ends the unload. EBCDIC unloads are RECFM=FB records, ASCII ones
+    newline-separated text.
+    """
+    head = stream.peek(SNIFF_BYTES)
+    if head.lstrip(b"\x40")[:2] == b"\x4b\x61":
+        codepage = settings.MEMBER_CODEPAGE if settings.MEMBER_CODEPAGE != "auto" else "cp037"
+        recfm = "FB"
+    else:
+        codepage, recfm = "latin-1", "TEXT"
+
+    lines = iter_stream_lines(stream, codepage, settings.MEMBER_LRECL, recfm)
+    name, body, size = None, [], 0
+
+    def finish():
+        if size > settings.MEMBER_MAX_BYTES:
+            return _too_large(name)
+        code, detected = source_text(body, language)
+        return {"name": name, "code": code, "language": detected}
+
+    for line in lines:
+        control = _CONTROL.match(line)
+        if control is None:
+            if name is not None and size <= settings.MEMBER_MAX_BYTES:
+                body.append(line)
+            size += len(line) + 1
+            continue
+
+        verb, operands = control.group(1).upper(), control.group(2)
+        if verb in ("ADD", "REPL", "ENDUP") and name is not None:
+            yield finish()
+            name = None
+        if verb in ("ADD", "REPL"):
+            found = _MEMBER_NAME.search(operands.upper())
+            if found is None:
+                raise ValueError(f"IEBUPDTE {verb} without NAME=: {line.strip()}")
+            name, body, size = found.group(1), [], 0
+        elif verb == "ENDUP":
+            return
+
+    if name is not None:
+        yield finish()
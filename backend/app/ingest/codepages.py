@@ -0,0 +1,42 @@
+"""
+EBCDIC code pages Python does not ship. Importing this module registers
+them with the codecs machinery, so "cp1047" works anywhere a codec
+name is accepted.
+
+cp1047 (z/OS Open Systems Latin-1) is cp037 with six code points
+moved: the square brackets, caret, not sign, Y acute and diaeresis.
+"""
+import codecs
+
+_CP1047_CHANGES = {0x5F: "^", 0xAD: "[", 0xB0: "¬", 0xBA: "Ý", 0xBB: "¨", 0xBD: "]"}
+
+_CP1047_DECODING = "".join(
+    _CP1047_CHANGES.get(byte, char)
+    for byte, char in enumerate(bytes(range(256)).decode("cp037"))
+)
+_CP1047_ENCODING = codecs.charmap_build(_CP1047_DECODING)
+
+
+class _Cp1047IncrementalDecoder(codecs.IncrementalDecoder):
+    def decode(self, data, final=False):
+        return codecs.charmap_decode(data, self.errors, _CP1047_DECODING)[0]
+
+
+class _Cp1047IncrementalEncoder(codecs.IncrementalEncoder):
+    def encode(self, text, final=False):
+        return codecs.charmap_encode(text, self.errors, _CP1047_ENCODING)[0]
+
+
+def _search(name):
+    if name not in ("cp1047", "ibm1047", "ibm_1047", "1047"):
+        return None
+    return codecs.CodecInfo(
+        name="cp1047",
+        encode=lambda text, errors="strict": codecs.charmap_encode(text, errors, _CP1047_ENCODING),
+        decode=lambda data, errors="strict": codecs.charmap_decode(data, errors, _CP1047_DECODING),
+        incrementalencoder=_Cp1047IncrementalEncoder,
+        incrementaldecoder=_Cp1047IncrementalDecoder,
+    )
+
+
+codecs.register(_search)
@@ -0,0 +1,227 @@
+"""
+Raw mainframe members as they come off the host: EBCDIC, RECFM=FB
+LRECL=80 (or RECFM=VB with record descriptor words), no newlines.
+Turns them into the newline-separated source the detector and parsers
+take, one line per record.
+
+Records are decoded a chunk at a time straight from the buffer (an mmap
+for files), so the only whole-member copy is the final source text.
+"""
+import codecs
+import mmap
+import os
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from backend.app.core.code_detector import detect_code_type
+from backend.app.ingest import codepages  # noqa: F401 - registers cp1047
+
+# Columns 73-80 of a source record are the sequence area
+SEQUENCE_START = 72
+SEQUENCE_END = 80
+
+CHUNK_RECORDS = 4096    # records per codec call
+SNIFF_BYTES = 4096      # bytes looked at to tell EBCDIC from ASCII
+DETECT_LINES = 200      # lines the language is detected from
+
+# Controls the codecs map record bytes to (EBCDIC NL is U+0085) would
+# split a record into several lines in str.splitlines()
+_CONTROLS = {c: " " for c in chain(range(0x20), (0x7F, 0x85, 0x2028, 0x2029))}
+
+
+def sniff(sample: bytes):
+    """
+    Guesses (codepage, recfm) of a member from its first bytes: EBCDIC
+    text is full of 0x40 (space) and has no ASCII spaces or newlines.
+    """
+    sample = bytes(sample[:SNIFF_BYTES])
+    if sample.count(b"\x40") > sample.count(b"\x20") and b"\n" not in sample:
+        return "cp037", "FB"
+    if b"\n" in sample:
+        return "utf-8", "TEXT"
+    return "latin-1", "FB"
+
+
+def iter_lines(buffer, codepage: str = "cp037", lrecl: int = 80, recfm: str = "FB",
+               strip_sequence: bool = True) -> Iterator[str]:
+    """
+    An iterator of one source line per record of buffer (bytes, mmap
+    or memoryview), right-trimmed, with columns 73-80 removed unless
+    strip_sequence is off. recfm is FB, VB or TEXT (newline-separated,
+    nothing stripped).
+    """
+    view = memoryview(buffer).cast("B")
+    recfm = recfm.upper()
+
+    if recfm == "VB":
+        records = _variable_records(view, codepage)
+    else:
+        step = max(lrecl, 1) * CHUNK_RECORDS
+        chunks = (view[start:start + step] for start in range(0, len(view), step))
+        records = _records(chunks, codepage, lrecl, recfm)
+
+    return _lines(records, recfm, strip_sequence)
+
+
+def iter_stream_lines(stream, codepage: str = "cp037", lrecl: int = 80, recfm: str = "FB",
+                      strip_sequence: bool = True) -> Iterator[str]:
+    """
+    iter_lines() over a binary file object, read a chunk at a time
+    (RECFM=FB or TEXT). stream.read(n) must return n bytes until the end.
+    """
+    recfm = recfm.upper()
+    if recfm == "VB":
+        raise ValueError("RECFM=VB members cannot be read from a stream")
+
+    step = max(lrecl, 1) * CHUNK_RECORDS
+    chunks = iter(lambda: stream.read(step), b"")
+    return _lines(_records(chunks, codepage, lrecl, recfm), recfm, strip_sequence)
+
+
+def source_text(lines: Iterable[str], language: Optional[str] = None,
+                blank_sequence: bool = True):
+    """
+    Joins decoded lines into parser input, detecting the language from
+    the first lines unless given. COBOL sequence numbers in columns 1-6
+    are blanked when blank_sequence is set (the parser only drops
+    numeric ones).
+
+    Returns:
+        (code, language); language is None if not COBOL or JCL
+    """
+    lines = iter(lines)
+    head = list(islice(lines, DETECT_LINES))
+    language = language or detect_code_type("\n".join(head))
+
+    if language is None:
+        # Markers past the first lines: detect on the whole member
+        code = "\n".join(chain(head, lines))
+        language = detect_code_type(code)
+        if language == "cobol" and blank_sequence:
+            code = "\n".join(map(_blank_sequence_numbers, code.split("\n")))
+    elif language == "cobol" and blank_sequence:
+        code = "\n".join(map(_blank_sequence_numbers, chain(head, lines)))
+    else:
+        code = "\n".join(chain(head, lines))
+
+    return code, language
+
+
+def member_text(buffer, codepage: str = "auto", lrecl: int = 80, recfm: Optional[str] = None,
+                language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Decodes a raw member into parser input (see source_text); line N
+    of the result is record N. COBOL sequence numbers are blanked for
+    record formats, not for TEXT.
+
+    Returns:
+        dict: {"code", "language" (None if not COBOL or JCL),
+        "codepage", "recfm", "lines"}
+    """
+    view = memoryview(buffer).cast("B")
+    if codepage == "auto":
+        codepage, sniffed = sniff(view[:SNIFF_BYTES])
+        recfm = recfm or sniffed
+    recfm = (recfm or "FB").upper()
+
+    try:
+        codecs.lookup(codepage)
+    except LookupError:
+        raise ValueError(f"Unknown codepage: {codepage}")
+
+    code, language = source_text(
+        iter_lines(view, codepage, lrecl, recfm), language, blank_sequence=recfm != "TEXT"
+    )
+
+    return {
+        "code": code,
+        "language": language,
+        "codepage": codepage,
+        "recfm": recfm,
+        "lines": code.count("\n") + 1 if code else 0,
+    }
+
+
+def read_member(path: str, **options) -> Dict[str, Any]:
+    """
+    member_text() of a member file, read through mmap.
+    """
+    with open(path, "rb") as handle:
+        if not os.fstat(handle.fileno()).st_size:
+            return member_text(b"", **options)
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return member_text(mapped, **options)
+
+
+# ==========================================================
+# RECORD FORMATS
+# ==========================================================
+
+def _records(chunks, codepage, lrecl, recfm):
+    if recfm == "TEXT":
+        return _text_lines(chunks, codepage)
+    if recfm == "FB":
+        return _fixed_records(chunks, codepage, lrecl)
+    raise ValueError(f"Unsupported record format: {recfm}")
+
+
+def _lines(records, recfm, strip_sequence):
+    if recfm == "TEXT":
+        return records
+    if not strip_sequence:
+        return (line.rstrip() for line in records)
+    return (
+        (line[:SEQUENCE_START] + line[SEQUENCE_END:]).rstrip()
+        if len(line) > SEQUENCE_START else line.rstrip()
+        for line in records
+    )
+
+
+def _fixed_records(chunks, codepage, lrecl):
+    # Every chunk but the last holds whole records
+    if lrecl <= 0:
+        raise ValueError("lrecl must be positive")
+
+    for chunk in chunks:
+        text = codecs.decode(chunk, codepage)
+        if len(text) != len(chunk):
+            raise ValueError(f"RECFM=FB needs a single-byte codepage, not {codepage}")
+        text = text.translate(_CONTROLS)
+        for i in range(0, len(text), lrecl):
+            yield text[i:i + lrecl]
+
+
+def _variable_records(view, codepage):
+    # Each record starts with a 4-byte RDW: big-endian length (RDW
+    # included), then two zero bytes
+    position = 0
+    while position + 4 <= len(view):
+        length = int.from_bytes(view[position:position + 2], "big")
+        if length < 4 or position + length > len(view):
+            raise ValueError(f"Bad record descriptor word at byte {position}")
+        record = view[position + 4:position + length]
+        yield codecs.decode(record, codepage).translate(_CONTROLS)
+        position += length
+
+    if position != len(view):
+        raise ValueError(f"{len(view) - position} bytes after the last RECFM=VB record")
+
+
+def _text_lines(chunks, codepage):
+    decoder = codecs.getincrementaldecoder(codepage)(errors="replace")
+    partial = ""
+
+    for chunk in chunks:
+        text = partial + decoder.decode(chunk)
+        *lines, partial = text.split("\n")
+        yield from [line.rstrip() for line in lines]
+
+    partial += decoder.decode(b"", final=True)
+    if partial.rstrip():
+        yield partial.rstrip()
+
+
+def _blank_sequence_numbers(line: str) -> str:
+    if line[:6].strip():
+        return ("      " + line[6:]).rstrip()
+    return line
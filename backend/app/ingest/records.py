@@ -0,0 +1,441 @@
+"""
+Bulk decoding of fixed-length record files against a compiled record
+layout (see parsers/regex_parser/record_layout.py), so production data
+can be inspected with the program that reads it.
+
+Two engines:
+
+  struct  the default, stdlib only: one struct.Struct slices every
+          field of a record and iter_unpack walks the file; values are
+          exact (Decimal for scaled fields)
+  numpy   opt-in, needs NumPy: the file is viewed as a
+          (records x record length) byte matrix and packed / zoned /
+          binary columns are decoded with array arithmetic; numeric
+          columns come back as float64 arrays (NaN for invalid data),
+          exact up to 15 digits
+
+Text columns are decoded in one call per column on either engine.
+"""
+import codecs
+import math
+import mmap
+import os
+import struct
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from backend.app.ingest import codepages  # noqa: F401 - registers cp1047
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on environment
+    numpy = None
+
+EBCDIC_CODEPAGES = {"cp037", "cp273", "cp285", "cp297", "cp500", "cp875", "cp1047", "cp1140"}
+
+# Single-byte codepages: a column decodes as one string, sliced per record
+_SINGLE_BYTE = EBCDIC_CODEPAGES | {"ascii", "iso8859-1", "cp1252", "cp437", "cp850"}
+
+# Zoned decimal digits are F0-F9 in EBCDIC and 30-39 in ASCII; the
+# tables map them to ASCII digits and anything else to "x", so int()
+# rejects fields holding spaces or letters
+_EBCDIC_DIGITS = bytes(b - 0xC0 if 0xF0 <= b <= 0xF9 else 0x78 for b in range(256))
+_ASCII_DIGITS = bytes(b if 0x30 <= b <= 0x39 else 0x78 for b in range(256))
+
+# Zones allowed on an overpunched sign digit -> negative?
+_EBCDIC_SIGN_ZONES = {0xC0: False, 0xF0: False, 0xD0: True}
+_ASCII_SIGN_ZONES = {0x30: False, 0x70: True}
+
+# Numeric columns longer than this do not fit an int64 and are decoded
+# by the struct engine's converters instead
+_MAX_VECTOR_DIGITS = 18
+
+
+def flatten(record: Dict[str, Any], include_redefines: bool = False) -> List[Dict[str, Any]]:
+    """
+    Elementary fields of a record with absolute offsets, in offset
+    order. OCCURS are expanded into NAME(1), NAME(2), ... (NAME(1,2)
+    when nested); FILLER is skipped, and so are REDEFINES branches
+    unless include_redefines is set.
+    """
+    fields = []
+    for child in record.get("children") or [record]:
+        _flatten(child, 0, (), fields, include_redefines)
+    fields.sort(key=lambda field: field["offset"])
+    return fields
+
+
+def _flatten(item, shift, subscripts, fields, include_redefines):
+    if item.get("redefines") and not include_redefines:
+        return
+
+    occurs = item.get("occurs", 1)
+    for i in range(occurs):
+        index = subscripts + (i + 1,) if occurs > 1 else subscripts
+        base = shift + i * item["size"]
+
+        if item.get("children"):
+            for child in item["children"]:
+                _flatten(child, base, index, fields, include_redefines)
+        elif item["name"] != "FILLER" and item["size"]:
+            name = item["name"]
+            if index:
+                name += "(" + ",".join(map(str, index)) + ")"
+            fields.append({
+                "name": name,
+                "offset": item["offset"] + base,
+                "size": item["size"],
+                "usage": item.get("usage", "DISPLAY"),
+                "category": item.get("category", "alphanumeric"),
+                "digits": item.get("digits", 0),
+                "scale": item.get("scale", 0),
+                "signed": item.get("signed", False),
+                "sign_position": item.get("sign_position"),
+                "sign_separate": item.get("sign_separate", False),
+            })
+
+
+class RecordDecoder:
+    """
+    Decodes buffers of fixed-length records into columns.
+
+    Args:
+        record: a compiled record (an entry of layouts["records"])
+        codepage: Python codec of the data, e.g. cp037 or cp1047 for
+            EBCDIC, latin-1 for ASCII files
+        record_length: bytes per record; defaults to the layout size
+            (pass the FD record length when records of a file differ)
+        include_redefines: also decode REDEFINES branches
+        engine: "struct", "numpy" or "auto" (numpy when installed).
+            numpy is faster on large files but rounds past 15 digits,
+            so exact struct decoding is the default
+    """
+
+    def __init__(
+        self,
+        record: Dict[str, Any],
+        codepage: str = "cp037",
+        record_length: Optional[int] = None,
+        include_redefines: bool = False,
+        engine: str = "struct",
+    ):
+        try:
+            self.codepage = codecs.lookup(codepage).name
+        except LookupError:
+            raise ValueError(f"Unknown codepage: {codepage}")
+
+        if engine == "auto":
+            engine = "numpy" if numpy is not None else "struct"
+        if engine not in ("struct", "numpy"):
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine == "numpy" and numpy is None:
+            raise ValueError("The numpy engine needs NumPy installed")
+        self.engine = engine
+
+        self.fields = flatten(record, include_redefines)
+        self.record_length = record_length or record.get("size", 0)
+        end = max((f["offset"] + f["size"] for f in self.fields), default=0)
+        if not self.record_length or end > self.record_length:
+            raise ValueError(
+                f"Record length {self.record_length} is shorter than the layout ({end} bytes)"
+            )
+
+        self.ebcdic = self.codepage in EBCDIC_CODEPAGES
+        self._converters = [_converter(f, self.codepage, self.ebcdic) for f in self.fields]
+        self._struct = _record_struct(self.fields, self.record_length)
+
+    def decode(self, buffer, start: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Decodes records start .. start + limit of buffer (bytes, mmap or
+        memoryview).
+
+        Returns:
+            dict: {"engine", "record_length", "start", "rows",
+            "total_records", "trailing_bytes", "columns": {name: values},
+            "invalid": {name: count of undecodable values}}
+        """
+        view = memoryview(buffer).cast("B")
+        total = len(view) // self.record_length
+        start = min(max(start, 0), total)
+        stop = total if limit is None else min(total, start + max(limit, 0))
+        chunk = view[start * self.record_length:stop * self.record_length]
+        rows = stop - start
+
+        if self.engine == "numpy" and rows:
+            columns, invalid = self._decode_numpy(chunk, rows)
+        else:
+            columns, invalid = self._decode_struct(chunk, rows)
+
+        return {
+            "engine": self.engine,
+            "record_length": self.record_length,
+            "start": start,
+            "rows": rows,
+            "total_records": total,
+            "trailing_bytes": len(view) % self.record_length,
+            "columns": columns,
+            "invalid": {name: count for name, count in invalid.items() if count},
+        }
+
+    # ---------------- engines ----------------
+
+    def _decode_struct(self, chunk, rows):
+        if not rows:
+            raw_columns = [[] for _ in self.fields]
+        elif self._struct is not None:
+            raw_columns = list(zip(*self._struct.iter_unpack(chunk)))
+        else:
+            # Overlapping fields (REDEFINES included): slice each one
+            length = self.record_length
+            raw_columns = [
+                [bytes(chunk[r + f["offset"]:r + f["offset"] + f["size"]])
+                 for r in range(0, rows * length, length)]
+                for f in self.fields
+            ]
+
+        columns, invalid = {}, {}
+        for field, convert, raw in zip(self.fields, self._converters, raw_columns):
+            columns[field["name"]], invalid[field["name"]] = self._column(field, convert, raw)
+        return columns, invalid
+
+    def _decode_numpy(self, chunk, rows):
+        table = numpy.frombuffer(chunk, dtype=numpy.uint8).reshape(rows, self.record_length)
+
+        columns, invalid = {}, {}
+        for field, convert in zip(self.fields, self._converters):
+            block = table[:, field["offset"]:field["offset"] + field["size"]]
+            vector = _vectorized(field, block, self.ebcdic, self.codepage)
+            if vector is None:
+                data = block.tobytes()
+                size = field["size"]
+                raw = [data[i:i + size] for i in range(0, len(data), size)]
+                vector = self._column(field, convert, raw)
+            columns[field["name"]], invalid[field["name"]] = vector
+        return columns, invalid
+
+    def _column(self, field, convert, raw):
+        """
+        Converts one column of raw field bytes. Returns (values, number
+        of values that could not be decoded, which become None).
+        """
+        if field["category"] in ("alphanumeric", "numeric-edited") and self.codepage in _SINGLE_BYTE:
+            size = field["size"]
+            text = b"".join(raw).decode(self.codepage)
+            return [text[i:i + size].rstrip() for i in range(0, len(text), size)], 0
+
+        values, bad = [], 0
+        for value in raw:
+            try:
+                values.append(convert(value))
+            except (ValueError, KeyError, UnicodeDecodeError):
+                values.append(None)
+                bad += 1
+        return values, bad
+
+
+def decode_file(path: str, record: Dict[str, Any], start: int = 0, limit: Optional[int] = None,
+                **options) -> Dict[str, Any]:
+    """
+    Memory-maps a record file and decodes it with RecordDecoder(record,
+    **options); only the requested records are touched.
+    """
+    decoder = RecordDecoder(record, **options)
+    with open(path, "rb") as handle:
+        if not os.fstat(handle.fileno()).st_size:
+            return decoder.decode(b"", start, limit)
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decoder.decode(mapped, start, limit)
+
+
+# ==========================================================
+# FIELD CONVERTERS (struct engine)
+# ==========================================================
+
+def _record_struct(fields, record_length) -> Optional[struct.Struct]:
+    """
+    One struct for the whole record: a "Ns" per field and "Nx" for the
+    gaps. None when fields overlap, which a struct cannot express.
+    """
+    parts, position = [], 0
+    for field in fields:
+        if field["offset"] < position:
+            return None
+        if field["offset"] > position:
+            parts.append(f"{field['offset'] - position}x")
+        parts.append(f"{field['size']}s")
+        position = field["offset"] + field["size"]
+
+    if record_length > position:
+        parts.append(f"{record_length - position}x")
+    return struct.Struct("=" + "".join(parts))
+
+
+def _converter(field, codepage, ebcdic):
+    """
+    Function decoding one field value from its bytes.
+    """
+    category, usage, size = field["category"], field["usage"], field["size"]
+
+    if category == "float":
+        if ebcdic:
+            return _ibm_float
+        unpack = struct.Struct(">f" if size == 4 else ">d").unpack
+        return lambda raw: unpack(raw)[0]
+
+    if category == "pointer":
+        return lambda raw: int.from_bytes(raw, "big")
+
+    if category == "national":
+        return lambda raw: raw.decode("utf-16-be").rstrip()
+
+    if category != "numeric":
+        return lambda raw: raw.decode(codepage).rstrip()
+
+    if usage in ("BINARY", "COMP-5"):
+        signed = field["signed"]
+        number = lambda raw: int.from_bytes(raw, "big", signed=signed)
+    elif usage == "PACKED":
+        number = _packed
+    else:
+        number = _zoned(field, codepage, ebcdic)
+
+    scale = field["scale"]
+    if scale > 0:
+        return lambda raw: Decimal(number(raw)).scaleb(-scale)
+    if scale < 0:
+        factor = 10 ** -scale
+        return lambda raw: number(raw) * factor
+    return number
+
+
+def _packed(raw: bytes) -> int:
+    # Two digits per byte, the last nibble is the sign: C / F / A / E
+    # positive, D / B negative
+    digits = raw.hex()
+    value = int(digits[:-1] or "0")
+    sign = digits[-1]
+    if sign in "bd":
+        return -value
+    if sign in "acef":
+        return value
+    raise ValueError(f"Bad packed decimal sign nibble: {sign}")
+
+
+def _zoned(field, codepage, ebcdic):
+    digits = _EBCDIC_DIGITS if ebcdic else _ASCII_DIGITS
+    if not field["signed"]:
+        return lambda raw: int(raw.translate(digits))
+
+    leading = field["sign_position"] == "leading"
+
+    if field["sign_separate"]:
+        signs = {"+".encode(codepage)[0]: False, "-".encode(codepage)[0]: True}
+        if leading:
+            return lambda raw: _negate(int(raw[1:].translate(digits)), signs[raw[0]])
+        return lambda raw: _negate(int(raw[:-1].translate(digits)), signs[raw[-1]])
+
+    # The sign is overpunched on the first or last digit: zone D in
+    # EBCDIC ("}", "J" to "R"), 7 in ASCII ("p" to "y")
+    zones = _EBCDIC_SIGN_ZONES if ebcdic else _ASCII_SIGN_ZONES
+
+    def overpunched(raw):
+        sign = raw[0] if leading else raw[-1]
+        if sign & 0x0F > 9 or sign & 0xF0 not in zones:
+            raise ValueError(f"Bad zoned decimal sign byte: {sign:#04x}")
+        digit = bytes((0x30 + (sign & 0x0F),))
+        rest = (raw[1:] if leading else raw[:-1]).translate(digits)
+        return _negate(int(digit + rest if leading else rest + digit), zones[sign & 0xF0])
+
+    return overpunched
+
+
+def _negate(value: int, negative: bool) -> int:
+    return -value if negative else value
+
+
+def _ibm_float(raw: bytes) -> float:
+    """
+    IBM hexadecimal floating point (COMP-1 / COMP-2 on z/OS): sign bit,
+    7-bit excess-64 base-16 exponent, then the fraction.
+    """
+    bits = int.from_bytes(raw, "big")
+    fraction_bits = len(raw) * 8 - 8
+    fraction = bits & ((1 << fraction_bits) - 1)
+    exponent = (bits >> fraction_bits) & 0x7F
+    value = math.ldexp(fraction, 4 * (exponent - 64) - fraction_bits)
+    return -value if bits >> (fraction_bits + 7) else value
+
+
+# ==========================================================
+# VECTORIZED COLUMNS (numpy engine)
+# ==========================================================
+
+def _vectorized(field, block, ebcdic, codepage):
+    """
+    (values, invalid count) for a numeric column decoded with array
+    arithmetic, or None when the column needs the per-value converters.
+    """
+    category, usage = field["category"], field["usage"]
+
+    if category == "float" and not ebcdic:
+        dtype = ">f4" if field["size"] == 4 else ">f8"
+        return block.copy().view(dtype)[:, 0].astype(numpy.float64), 0
+
+    if category != "numeric":
+        return None
+
+    if usage in ("BINARY", "COMP-5"):
+        if field["size"] not in (2, 4, 8):
+            return None
+        kind = "i" if field["signed"] else "u"
+        values = block.copy().view(f">{kind}{field['size']}")[:, 0].astype(numpy.int64)
+        return _scale(values, field["scale"]), 0
+
+    if usage == "PACKED":
+        low = block & 0x0F
+        digits = numpy.empty((block.shape[0], 2 * field["size"] - 1), dtype=numpy.int64)
+        digits[:, 0::2] = block >> 4
+        digits[:, 1::2] = low[:, :-1]
+        sign = low[:, -1]
+        negative = (sign == 0x0B) | (sign == 0x0D)
+        bad = (digits > 9).any(axis=1) | (sign < 0x0A)
+    elif usage == "DISPLAY":
+        digit_zone = 0xF0 if ebcdic else 0x30
+        negative = numpy.zeros(block.shape[0], dtype=bool)
+        bad = numpy.zeros(block.shape[0], dtype=bool)
+        zoned = block
+        if field["signed"]:
+            leading = field["sign_position"] == "leading"
+            sign = block[:, 0] if leading else block[:, -1]
+            if field["sign_separate"]:
+                zoned = block[:, 1:] if leading else block[:, :-1]
+                negative = sign == "-".encode(codepage)[0]
+                bad = ~negative & (sign != "+".encode(codepage)[0])
+            else:
+                zones = _EBCDIC_SIGN_ZONES if ebcdic else _ASCII_SIGN_ZONES
+                negative = (sign & 0xF0) == (0xD0 if ebcdic else 0x70)
+                bad = ~numpy.isin(sign & 0xF0, list(zones))
+                # Only the sign digit carries a sign zone
+                zoned = block.copy()
+                zoned[:, 0 if leading else -1] = digit_zone | (sign & 0x0F)
+        digits = (zoned & 0x0F).astype(numpy.int64)
+        bad |= (digits > 9).any(axis=1) | ((zoned & 0xF0) != digit_zone).any(axis=1)
+    else:
+        return None
+
+    if digits.shape[1] > _MAX_VECTOR_DIGITS:
+        return None
+
+    powers = 10 ** numpy.arange(digits.shape[1] - 1, -1, -1, dtype=numpy.int64)
+    values = (digits @ powers).astype(numpy.float64)
+    values[negative] *= -1
+    values[bad] = numpy.nan
+    return _scale(values, field["scale"], always_float=True), int(bad.sum())
+
+
+def _scale(values, scale, always_float=False):
+    if scale > 0:
+        return values / 10.0 ** scale
+    if scale < 0:
+        return values * 10 ** -scale
+    return values.astype(numpy.float64) if always_float else values
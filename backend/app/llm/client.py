@@ -1,20 +1,319 @@
+import contextvars
+import hashlib
+import math
 import os
-from groq import Groq
+import queue
+import threading
+import time
+import types
+from collections import deque
 from backend.app.config.settings import settings
+from backend.app.core import metrics
+from backend.app.core.deadline import (
+    current_deadline,
+    check_deadline,
+    DeadlineExceeded,
+    RequestCancelled
+)
+from backend.app.db.shared_cache import shared_cache
+from backend.app.llm.usage import current_session
+from backend.app.services.usage_service import record_usage
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+_client = None
+_client_lock = threading.Lock()
 
-if not GROQ_API_KEY:
-    raise RuntimeError("GROQ_API_KEY not found. Check your .env file.")
+TEMPERATURE = 0.2
 
-client = Groq(api_key=GROQ_API_KEY)
+# Recent time-to-first-token samples; their p95 is the hedging delay
+_ttft_samples = deque(maxlen=200)
 
+# Rough size of a token, for streams abandoned before the provider
+# reported usage (it only does on the final chunk)
+CHARS_PER_TOKEN = 4
 
-def call_llm(prompt: str) -> str:
-    response = client.chat.completions.create(
+
+def get_client():
+    """
+    Builds the Groq client on first use, so importing this module needs
+    neither the groq package nor an API key.
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv("GROQ_API_KEY")
+                if not api_key:
+                    raise RuntimeError("GROQ_API_KEY not found. Check your .env file.")
+
+                from groq import Groq
+                _client = Groq(api_key=api_key)
+
+    return _client
+
+
+def call_llm(prompt: str, template: str = "unknown") -> str:
+    """
+    Completes prompt within the current request's deadline (if any).
+
+    The completion is streamed so it can be abandoned between chunks when
+    the request is cancelled or runs out of time; in that case a
+    RequestAborted subclass is raised.
+    """
+    start = time.perf_counter()
+    check_deadline()
+
+    # Identical prompts are answered once across all workers
+    key = _cache_key(prompt)
+    if key:
+        cached = shared_cache.get("llm", key, max_age=settings.LLM_CACHE_TTL_SECONDS)
+        if cached is not None:
+            _record(prompt, template, None, None, start, "cached")
+            return cached.decode("utf-8")
+
+    content = usage = model = None
+    status = "ok"
+
+    try:
+        if settings.LLM_HEDGE:
+            content, usage, model = _hedged_completion(prompt, template)
+        else:
+            content, usage, model = _stream_completion(prompt, _stop_check(None))
+    except (DeadlineExceeded, RequestCancelled) as e:
+        status = "timeout" if isinstance(e, DeadlineExceeded) else "cancelled"
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        _record(prompt, template, usage, model, start, status)
+
+    if key and content:
+        shared_cache.put("llm", key, content.encode("utf-8"))
+    return content
+
+
+def _cache_key(prompt: str):
+    if not shared_cache.enabled or settings.LLM_CACHE_TTL_SECONDS <= 0:
+        return None
+    material = f"{settings.GROQ_MODEL}\0{TEMPERATURE}\0{prompt}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# ---------------- streaming ----------------
+
+def _stream_completion(prompt: str, stop_check, on_first_token=None, received=None):
+    """
+    Returns (content, usage, model). stop_check() runs before every chunk
+    and raises to abandon the stream; received, if given, collects the
+    text streamed so far either way.
+    """
+    started = time.perf_counter()
+    stream = get_client().chat.completions.create(
         model=settings.GROQ_MODEL,
         messages=[
             {"role": "user", "content": prompt}
         ],
-        temperature=0.2 )
-    return response.choices[0].message.content
+        temperature=TEMPERATURE,
+        stream=True,
+        timeout=_timeout()
+    )
+
+    parts = [] if received is None else received
+    usage = model = None
+    try:
+        for chunk in stream:
+            stop_check()
+
+            model = getattr(chunk, "model", None) or model
+            usage = _chunk_usage(chunk) or usage
+
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+
+            if not parts:
+                ttft = time.perf_counter() - started
+                metrics.LLM_TTFT.observe(ttft)
+                _ttft_samples.append(ttft)
+                if on_first_token is not None:
+                    on_first_token()
+            parts.append(delta)
+    finally:
+        # Closing the stream drops the HTTP connection, which is what
+        # tells the provider to stop generating
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    return "".join(parts), usage, model
+
+
+def _chunk_usage(chunk):
+    # Groq reports usage on the last chunk under x_groq; OpenAI-style
+    # servers under usage
+    extra = getattr(chunk, "x_groq", None)
+    return getattr(extra, "usage", None) or getattr(chunk, "usage", None)
+
+
+def _timeout() -> float:
+    """
+    The provider timeout: LLM_TIMEOUT_SECONDS, cut down to whatever is
+    left of the request's deadline.
+    """
+    timeout = settings.LLM_TIMEOUT_SECONDS
+    deadline = current_deadline()
+    if deadline is not None:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        timeout = min(timeout, remaining)
+    return timeout
+
+
+def _stop_check(cancel):
+    """
+    Stops a stream when the request is over, or when this attempt (cancel)
+    lost a hedged race.
+    """
+    def check():
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled("Superseded by a faster attempt")
+        check_deadline()
+    return check
+
+
+# ---------------- hedging ----------------
+
+def _hedge_delay():
+    """
+    p95 (LLM_HEDGE_QUANTILE) of recent time-to-first-token, or None until
+    enough samples have been seen.
+    """
+    samples = sorted(_ttft_samples)
+    if len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+        return None
+    return samples[int(settings.LLM_HEDGE_QUANTILE * (len(samples) - 1))]
+
+
+def _hedged_completion(prompt: str, template: str = "unknown"):
+    """
+    Starts one completion; if its first token has not arrived by the p95
+    time-to-first-token, starts a second. The first to start streaming
+    wins and the other is cancelled. A failure only surfaces once no
+    attempt is left running.
+
+    The caller records the winner's usage; each loser records its own,
+    with status "hedged", since the provider bills it all the same.
+    """
+    delay = _hedge_delay()
+    if delay is None:
+        return _stream_completion(prompt, _stop_check(None))
+
+    events = queue.Queue()
+    attempts = []   # cancel events, in launch order
+    live = set()
+    winner = None
+
+    def launch():
+        cancel = threading.Event()
+        attempts.append(cancel)
+        live.add(cancel)
+
+        def run():
+            started = time.perf_counter()
+            received = []
+            result = None
+            try:
+                result = _stream_completion(
+                    prompt,
+                    _stop_check(cancel),
+                    on_first_token=lambda: events.put(("first", cancel, None)),
+                    received=received
+                )
+                events.put(("done", cancel, result))
+            except BaseException as e:
+                events.put(("failed", cancel, e))
+
+            # Lost the race; without the final chunk its tokens are estimated
+            if cancel.is_set():
+                content, usage, model = result or ("".join(received), None, None)
+                _record(prompt, template, usage or _estimated_usage(prompt, content),
+                        model, started, "hedged")
+
+        # Copy the context so the attempt sees the request's deadline
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(run,), daemon=True).start()
+
+    def cancel_others(keep):
+        for attempt in attempts:
+            if attempt is not keep:
+                attempt.set()
+                live.discard(attempt)
+
+    launch()
+    while True:
+        hedging = len(attempts) == 1 and winner is None
+        try:
+            kind, attempt, payload = events.get(timeout=delay if hedging else None)
+        except queue.Empty:
+            metrics.LLM_HEDGES.inc(outcome="sent")
+            launch()
+            continue
+
+        if attempt not in live:
+            continue  # a cancelled loser winding down
+
+        if kind == "first":
+            if winner is None:
+                winner = attempt
+                cancel_others(winner)
+                if len(attempts) > 1:
+                    won = "hedge_won" if winner is attempts[1] else "primary_won"
+                    metrics.LLM_HEDGES.inc(outcome=won)
+            continue
+
+        if kind == "done":
+            cancel_others(attempt)
+            return payload
+
+        live.discard(attempt)
+        if attempt is winner or not live:
+            raise payload
+
+
+def _estimated_usage(prompt: str, content: str):
+    prompt_tokens = math.ceil(len(prompt) / CHARS_PER_TOKEN)
+    completion_tokens = math.ceil(len(content) / CHARS_PER_TOKEN)
+    return types.SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens
+    )
+
+
+def _record(prompt, template, usage, model, start, status):
+    elapsed = time.perf_counter() - start
+    latency_ms = elapsed * 1000
+
+    # Hedge losers are billed but are not part of the call's latency
+    if status != "hedged":
+        metrics.STAGE_SECONDS.observe(elapsed, stage="llm_cached" if status == "cached" else "llm")
+    if status == "error":
+        metrics.STAGE_ERRORS.inc(stage="llm")
+
+    try:
+        record_usage(
+            session_id=current_session(),
+            template=template,
+            model=model or settings.GROQ_MODEL,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            total_tokens=getattr(usage, "total_tokens", 0) or 0,
+            latency_ms=round(latency_ms, 2),
+            prompt_chars=len(prompt),
+            status=status
+        )
+    except Exception:
+        # Accounting must never break the LLM call itself
+        pass
@@ -1,4 +1,9 @@
+from backend.app.config.settings import settings
+from backend.app.core.deadline import RequestAborted
+from backend.app.core.ir_schema.scopes import focus_ir
+from backend.app.core.metrics import EXPLANATIONS
 from backend.app.llm.client import call_llm
+from backend.app.llm.template_explainer import explain_from_template
 from typing import Optional
 
 
@@ -33,6 +38,20 @@ def explain(ir: dict, language: str = "cobol") -> str:
             "This explainer supports ONLY COBOL and JCL."
         )
     
+    # -------------------------------------------------
+    # ⚡ TEMPLATE FAST PATH (SIMPLE PROGRAMS, NO LLM)
+    # -------------------------------------------------
+    mode = settings.TEMPLATE_EXPLAIN_MODE
+    if mode != "off":
+        explanation = explain_from_template(
+            ir, language, settings.TEMPLATE_MAX_COMPLEXITY, force=mode == "only"
+        )
+        if explanation is not None:
+            EXPLANATIONS.inc(language=language, source="template")
+            return explanation
+
+    EXPLANATIONS.inc(language=language, source="llm")
+
     # -------------------------------------------------
     # 🧾 JCL EXPLANATION (NO EXAMPLES – STRUCTURAL ONLY)
     # -------------------------------------------------
@@ -74,8 +93,10 @@ Provide a clear, professional explanation of this JCL job structure.
 """
     
     try:
-        result = call_llm(prompt).strip()
+        result = call_llm(prompt, template="_explain_jcl").strip()
         return result
+    except RequestAborted:
+        raise
     except Exception as e:
         return f"ERROR: Failed to generate JCL explanation: {str(e)}"
 
@@ -178,16 +199,45 @@ OUTPUT REQUIREMENTS:
 """
     
     try:
-        result = call_llm(prompt).strip()
+        result = call_llm(prompt, template="_explain_cobol").strip()
         return result
+    except RequestAborted:
+        raise
     except Exception as e:
         return f"ERROR: Failed to generate COBOL explanation: {str(e)}"
     
 
-def explain_with_query(ir: dict, user_query: str, language: str = "cobol") -> str:
+def explain_with_query(
+    ir: dict,
+    user_query: str,
+    language: str = "cobol",
+    history: Optional[dict] = None
+) -> str:
+    """
+    Answers a follow-up question about the IR.
+
+    Args:
+        ir (dict): Intermediate representation of the analyzed program
+        user_query (str): The user's question
+        language (str): "cobol" or "jcl"
+        history (dict, optional): Bounded conversation context with
+            "summary" (str) and "recent" ([(role, message), ...])
+
+    Returns:
+        str: IR-grounded answer
+    """
     if not user_query or not user_query.strip():
         return explain(ir, language)
 
+    conversation = _format_history(history)
+
+    # Questions about particular paragraphs or lines only need that part
+    # of the program; otherwise send the flat IR without the scope tree.
+    # Record layouts are for decoding data, not for the prompt.
+    focused = focus_ir(ir, user_query)
+    omitted = ("layouts",) if focused is not None else ("layouts", "scopes")
+    ir = {key: value for key, value in (focused or ir).items() if key not in omitted}
+
     prompt = f"""
 You are a senior IBM Mainframe engineer.
 
@@ -197,7 +247,8 @@ STRICT RULES:
 - Do NOT assume runtime execution.
 - Do NOT invent logic.
 - If the requested information is not present, say so clearly.
-
+- Use the conversation so far only to resolve what the question refers to.
+{conversation}
 USER QUESTION:
 {user_query}
 
@@ -208,6 +259,63 @@ Provide a precise, IR-grounded explanation.
 """
 
     try:
-        return call_llm(prompt).strip()
+        return call_llm(prompt, template="explain_with_query").strip()
+    except RequestAborted:
+        raise
     except Exception as e:
         return f"ERROR: {str(e)}"
+
+
+def summarize_conversation(summary: str, turns: list) -> str:
+    """
+    Folds older chat turns into the rolling conversation summary.
+
+    Args:
+        summary (str): Existing summary (may be empty)
+        turns (list): [(role, message), ...] to fold in, oldest first
+
+    Returns:
+        str: Updated summary
+
+    Raises:
+        Exception: Propagates LLM failures so callers can fall back
+    """
+    transcript = "\n".join(f"{role.upper()}: {message}" for role, message in turns)
+
+    prompt = f"""
+You maintain a running summary of a conversation about a legacy COBOL/JCL program.
+
+RULES:
+- Merge the new messages into the existing summary.
+- Keep program names, paragraphs, files and variables that were discussed.
+- Keep conclusions already given to the user; drop pleasantries.
+- Write at most 8 short sentences of plain text.
+
+EXISTING SUMMARY:
+{summary or "(none)"}
+
+NEW MESSAGES:
+{transcript}
+
+Return ONLY the updated summary.
+"""
+
+    return call_llm(prompt, template="summarize_conversation").strip()
+
+
+def _format_history(history: Optional[dict]) -> str:
+    if not history:
+        return ""
+
+    sections = ""
+
+    if history.get("summary"):
+        sections += f"\nCONVERSATION SUMMARY (EARLIER TURNS):\n{history['summary']}\n"
+
+    if history.get("recent"):
+        lines = "\n".join(
+            f"{role.upper()}: {message}" for role, message in history["recent"]
+        )
+        sections += f"\nRECENT CONVERSATION:\n{lines}\n"
+
+    return sections
@@ -0,0 +1,92 @@
+"""
+Local text similarity for short questions: TF-IDF weighted character
+n-grams compared by cosine similarity. No model, no external service;
+indexing a few hundred questions takes a few milliseconds.
+
+Character n-grams (taken inside words, so "the file" and "thefile"
+differ) tolerate inflection and typos: "opened" and "opens" share
+"ope", "pen", "open".
+"""
+import math
+import re
+from collections import Counter
+
+NGRAM_SIZES = (3, 4)
+
+_WORD = re.compile(r"[a-z0-9\-]+")
+
+
+def ngrams(text: str) -> Counter:
+    """
+    Counts of the character n-grams of each word, padded with spaces so
+    word starts and ends are n-grams of their own.
+    """
+    grams = Counter()
+    for word in _WORD.findall(text.lower()):
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            grams.update(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1)))
+    return grams
+
+
+class SimilarityIndex:
+    """
+    TF-IDF vectors over a fixed set of texts. IDF is computed from the
+    indexed texts themselves, so n-grams every question shares ("what",
+    "does") weigh little and distinctive ones dominate.
+    """
+
+    def __init__(self, texts):
+        counts = [ngrams(text) for text in texts]
+
+        document_frequency = Counter()
+        for grams in counts:
+            document_frequency.update(grams.keys())
+
+        total = len(counts)
+        self._idf = {
+            gram: math.log((1 + total) / (1 + df)) + 1
+            for gram, df in document_frequency.items()
+        }
+        # N-grams no indexed text has get the largest weight
+        self._unseen_idf = math.log(1 + total) + 1
+        self._vectors = [self._weigh(grams) for grams in counts]
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def scores(self, text: str) -> list:
+        """
+        Cosine similarity of text to every indexed text, in index order.
+        """
+        query = self._weigh(ngrams(text))
+        return [_dot(query, vector) for vector in self._vectors]
+
+    def best(self, text: str):
+        """
+        Returns (index, score) of the most similar indexed text, or
+        (None, 0.0) for an empty index.
+        """
+        scores = self.scores(text)
+        if not scores:
+            return None, 0.0
+        index = max(range(len(scores)), key=scores.__getitem__)
+        return index, scores[index]
+
+    def _weigh(self, grams: Counter) -> dict:
+        # Sublinear term frequency, then L2 normalization so the dot
+        # product is the cosine
+        vector = {
+            gram: (1 + math.log(count)) * self._idf.get(gram, self._unseen_idf)
+            for gram, count in grams.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm:
+            return {}
+        return {gram: weight / norm for gram, weight in vector.items()}
+
+
+def _dot(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(gram, 0.0) for gram, weight in a.items())
@@ -0,0 +1,344 @@
+"""
+Deterministic explanations built straight from the IR, for programs
+simple enough that an LLM adds nothing but latency and cost: JCL jobs
+(job, steps, DD dispositions, well-known utilities) and short COBOL
+programs without branching.
+"""
+import re
+from typing import Optional
+
+# Well-known IBM (and common vendor) utilities
+UTILITIES = {
+    "IEFBR14": "does nothing itself; the step exists so the system processes its DD statements (allocating, cataloging or deleting datasets)",
+    "IEBGENER": "copies the sequential dataset on SYSUT1 to SYSUT2",
+    "ICEGENER": "copies the sequential dataset on SYSUT1 to SYSUT2 (DFSORT's faster IEBGENER)",
+    "IEBCOPY": "copies, merges or compresses partitioned dataset (PDS) members",
+    "IEBUPDTE": "creates or updates library members from control statements",
+    "IEBCOMPR": "compares two datasets",
+    "IEHLIST": "lists catalog and VTOC information",
+    "IEHPROGM": "scratches, renames and catalogs datasets",
+    "SORT": "sorts or merges SORTIN into SORTOUT using the control statements in SYSIN",
+    "DFSORT": "sorts or merges SORTIN into SORTOUT using the control statements in SYSIN",
+    "ICEMAN": "sorts or merges SORTIN into SORTOUT using the control statements in SYSIN",
+    "SYNCSORT": "sorts or merges SORTIN into SORTOUT using the control statements in SYSIN",
+    "IDCAMS": "runs Access Method Services commands from SYSIN (VSAM and catalog management: DEFINE, DELETE, REPRO, PRINT, ...)",
+    "IKJEFT01": "runs TSO commands in batch from SYSTSIN (commonly a DB2 program via DSN RUN)",
+    "IKJEFT1B": "runs TSO commands in batch from SYSTSIN (commonly a DB2 program via DSN RUN)",
+    "ADRDSSU": "runs DFSMSdss dump, restore or copy commands from SYSIN",
+    "DSNUTILB": "runs DB2 utilities (LOAD, UNLOAD, REORG, ...) from SYSIN",
+    "IEBEDIT": "selects jobs or steps from a JCL dataset",
+}
+
+# DD names whose role is fixed by convention
+DD_ROLES = {
+    "STEPLIB": "load library searched for the program",
+    "JOBLIB": "load library searched for the job's programs",
+    "SYSIN": "control statements / input",
+    "SYSPRINT": "messages and printed output",
+    "SYSOUT": "messages and printed output",
+    "SYSTSIN": "TSO commands",
+    "SYSTSPRT": "TSO output",
+    "SYSUT1": "input",
+    "SYSUT2": "output",
+    "SORTIN": "sort input",
+    "SORTOUT": "sort output",
+    "SYSUDUMP": "dump on abnormal end",
+    "SYSABEND": "dump on abnormal end",
+    "CEEDUMP": "Language Environment dump",
+}
+
+DISP_STATUS = {
+    "NEW": "creates",
+    "OLD": "uses with exclusive access",
+    "SHR": "reads (shared)",
+    "MOD": "appends to (creating if missing)",
+}
+
+DISP_ACTION = {
+    "CATLG": "catalogs it",
+    "KEEP": "keeps it",
+    "DELETE": "deletes it",
+    "PASS": "passes it to later steps",
+    "UNCATLG": "uncatalogs it",
+}
+
+COND_OPERATORS = {
+    "GT": "greater than",
+    "GE": "greater than or equal to",
+    "EQ": "equal to",
+    "NE": "not equal to",
+    "LT": "less than",
+    "LE": "less than or equal to",
+}
+
+# COBOL statements with a fixed, one-line meaning
+SIMPLE_STATEMENTS = {"DISPLAY", "ACCEPT", "MOVE", "COMPUTE", "ADD", "MULTIPLY", "STOP"}
+
+# Control flow a template cannot describe faithfully: a flat list of
+# steps would present the alternative branches as running one after
+# the other
+BRANCHING = {"IF", "EVALUATE", "GO_TO"}
+
+
+def complexity(ir: dict, language: str) -> Optional[int]:
+    """
+    A rough size score for the IR, or None when a template cannot
+    describe the program at all.
+    """
+    if language == "jcl":
+        steps = ir.get("steps", [])
+        if not steps:
+            return None
+        return len(steps) + sum(len(step.get("dds", [])) for step in steps) // 2
+
+    statements = ir.get("statements", [])
+    control_flow = ir.get("control_flow", [])
+
+    # Verbs in the source the parser could not turn into IR entries; a
+    # template would silently leave them out. IRs predating the field
+    # cannot vouch for their completeness either.
+    if ir.get("unrecognized", True):
+        return None
+    if any(s.get("type") not in SIMPLE_STATEMENTS for s in statements):
+        return None
+    if any(c.get("type") in BRANCHING for c in control_flow):
+        return None
+
+    return (
+        len(statements)
+        + len(control_flow)
+        + len(ir.get("file_operations", []))
+    )
+
+
+def explain_from_template(ir: dict, language: str, max_complexity: int, force: bool = False) -> Optional[str]:
+    """
+    Explains the IR without an LLM call.
+
+    Args:
+        max_complexity: programs scoring above this are left to the LLM
+        force: explain anything a template can describe, ignoring the limit
+
+    Returns:
+        str, or None when the program should go to the LLM instead
+    """
+    score = complexity(ir, language)
+    if score is None or (score > max_complexity and not force):
+        return None
+
+    if language == "jcl":
+        return _explain_jcl(ir)
+    return _explain_cobol(ir)
+
+
+# ==========================================================
+# JCL
+# ==========================================================
+
+def _explain_jcl(ir: dict) -> str:
+    job = ir.get("job", {})
+    steps = ir.get("steps", [])
+
+    name = job.get("name") or "(unnamed)"
+    header = f"Job {name} runs {len(steps)} step{'s' if len(steps) != 1 else ''}"
+    details = [
+        f"class {job['class']}" if job.get("class") else "",
+        f"output class {job['msgclass']}" if job.get("msgclass") else "",
+        f"notifies {job['notify']} on completion" if job.get("notify") else "",
+    ]
+    details = [d for d in details if d]
+    lines = [header + (f" ({', '.join(details)})." if details else ".")]
+
+    for number, step in enumerate(steps, start=1):
+        lines.append("")
+        lines.append(_describe_step(number, step))
+        for dd in step.get("dds", []):
+            lines.append(f"  - {_describe_dd(dd)}")
+
+    warnings = ir.get("warnings", [])
+    if warnings:
+        lines.append("")
+        lines.append("Notes: " + "; ".join(warnings) + ".")
+
+    return "\n".join(lines)
+
+
+def _describe_step(number: int, step: dict) -> str:
+    name = step.get("name", "?")
+    program = step.get("program")
+
+    if program:
+        what = f"runs program {program}"
+        purpose = UTILITIES.get(program.upper())
+        if purpose:
+            what += f", which {purpose}"
+    elif step.get("procedure"):
+        what = f"invokes cataloged procedure {step['procedure']}"
+    else:
+        what = "invokes a procedure"
+
+    text = f"Step {number}, {name}: {what}."
+
+    cond = step.get("cond")
+    if cond:
+        text += f" {_describe_cond(cond)}"
+
+    return text
+
+
+def _describe_cond(cond: str) -> str:
+    """
+    COND=(code,op[,step]) bypasses the step when the test is true for a
+    previous return code; several tests are ORed.
+    """
+    if cond.upper() in ("EVEN", "ONLY"):
+        return {
+            "EVEN": "It runs even if an earlier step abended.",
+            "ONLY": "It runs only if an earlier step abended.",
+        }[cond.upper()]
+
+    tests = re.findall(r"(\d+)\s*,\s*(GT|GE|EQ|NE|LT|LE)(?:\s*,\s*([A-Z0-9$#@.]+))?", cond.upper())
+    if not tests:
+        return f"It is conditional on COND={cond}."
+
+    described = []
+    for code, op, step in tests:
+        subject = f"the return code of {step}" if step else "any earlier return code"
+        described.append(f"{code} is {COND_OPERATORS[op]} {subject}")
+
+    return "It is bypassed if " + " or ".join(described) + "."
+
+
+def _describe_dd(dd: dict) -> str:
+    name = dd.get("name", "?")
+    role = DD_ROLES.get(name.upper())
+    label = f"{name} ({role})" if role else name
+
+    kind = dd.get("type")
+    if kind == "SYSOUT":
+        return f"{label}: written to the job's output (SYSOUT)."
+    if kind == "DUMMY":
+        return f"{label}: dummy, no data is read or written."
+    if kind == "INLINE":
+        return f"{label}: inline data in the job stream."
+
+    dsn = dd.get("dsn")
+    if not dsn:
+        return f"{label}."
+
+    if dsn.startswith("&&"):
+        target = f"temporary dataset {dsn[2:]}"
+    elif dsn.startswith("*."):
+        target = f"the dataset referred back to by {dsn[2:]}"
+    else:
+        target = f"dataset {dsn}"
+
+    return f"{label}: {_describe_disp(dd.get('disp'), target)}"
+
+
+def _describe_disp(disp: Optional[str], target: str) -> str:
+    """
+    DISP=(status,normal,abnormal) with JCL's defaults: status NEW; normal
+    DELETE for new datasets, KEEP otherwise; abnormal same as normal.
+    """
+    parts = [p.strip().upper() for p in (disp or "").strip("()").split(",")]
+    parts += [""] * (3 - len(parts))
+    status, normal, abnormal = parts[:3]
+
+    status = status or "NEW"
+    normal = normal or ("DELETE" if status == "NEW" else "KEEP")
+
+    verb = DISP_STATUS.get(status, f"uses ({status})")
+    text = f"{verb} {target}"
+
+    if normal != "PASS" and normal in DISP_ACTION and (disp or status == "NEW"):
+        text += f" and, when the step ends normally, {DISP_ACTION[normal]}"
+    elif normal == "PASS":
+        text += f" and {DISP_ACTION['PASS']}"
+
+    if abnormal and abnormal != normal and abnormal in DISP_ACTION:
+        text += f"; if the step abends it {DISP_ACTION[abnormal]}"
+
+    return text + "."
+
+
+# ==========================================================
+# COBOL
+# ==========================================================
+
+def _explain_cobol(ir: dict) -> str:
+    program_id = ir.get("program_info", {}).get("program_id", "UNKNOWN")
+    paragraphs = [p["name"] for p in ir.get("paragraphs", [])]
+    variables = ir.get("variables", [])
+
+    lines = [f"Program {program_id} is a short COBOL program."]
+
+    if paragraphs:
+        lines.append(
+            f"Its procedure division has {len(paragraphs)} paragraph"
+            f"{'s' if len(paragraphs) != 1 else ''}: {', '.join(paragraphs)}."
+        )
+
+    if variables:
+        shown = ", ".join(f"{v['name']} (PIC {v['picture']})" for v in variables[:8])
+        more = f" and {len(variables) - 8} more" if len(variables) > 8 else ""
+        lines.append(f"It declares {len(variables)} data item{'s' if len(variables) != 1 else ''}: {shown}{more}.")
+
+    steps = sorted(
+        [(s.get("line", 0), _describe_statement(s)) for s in ir.get("statements", [])]
+        + [(c.get("line", 0), _describe_control(c)) for c in ir.get("control_flow", [])]
+        + [(f.get("line", 0), _describe_file_op(f)) for f in ir.get("file_operations", [])],
+        key=lambda step: step[0]
+    )
+
+    if steps:
+        lines.append("")
+        lines.append("In source order, it:")
+        lines.extend(f"{number}. {text}" for number, (_, text) in enumerate(steps, start=1))
+    else:
+        lines.append("It has no executable statements; it only declares data.")
+
+    return "\n".join(lines)
+
+
+def _describe_statement(statement: dict) -> str:
+    kind = statement.get("type")
+
+    if kind == "DISPLAY":
+        return f"Displays {statement.get('value', '').strip()}."
+    if kind == "ACCEPT":
+        return f"Accepts input into {statement.get('target')}."
+    if kind == "MOVE":
+        return f"Moves {statement.get('from')} to {statement.get('to')}."
+    if kind == "COMPUTE":
+        return f"Computes {statement.get('target')} = {statement.get('expression')}."
+    if kind == "ADD":
+        return f"Adds {statement.get('operands')}, storing the sum in {statement.get('result')}."
+    if kind == "MULTIPLY":
+        return (
+            f"Multiplies {statement.get('left')} by {statement.get('right')}, "
+            f"storing the product in {statement.get('result')}."
+        )
+    if kind == "STOP":
+        return "Ends the run (STOP RUN)."
+    return f"Executes a {kind} statement."
+
+
+def _describe_control(entry: dict) -> str:
+    kind = entry.get("type")
+
+    if kind == "PERFORM":
+        return f"Performs {entry.get('target')}."
+    return f"Transfers control ({kind})."
+
+
+def _describe_file_op(entry: dict) -> str:
+    verbs = {
+        "OPEN": "Opens a file",
+        "READ": "Reads a record",
+        "WRITE": "Writes a record",
+        "REWRITE": "Rewrites a record",
+        "DELETE": "Deletes a record",
+        "CLOSE": "Closes a file",
+    }
+    return verbs.get(entry.get("operation"), "Performs file I/O") + "."
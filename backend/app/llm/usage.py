@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Session the current LLM calls are billed to (set per request)
+_current_session: ContextVar[Optional[str]] = ContextVar(
+    "llm_usage_session", default=None
+)
+
+
+@contextmanager
+def usage_context(session_id: Optional[str]):
+    """
+    Attributes every LLM call made inside the block to session_id.
+    """
+    token = _current_session.set(session_id)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+def current_session() -> Optional[str]:
+    return _current_session.get()
@@ -1,32 +1,112 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+import hmac
+import json
+import logging
+import os
+import tempfile
 import uuid
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from backend.app.core.engine import run_pipeline
+from backend.app.core.engine import run_cached_pipeline, run_profiled_pipeline
+from backend.app.config.settings import settings
 from backend.app.core.code_detector import detect_code_type
-from backend.app.db.database import init_db
+from backend.app.core.deadline import deadline_context, DeadlineExceeded
+from backend.app.core.executor import shutdown_process_pool
+from backend.app.core.metrics import (
+    registry,
+    REQUESTS_ABORTED,
+    PRECOMPUTED_ANSWERS,
+    SIMILAR_ANSWERS
+)
+from backend.app.core.profiling import (
+    requested_mode,
+    save_profile,
+    list_profiles,
+    load_profile
+)
+from backend.app.core.job_queue import JobQueue
+from backend.app.core.precompute import precomputer
+from backend.app.core.sweeper import SessionSweeper
+from backend.app.core.serialization import dumps, encode_payload, select_fields
+from backend.app.db.database import init_db, close_connections
+from backend.app.db.ir_cache import ir_cache
+from backend.app.db.write_queue import write_queue
 from backend.app.services.chat_service import (
-    save_session,
-    save_ir,
+    save_analyses,
     load_ir,
-    save_message
+    save_message,
+    load_message_page
 )
+from backend.app.services.memory_service import build_chat_context
+from backend.app.services.answer_service import load_precomputed_answer, find_similar_answer
+from backend.app.services.artifact_service import is_cacheable
+from backend.app.services.batch_service import analyze_members
+from backend.app.services.job_service import get_job, DONE, FAILED
+from backend.app.services.usage_service import get_session_usage, get_usage_summary
+from backend.app.services.retention_service import storage_stats
+from backend.app.services.record_service import decode_records
+from backend.app.services.warehouse_service import (
+    file_operations,
+    list_programs,
+    rebuild_warehouse,
+    run_query,
+    variable_references,
+)
+from backend.app.ingest.archive import aiter_archive
+from backend.app.ingest.ebcdic import member_text
 from backend.app.llm.explainer import explain_with_query
+from backend.app.llm.usage import usage_context
 
-# -----------------------------
-# Initialize DB
-# -----------------------------
-init_db()
+logger = logging.getLogger(__name__)
 
 # -----------------------------
 # App Init
 # -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup work lives here, not at import time
+    await asyncio.to_thread(init_db)
+    write_queue.start()
+
+    app.state.job_queue = JobQueue(
+        workers=settings.JOB_WORKERS,
+        stale_after=settings.JOB_STALE_SECONDS,
+        recover_every=settings.JOB_RECOVER_SECONDS,
+        heartbeat_every=settings.JOB_HEARTBEAT_SECONDS
+    )
+    await app.state.job_queue.start()
+
+    app.state.sweeper = SessionSweeper(
+        ttl=settings.SESSION_TTL_SECONDS,
+        interval=settings.SWEEP_INTERVAL_SECONDS,
+        batch_size=settings.SWEEP_BATCH,
+        vacuum_pages=settings.VACUUM_PAGES
+    )
+    app.state.sweeper.start()
+    precomputer.start()
+
+    yield
+
+    await asyncio.to_thread(precomputer.stop)
+    await app.state.sweeper.stop()
+    await app.state.job_queue.stop()
+    shutdown_process_pool()
+
+    # Commit everything still queued before the connections go away
+    await asyncio.to_thread(write_queue.stop)
+    close_connections()
+
+
 app = FastAPI(
     title="Legacy Code Explainer",
-    version="1.1"
+    version="1.1",
+    lifespan=lifespan
 )
 
 # -----------------------------
@@ -37,11 +117,26 @@ class CodeRequest(BaseModel):
     language: str | None = None  # optional (auto-detect)
 
 
+class BatchMember(BaseModel):
+    name: str
+    code: str
+    language: str | None = None  # optional (auto-detect)
+
+
+class BatchRequest(BaseModel):
+    members: list[BatchMember]
+
+
 class ChatRequest(BaseModel):
     session_id: str
     user_message: str
 
 
+class WarehouseQuery(BaseModel):
+    sql: str
+    params: list = []
+
+
 # -----------------------------
 # Health Check
 # -----------------------------
@@ -54,7 +149,18 @@ def health_check():
 # Analyze Endpoint
 # -----------------------------
 @app.post("/analyze")
-def analyze_code(request: CodeRequest):
+async def analyze_code(
+    request: CodeRequest,
+    http_request: Request,
+    fields: str | None = None,
+    include: str | None = None
+):
+    """
+    fields / include: comma-separated response fields, e.g.
+    "explanation,summary". The IR can then be fetched lazily from
+    GET /sessions/{session_id}/ir.
+    """
+    selected = _parse_fields(fields or include)
 
     # 1️⃣ Validate input
     if not request.code or not request.code.strip():
@@ -71,11 +177,36 @@ def analyze_code(request: CodeRequest):
             detail="Please enter valid COBOL or JCL code."
         )
 
-    # 3️⃣ Run pipeline (PARSE + ANALYZE + EXPLAIN)
-    result = run_pipeline(
-        code=request.code,
-        language=detected_language
-    )
+    # 3️⃣ Create session (LLM usage is attributed to it)
+    session_id = str(uuid.uuid4())
+    logger.debug("ANALYZE → session_id: %s", session_id)
+
+    # 4️⃣ Run pipeline (PARSE + ANALYZE + EXPLAIN), reusing identical programs
+    profile_mode = requested_mode(http_request.headers.get("x-profile"), _is_admin(http_request))
+    headers = {}
+
+    with usage_context(session_id):
+        if profile_mode:
+            result, profile = await _run_request(http_request, run_profiled_pipeline(
+                request.code, detected_language, profile_mode
+            ))
+            headers["X-Profile-Id"] = await asyncio.to_thread(
+                save_profile,
+                profile_mode,
+                profile,
+                {
+                    "session_id": session_id,
+                    "language": detected_language,
+                    "input_bytes": len(request.code),
+                    "program_id": result["intermediate_representation"]
+                        .get("program_info", {}).get("program_id")
+                }
+            )
+        else:
+            result = await _run_request(http_request, run_cached_pipeline(
+                code=request.code,
+                language=detected_language
+            ))
 
     # -----------------------------
     # 🔑 SAFE EXTRACTION
@@ -89,35 +220,447 @@ def analyze_code(request: CodeRequest):
     analysis = result.get("analysis", {})
     explanation = result.get("explanation", "")
 
-    # 4️⃣ Create session
-    session_id = str(uuid.uuid4())
-    print("ANALYZE → session_id:", session_id)
+    # 5️⃣ Persist session → shared artifact (for chat)
+    result["session_id"] = session_id
+    await asyncio.to_thread(save_analyses, [result])
 
-    # 5️⃣ Persist session & IR (for chat)
-    save_session(session_id, detected_language)
-    save_ir(session_id, ir)
+    # Answer the usual follow-up questions in the background
+    if is_cacheable(result):
+        precomputer.submit(result["content_hash"], ir, detected_language, session_id)
 
-    # 6️⃣ Return EVERYTHING (UI + Chat both satisfied)
-    return {
+    # 6️⃣ Return requested fields (everything by default)
+    payload = {
         "session_id": session_id,
         "language": detected_language,
         "explanation": explanation,
         "intermediate_representation": ir,
-        "analysis": analysis
+        "analysis": analysis,
+        "cached": result["cached"]
     }
+    return await _json_response(
+        http_request, select_fields(payload, selected), headers, size=len(request.code)
+    )
+
+
+@app.post("/analyze/member")
+async def analyze_member(
+    http_request: Request,
+    codepage: str | None = None,
+    lrecl: int | None = None,
+    recfm: str | None = None,
+    language: str | None = None,
+    fields: str | None = None,
+    include: str | None = None
+):
+    """
+    /analyze for a raw member in the request body, as it comes off the
+    host: EBCDIC RECFM=FB LRECL=80 by default (see MEMBER_CODEPAGE),
+    recfm=VB for records with RDWs, recfm=TEXT for newline-separated
+    files. Sequence columns are stripped before parsing.
+    """
+    body = bytearray()
+    async for chunk in http_request.stream():
+        body += chunk
+        if len(body) > settings.MEMBER_MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Member exceeds {settings.MEMBER_MAX_BYTES} bytes."
+            )
+
+    try:
+        member = await asyncio.to_thread(
+            member_text,
+            body,
+            codepage or settings.MEMBER_CODEPAGE,
+            lrecl or settings.MEMBER_LRECL,
+            recfm,
+            language
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await analyze_code(
+        CodeRequest(code=member["code"], language=member["language"]),
+        http_request,
+        fields,
+        include
+    )
+
+
+@app.get("/sessions/{session_id}/ir")
+async def session_ir(session_id: str, http_request: Request):
+    ir = await asyncio.to_thread(load_ir, session_id)
+    if not ir:
+        raise HTTPException(
+            status_code=404,
+            detail="Invalid or expired session."
+        )
+
+    return await _json_response(http_request, ir)
+
+
+@app.get("/sessions/{session_id}/messages")
+async def session_messages(session_id: str, cursor: int = 0, limit: int = 50):
+    """
+    Chat history, oldest first. Pass next_cursor back as cursor to get
+    the following page; it is null on the last one.
+    """
+    if not 1 <= limit <= settings.CHAT_PAGE_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {settings.CHAT_PAGE_MAX}."
+        )
+
+    messages, next_cursor = await asyncio.to_thread(
+        load_message_page, session_id, cursor, limit
+    )
+    return {
+        "session_id": session_id,
+        "messages": messages,
+        "next_cursor": next_cursor
+    }
+
+
+# -----------------------------
+# Record Layouts
+# -----------------------------
+@app.post("/layouts")
+async def record_layouts(request: CodeRequest):
+    """
+    Field offsets and sizes of a COBOL program's records, without
+    running the analysis or the LLM.
+    """
+    if not request.code or not request.code.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Please enter COBOL code."
+        )
+
+    # Imported here so the app still starts without loading a parser
+    from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
+
+    parser = CobolRegexParser(build_scopes=False, build_layouts=True)
+    ir = await asyncio.to_thread(parser.parse, request.code)
+    return ir["layouts"]
+
+
+@app.post("/sessions/{session_id}/records/{record}/decode")
+async def decode_record_file(
+    session_id: str,
+    record: str,
+    request: Request,
+    codepage: str = "cp037",
+    offset: int = 0,
+    limit: int | None = None
+):
+    """
+    Decodes a fixed-length record file (the raw request body) with a
+    record layout of the session's program. record is an 01-level
+    record name or an FD name; offset / limit count records.
+    """
+    ir = await asyncio.to_thread(load_ir, session_id)
+    if not ir:
+        raise HTTPException(
+            status_code=404,
+            detail="Invalid or expired session."
+        )
+    if not ir.get("layouts"):
+        raise HTTPException(
+            status_code=404,
+            detail="This session has no record layouts; analyze the program again."
+        )
+
+    limit = settings.RECORD_DECODE_MAX_ROWS if limit is None else limit
+    if not 0 <= limit <= settings.RECORD_DECODE_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 0 and {settings.RECORD_DECODE_MAX_ROWS}."
+        )
+
+    # Spool the upload to disk so the decoder can memory-map it
+    handle = tempfile.NamedTemporaryFile(prefix="records-", delete=False)
+    try:
+        with handle:
+            received = 0
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > settings.RECORD_UPLOAD_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Record file exceeds {settings.RECORD_UPLOAD_MAX_BYTES} bytes."
+                    )
+                handle.write(chunk)
+
+        try:
+            result = await asyncio.to_thread(
+                decode_records, handle.name, ir["layouts"], record, codepage, offset, limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.unlink(handle.name)
+
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No record or file named {record} in the program."
+        )
+    return result
+
+
+# -----------------------------
+# IR warehouse
+# -----------------------------
+@app.get("/warehouse/programs")
+async def warehouse_programs(language: str | None = None, limit: int = 100, offset: int = 0):
+    return await asyncio.to_thread(list_programs, language, min(limit, 1000), offset)
+
+
+@app.get("/warehouse/file-operations")
+async def warehouse_file_operations(
+    operation: str,
+    in_loop: bool = False,
+    program: str | None = None,
+    limit: int = 1000
+):
+    """
+    File operations of one kind across all analyzed programs, e.g.
+    ?operation=REWRITE&in_loop=true for every REWRITE inside a PERFORM loop.
+    """
+    return await asyncio.to_thread(
+        file_operations, operation, in_loop, program, min(limit, settings.WAREHOUSE_QUERY_LIMIT)
+    )
+
+
+@app.get("/warehouse/references")
+async def warehouse_references(
+    name: str,
+    kind: str | None = None,
+    role: str | None = None,
+    limit: int = 1000
+):
+    """
+    Statements referencing a data name, e.g. ?name=WS-RATE&kind=COMPUTE.
+    """
+    if role not in (None, "read", "write"):
+        raise HTTPException(status_code=400, detail="role must be read or write.")
+    return await asyncio.to_thread(
+        variable_references, name, kind, role, min(limit, settings.WAREHOUSE_QUERY_LIMIT)
+    )
+
+
+@app.post("/admin/warehouse/query")
+async def warehouse_query(request: WarehouseQuery, http_request: Request):
+    """
+    Ad-hoc read-only SQL over the wh_* tables, limited to
+    WAREHOUSE_QUERY_LIMIT rows and WAREHOUSE_QUERY_TIMEOUT_SECONDS.
+    """
+    _require_admin(http_request)
+    try:
+        return await asyncio.to_thread(run_query, request.sql, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/admin/warehouse/rebuild")
+async def warehouse_rebuild(http_request: Request):
+    """
+    Re-exports every stored artifact into the warehouse.
+    """
+    _require_admin(http_request)
+    return {"programs": await asyncio.to_thread(rebuild_warehouse)}
+
+
+# -----------------------------
+# Response encoding
+# -----------------------------
+RESPONSE_FIELDS = {
+    "session_id",
+    "language",
+    "explanation",
+    "intermediate_representation",
+    "analysis",
+    "cached"
+}
+
+FIELD_ALIASES = {
+    "ir": "intermediate_representation",
+    "summary": "analysis"
+}
+
+
+def _parse_fields(raw: str | None) -> list | None:
+    if not raw:
+        return None
+
+    names = [FIELD_ALIASES.get(name.strip(), name.strip()) for name in raw.split(",")]
+    names = [name for name in names if name]
+
+    unknown = set(names) - RESPONSE_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+
+    return names
+
+
+async def _json_response(http_request: Request, payload, extra_headers=None, size=None) -> Response:
+    """
+    Args:
+        size: size of the program behind the payload, when known. The IRs
+            of large (or unknown) programs run to megabytes, and encoding
+            them on the event loop would stall every other request.
+    """
+    accept_encoding = http_request.headers.get("accept-encoding")
+    if size is not None and size < settings.INLINE_ENCODE_MAX_BYTES:
+        body, headers = encode_payload(payload, accept_encoding)
+    else:
+        body, headers = await asyncio.to_thread(encode_payload, payload, accept_encoding)
+    headers.update(extra_headers or {})
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# -----------------------------
+# Batch Analyze Endpoints (NDJSON stream)
+# -----------------------------
+@app.post("/analyze/batch")
+async def analyze_batch(
+    request: BatchRequest,
+    fields: str | None = None,
+    include: str | None = None
+):
+    selected = _parse_fields(fields or include)
+    _check_batch_size(len(request.members))
+
+    members = [member.model_dump() for member in request.members]
+    return _ndjson_response(analyze_members(members), selected)
+
+
+@app.post("/analyze/batch/archive")
+async def analyze_batch_archive(
+    request: Request,
+    language: str | None = None,
+    fields: str | None = None,
+    include: str | None = None
+):
+    """
+    Analyzes every member of the archive in the request body: zip, tar
+    (optionally gzip / bzip2 / xz compressed) or an IEBUPDTE PDS unload.
+    Members are read out of the body one at a time as analysis slots
+    free up, so memory stays flat whatever the archive size.
+    """
+    selected = _parse_fields(fields or include)
+    members = aiter_archive(request.stream(), language)
+
+    # Reading the first member tells a bad archive from a good one
+    # while a 400 can still be sent
+    try:
+        first = await anext(members, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return _ndjson_response(analyze_members(_prepend(first, members)), selected)
+
+
+async def _prepend(first, members):
+    if first is not None:
+        yield first
+    async for member in members:
+        yield member
+
+
+def _check_batch_size(count: int):
+    if count > settings.BATCH_MAX_MEMBERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.BATCH_MAX_MEMBERS} members."
+        )
+
+
+def _ndjson_response(results, selected=None):
+    async def lines():
+        async for result in results:
+            line = select_fields(result, selected, always=("name", "status", "error", "session_id"))
+            yield dumps(line) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# -----------------------------
+# Background Jobs
+# -----------------------------
+@app.post("/jobs", status_code=202)
+async def submit_job(request: CodeRequest):
+    if not request.code or not request.code.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Please enter COBOL or JCL code."
+        )
+
+    detected_language = request.language or detect_code_type(request.code)
+    if not detected_language:
+        raise HTTPException(
+            status_code=400,
+            detail="Please enter valid COBOL or JCL code."
+        )
+
+    job_id = await app.state.job_queue.submit(request.code, detected_language)
+    return {"job_id": job_id, "status": "queued", "stage": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, include_ir: bool = False):
+    job = await asyncio.to_thread(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+
+    if include_ir and job["status"] == DONE:
+        job["result"]["intermediate_representation"] = await asyncio.to_thread(
+            load_ir, job["session_id"]
+        )
+
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-sent events: one event per stage change until the job ends.
+    """
+    if not await asyncio.to_thread(get_job, job_id):
+        raise HTTPException(status_code=404, detail="Unknown job.")
+
+    async def events():
+        last = None
+        while not await request.is_disconnected():
+            job = await asyncio.to_thread(get_job, job_id)
+            state = (job["status"], job["stage"])
+
+            if state != last:
+                last = state
+                yield f"data: {json.dumps(job)}\n\n"
+
+            if job["status"] in (DONE, FAILED):
+                return
+
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 # -----------------------------
 # Chat Endpoint
 # -----------------------------
 @app.post("/chat")
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
 
-    print("CHAT → received session_id:", request.session_id)
+    logger.debug("CHAT → received session_id: %s", request.session_id)
 
     # 1️⃣ Load IR
-    ir = load_ir(request.session_id)
-    print("CHAT → IR found:", ir is not None)
+    ir = await asyncio.to_thread(load_ir, request.session_id)
+    logger.debug("CHAT → IR found: %s", ir is not None)
 
     if not ir:
         raise HTTPException(
@@ -125,17 +668,184 @@ def chat(request: ChatRequest):
             detail="Invalid or expired session."
         )
 
-    # 2️⃣ Save user message
-    save_message(request.session_id, "user", request.user_message)
+    # 2️⃣ Serve a precomputed answer if the question was anticipated
+    if precomputer.enabled:
+        reply = await asyncio.to_thread(
+            load_precomputed_answer, request.session_id, request.user_message
+        )
+        PRECOMPUTED_ANSWERS.inc(event="served" if reply else "missed")
+        if reply:
+            await _save_turn(request, reply)
+            return {"reply": reply, "source": "precomputed"}
+
+    # ...or reuse the answer to an earlier paraphrase of it
+    if settings.SIMILARITY_THRESHOLD > 0:
+        similar = await asyncio.to_thread(
+            find_similar_answer, request.session_id, request.user_message, ir
+        )
+        SIMILAR_ANSWERS.inc(result="hit" if similar else "miss")
+        if similar:
+            reply, matched, score = similar
+            await _save_turn(request, reply)
+            return {
+                "reply": reply,
+                "source": "similar",
+                "cached": True,
+                "similar_to": matched,
+                "similarity": round(score, 3)
+            }
+
+    async def answer():
+        # Load bounded history (summary + recent turns) before this turn
+        history = await asyncio.to_thread(build_chat_context, request.session_id)
+
+        # 3️⃣ Save user message
+        await asyncio.to_thread(
+            save_message, request.session_id, "user", request.user_message
+        )
+
+        # 4️⃣ Generate IR-grounded reply
+        return await asyncio.to_thread(
+            explain_with_query,
+            ir=ir,
+            user_query=request.user_message,
+            language="cobol",  # can be fetched from DB later
+            history=history
+        )
+
+    with usage_context(request.session_id):
+        reply = await _run_request(http_request, answer())
+
+    # 5️⃣ Save assistant reply
+    await asyncio.to_thread(save_message, request.session_id, "assistant", reply)
+
+    return {"reply": reply, "source": "llm"}
+
+
+async def _save_turn(request: ChatRequest, reply: str):
+    await asyncio.to_thread(save_message, request.session_id, "user", request.user_message)
+    await asyncio.to_thread(save_message, request.session_id, "assistant", reply)
+
+
+# -----------------------------
+# Deadlines & client disconnects
+# -----------------------------
+async def _run_request(http_request: Request, work):
+    """
+    Awaits work within REQUEST_TIMEOUT_SECONDS, and cancels it (including
+    an LLM stream in flight) as soon as the client disconnects.
+    Responds 504 on timeout and 499 when the client has gone.
+    """
+    with deadline_context(settings.REQUEST_TIMEOUT_SECONDS) as deadline:
+        # Created inside the block so the task's context carries the deadline
+        task = asyncio.ensure_future(work)
+
+        while not task.done():
+            await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_SECONDS)
+            if task.done():
+                break
+
+            if deadline.expired():
+                reason = "deadline"
+            elif await http_request.is_disconnected():
+                reason = "disconnect"
+            else:
+                continue
+
+            REQUESTS_ABORTED.inc(reason=reason)
+            deadline.cancel()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise _aborted(reason)
+
+        try:
+            return task.result()
+        except DeadlineExceeded:
+            REQUESTS_ABORTED.inc(reason="deadline")
+            raise _aborted("deadline")
+
 
-    # 3️⃣ Generate IR-grounded reply
-    reply = explain_with_query(
-        ir=ir,
-        user_query=request.user_message,
-        language="cobol"  # can be fetched from DB later
+def _aborted(reason: str) -> HTTPException:
+    if reason == "deadline":
+        return HTTPException(status_code=504, detail="Request timed out.")
+    return HTTPException(status_code=499, detail="Client closed request.")
+
+
+# -----------------------------
+# Metrics (Prometheus)
+# -----------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4"
     )
 
-    # 4️⃣ Save assistant reply
-    save_message(request.session_id, "assistant", reply)
 
-    return {"reply": reply}
+# -----------------------------
+# Admin: request profiles
+# -----------------------------
+def _is_admin(http_request: Request) -> bool:
+    # Fails closed: without ADMIN_TOKEN configured nobody is an admin
+    token = http_request.headers.get("x-admin-token")
+    return bool(settings.ADMIN_TOKEN and token) and hmac.compare_digest(
+        token.encode(), settings.ADMIN_TOKEN.encode()
+    )
+
+
+def _require_admin(http_request: Request):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN.")
+    if not _is_admin(http_request):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+
+@app.get("/admin/profiles")
+async def profiles(http_request: Request):
+    _require_admin(http_request)
+    return await asyncio.to_thread(list_profiles)
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def profile(profile_id: str, http_request: Request):
+    """
+    Sampled profiles are collapsed stacks (flamegraph.pl / speedscope input);
+    cprofile ones are pstats text.
+    """
+    _require_admin(http_request)
+
+    found = await asyncio.to_thread(load_profile, profile_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Unknown profile.")
+
+    return PlainTextResponse(found[1])
+
+
+@app.get("/admin/storage")
+async def storage(http_request: Request):
+    """
+    Table sizes, free pages and rows evicted by the session sweeper.
+    """
+    _require_admin(http_request)
+    stats = await asyncio.to_thread(storage_stats)
+    stats["ir_cache"] = ir_cache.stats()
+    return stats
+
+
+@app.post("/admin/storage/sweep")
+async def sweep_storage(http_request: Request):
+    _require_admin(http_request)
+    return await app.state.sweeper.sweep()
+
+
+# -----------------------------
+# LLM Usage (cost / latency)
+# -----------------------------
+@app.get("/usage")
+def usage_summary(since: float | None = None):
+    return get_usage_summary(since=since)
+
+
+@app.get("/usage/{session_id}")
+def session_usage(session_id: str):
+    return get_session_usage(session_id)
@@ -68,7 +68,7 @@ class JCLParser(BaseParser):
             "name": parts[0],
             "program": self._extract(line, r"PGM=([A-Z0-9$#@.]+)"),
             "procedure": self._extract(line, r"PROC=([A-Z0-9]+)"),
-            "cond": self._extract(line, r"COND=([^,]+)"),
+            "cond": self._extract_operand(line, "COND"),
             "dds": [],
             "raw": line
         }
@@ -78,7 +78,7 @@ class JCLParser(BaseParser):
         return {
             "name": parts[0],
             "dsn": self._extract(line, r"DSN=([^,\s]+)"),
-            "disp": self._extract(line, r"DISP=([^,]+)"),
+            "disp": self._extract_operand(line, "DISP"),
             "type": self._dd_type(line),
             "raw": line
         }
@@ -98,6 +98,30 @@ class JCLParser(BaseParser):
         m = re.search(pattern, line)
         return m.group(1) if m else None
 
+    def _extract_operand(self, line: str, keyword: str) -> Optional[str]:
+        """
+        Value of KEYWORD=..., keeping parenthesized lists whole,
+        e.g. DISP=(NEW,CATLG,DELETE) or COND=((4,LT),(8,EQ,STEP1)).
+        """
+        m = re.search(rf"\b{keyword}=", line)
+        if not m:
+            return None
+
+        start = m.end()
+        depth = 0
+        for i in range(start, len(line)):
+            char = line[i]
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+                if depth == 0:
+                    return line[start:i + 1]
+            elif depth == 0 and char in ", ":
+                return line[start:i] or None
+
+        return line[start:] or None
+
     def _validate(self):
         if not self.ir["job"]:
             self.ir["warnings"].append("No JOB card found")
@@ -1,6 +1,8 @@
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from backend.app.config.settings import settings
 from backend.app.parsers.base_parser import BaseParser
+from backend.app.parsers.regex_parser.record_layout import compile_layouts
 from backend.app.core.ir_schema.ir import empty_cobol_ir
 
 
@@ -16,8 +18,41 @@ class CobolRegexParser(BaseParser):
     - Statement extraction (DISPLAY, ACCEPT, MOVE, COMPUTE, ADD, MULTIPLY, STOP)
     - Control flow extraction (IF, PERFORM, EVALUATE, GO TO)
     - File operation detection
+    - Unrecognized statements (procedure verbs none of the above captured)
+    - Optional scope tree (division → section → paragraph → IF/ELSE,
+      EVALUATE/WHEN and inline PERFORM blocks, with line ranges)
+    - Optional record layouts (field offsets and sizes, see record_layout)
     """
 
+    # Words that end a sentence on their own but are not paragraph names
+    NOT_PARAGRAPHS = {
+        "END-IF", "ELSE", "END-PERFORM", "END-EVALUATE", "END-READ",
+        "END-WRITE", "END-COMPUTE", "EXIT", "GOBACK", "CONTINUE"
+    }
+
+    # Scope node types closed by a period (a sentence ends every open block)
+    BLOCKS = {"IF", "ELSE", "EVALUATE", "WHEN", "PERFORM"}
+
+    # Where a condition on the IF / WHEN line stops and a statement starts
+    CLAUSE_END = re.compile(
+        r"\s+(?=(?:THEN|DISPLAY|MOVE|COMPUTE|ADD|SUBTRACT|MULTIPLY|DIVIDE|"
+        r"PERFORM|GO|CONTINUE|NEXT|SET|CALL|READ|WRITE|REWRITE|OPEN|CLOSE|"
+        r"STOP|INITIALIZE|STRING|UNSTRING|ACCEPT|EVALUATE|IF|EXIT|WHEN)\b)"
+    )
+
+    # Procedure division verbs, to find statements the extractors missed
+    VERBS = re.compile(
+        r"(?<![A-Z0-9\-])(ACCEPT|ADD|ALTER|CALL|CANCEL|CLOSE|COMPUTE|DELETE|"
+        r"DISPLAY|DIVIDE|EVALUATE|EXEC|GO|GOBACK|IF|INITIALIZE|INSPECT|MERGE|"
+        r"MOVE|MULTIPLY|OPEN|PERFORM|READ|RELEASE|RETURN|REWRITE|SEARCH|SET|"
+        r"SORT|START|STOP|STRING|SUBTRACT|UNSTRING|WRITE)(?![A-Z0-9\-])"
+    )
+    LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+    def __init__(self, build_scopes: Optional[bool] = None, build_layouts: Optional[bool] = None):
+        self.build_scopes = settings.IR_SCOPES if build_scopes is None else build_scopes
+        self.build_layouts = settings.IR_LAYOUTS if build_layouts is None else build_layouts
+
     # ==========================================================
     # PUBLIC API
     # ==========================================================
@@ -37,6 +72,13 @@ class CobolRegexParser(BaseParser):
         self._extract_control_flow(lines)
         self._extract_file_operations(lines)
         self._extract_performs(code)
+        self._extract_unrecognized(lines)
+
+        if self.build_scopes:
+            self.ir["scopes"] = self._build_scopes(lines)
+
+        if self.build_layouts:
+            self.ir["layouts"] = compile_layouts(lines)
 
         # Warning if no executable logic
         if not any([
@@ -134,15 +176,19 @@ class CobolRegexParser(BaseParser):
             if not in_procedure or "SECTION" in line:
                 continue
 
-            m = re.match(r"\s*([A-Z][A-Z0-9\-]*)\.", line)
-            if m:
-                name = m.group(1)
-                if name not in ["END-IF", "ELSE", "END-PERFORM"]:
-                    self.ir["paragraphs"].append({
-                        "id": f"PARA_{i + 1}",
-                        "name": name,
-                        "line": i + 1
-                    })
+            name = self._paragraph_name(line)
+            if name:
+                self.ir["paragraphs"].append({
+                    "id": f"PARA_{i + 1}",
+                    "name": name,
+                    "line": i + 1
+                })
+
+    def _paragraph_name(self, line: str) -> Optional[str]:
+        m = re.match(r"\s*([A-Z][A-Z0-9\-]*)\.", line)
+        if m and m.group(1) not in self.NOT_PARAGRAPHS:
+            return m.group(1)
+        return None
 
     # ==========================================================
     # STATEMENTS (EXECUTABLE)
@@ -290,3 +336,147 @@ class CobolRegexParser(BaseParser):
                     "target": m.group(1),
                     "line": i + 1
                 })
+
+    # ==========================================================
+    # UNRECOGNIZED STATEMENTS
+    # ==========================================================
+
+    def _extract_unrecognized(self, lines: List[str]):
+        """
+        Records every procedure division verb that no extractor turned
+        into an IR entry on its line (SUBTRACT, CALL, EXEC SQL, ADD
+        without GIVING, a second statement on a line, ...), so consumers
+        can tell the IR is incomplete.
+        """
+        captured = {}
+        for entry in self.ir["statements"] + self.ir["control_flow"] + self.ir["file_operations"]:
+            verb = entry.get("type") or entry.get("operation")
+            verb = "GO" if verb == "GO_TO" else verb
+            captured.setdefault(entry["line"], []).append(verb)
+
+        in_procedure = False
+        for i, line in enumerate(lines):
+            if "PROCEDURE DIVISION" in line:
+                in_procedure = True
+                continue
+            if not in_procedure:
+                continue
+
+            remaining = captured.get(i + 1, [])
+            for verb in self.VERBS.findall(self.LITERAL.sub(" ", line)):
+                if verb in remaining:
+                    remaining.remove(verb)
+                else:
+                    self.ir["unrecognized"].append({"verb": verb, "line": i + 1})
+
+    # ==========================================================
+    # SCOPE TREE
+    # ==========================================================
+
+    def _build_scopes(self, lines: List[str]) -> Dict[str, Any]:
+        """
+        Nests the program into scopes, each {"type", "name", "start",
+        "end", "children"} plus a type-specific field (IF "condition",
+        EVALUATE "expression", WHEN "value", inline PERFORM "spec").
+        Line numbers match the rest of the IR.
+
+        Blocks close at their END-xxx, at the period ending the sentence,
+        or when the paragraph, section or division they are in ends.
+        """
+        root = self._scope("PROGRAM", self.ir["program_info"].get("program_id"), 1)
+        stack = [root]
+        last = 0            # last non-blank line seen
+        in_procedure = False
+
+        def close(keep, end):
+            # Pops scopes until the top is one of keep
+            while len(stack) > 1 and stack[-1]["type"] not in keep:
+                stack.pop()["end"] = end
+
+        def open_scope(node):
+            stack[-1]["children"].append(node)
+            stack.append(node)
+
+        for i, line in enumerate(lines, start=1):
+            text = re.sub(r"'[^']*'|\"[^\"]*\"", "''", line)
+            if not text.strip():
+                continue
+
+            if m := re.match(r"\s*([A-Z]+) DIVISION\b", text):
+                close({"PROGRAM"}, last)
+                open_scope(self._scope("DIVISION", m.group(1), i))
+                in_procedure = m.group(1) == "PROCEDURE"
+
+            elif m := re.match(r"\s*([A-Z0-9][A-Z0-9\-]*) SECTION\b", text):
+                close({"PROGRAM", "DIVISION"}, last)
+                open_scope(self._scope("SECTION", m.group(1), i))
+
+            elif in_procedure and (name := self._paragraph_name(text)) and not text.split(".", 1)[1].strip():
+                close({"PROGRAM", "DIVISION", "SECTION"}, last)
+                open_scope(self._scope("PARAGRAPH", name, i))
+
+            elif in_procedure:
+                self._scan_blocks(text, i, stack, close, open_scope)
+
+            last = i
+
+        close(set(), last)
+        root["end"] = last
+        return root
+
+    def _scan_blocks(self, text, i, stack, close, open_scope):
+        # Whole words only: WHEN-DATE or IF-FLAG are data names
+        keywords = r"(?<![A-Z0-9\-])(IF|ELSE|END-IF|EVALUATE|WHEN|END-EVALUATE|PERFORM|END-PERFORM)(?![A-Z0-9\-])"
+
+        for m in re.finditer(keywords, text):
+            word, rest = m.group(1), text[m.end():].strip().rstrip(".")
+            clause = self.CLAUSE_END.split(rest, 1)[0]
+
+            if word == "IF":
+                open_scope(self._scope("IF", None, i, condition=clause))
+
+            elif word == "ELSE":
+                # Pairs with the innermost IF that has no ELSE yet
+                while len(stack) > 1 and not (
+                    stack[-1]["type"] == "IF"
+                    and not any(c["type"] == "ELSE" for c in stack[-1]["children"])
+                ):
+                    if stack[-1]["type"] not in self.BLOCKS:
+                        return
+                    stack.pop()["end"] = i
+                if stack[-1]["type"] == "IF":
+                    open_scope(self._scope("ELSE", None, i))
+
+            elif word == "EVALUATE":
+                open_scope(self._scope("EVALUATE", None, i, expression=clause))
+
+            elif word == "WHEN":
+                if stack[-1]["type"] == "WHEN":
+                    previous = stack.pop()
+                    previous["end"] = max(i - 1, previous["start"])
+                if stack[-1]["type"] == "EVALUATE":
+                    open_scope(self._scope("WHEN", None, i, value=clause))
+
+            elif word == "PERFORM":
+                # Inline: PERFORM UNTIL/VARYING/WITH TEST/n TIMES ... END-PERFORM
+                if not rest or re.match(r"(UNTIL|VARYING|WITH|TEST)\b|\S+\s+TIMES\b", rest):
+                    open_scope(self._scope("PERFORM", None, i, spec=rest))
+
+            else:
+                opener = {"END-IF": "IF", "END-EVALUATE": "EVALUATE", "END-PERFORM": "PERFORM"}[word]
+                if any(node["type"] == opener for node in stack):
+                    while stack[-1]["type"] != opener:
+                        stack.pop()["end"] = i
+                    stack.pop()["end"] = i
+
+        # A period ends the sentence, and with it every open block
+        if text.rstrip().endswith("."):
+            while stack[-1]["type"] in self.BLOCKS:
+                stack.pop()["end"] = i
+
+    @staticmethod
+    def _scope(kind, name, start, **fields):
+        node = {"type": kind, "name": name, "start": start, "end": start}
+        node.update(fields)
+        node["children"] = []
+        return node
@@ -0,0 +1,404 @@
+"""
+Record layout compiler: turns DATA DIVISION entries into a field tree
+with byte offsets and storage sizes, for decoding the files a program
+reads.
+
+Handles group items, FD / SD records, OCCURS (DEPENDING ON uses the
+maximum), REDEFINES, USAGE DISPLAY / COMP / COMP-3 / COMP-1 / COMP-2 /
+COMP-5 / BINARY / PACKED-DECIMAL / INDEX / POINTER / NATIONAL (inherited
+from groups), SIGN LEADING / TRAILING [SEPARATE], P scaling and level 88
+conditions. SYNCHRONIZED slack bytes and COPY members are not expanded;
+both are reported in the warnings.
+"""
+import re
+from typing import Dict, List, Any, Optional
+
+USAGES = {
+    "DISPLAY": "DISPLAY",
+    "COMP": "BINARY",
+    "COMPUTATIONAL": "BINARY",
+    "COMP-4": "BINARY",
+    "COMPUTATIONAL-4": "BINARY",
+    "BINARY": "BINARY",
+    "COMP-5": "COMP-5",
+    "COMPUTATIONAL-5": "COMP-5",
+    "COMP-3": "PACKED",
+    "COMPUTATIONAL-3": "PACKED",
+    "PACKED-DECIMAL": "PACKED",
+    "COMP-1": "COMP-1",
+    "COMPUTATIONAL-1": "COMP-1",
+    "COMP-2": "COMP-2",
+    "COMPUTATIONAL-2": "COMP-2",
+    "INDEX": "INDEX",
+    "POINTER": "POINTER",
+    "NATIONAL": "NATIONAL",
+}
+
+# Fixed sizes of usages that take no PICTURE
+FIXED_SIZES = {"COMP-1": 4, "COMP-2": 8, "INDEX": 4, "POINTER": 4}
+
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+_LEVEL = re.compile(r"^(\d{1,2})(?:\s+|$)")
+
+
+def compile_layouts(lines: List[str]) -> Dict[str, Any]:
+    """
+    Compiles the DATA DIVISION of normalized (upper-cased, comment-free)
+    source lines.
+
+    Returns:
+        dict: {"records": [...], "files": [...], "warnings": [...]}.
+        Each record is a field tree of dicts with "name", "level",
+        "offset", "size" (of one occurrence), "occurs", "usage",
+        "category" and, for groups, "children". Files map an FD / SD to
+        its record names and record length.
+    """
+    compiler = _LayoutCompiler()
+    for entry, line in _entries(lines):
+        compiler.add(entry, line)
+    return compiler.finish()
+
+
+def analyze_picture(picture: str) -> Dict[str, Any]:
+    """
+    Category, character length, digits, scale and sign of a PICTURE
+    string, e.g. "S9(5)V99" -> numeric, 7 characters, 7 digits, scale 2.
+    """
+    expanded = re.sub(r"(.)\((\d+)\)", lambda m: m.group(1) * int(m.group(2)), picture.upper())
+    signed = expanded.startswith("S")
+    body = expanded.lstrip("S")
+
+    if body and set(body) <= set("9VP"):
+        integer, _, fraction = body.partition("V")
+        digits = body.count("9")
+        scale = fraction.count("9") + fraction.count("P")
+        if integer.startswith("P"):
+            scale = digits + integer.count("P")
+        elif integer.endswith("P"):
+            scale = -integer.count("P")
+        return {
+            "category": "numeric",
+            "length": digits,
+            "digits": digits,
+            "scale": scale,
+            "signed": signed,
+        }
+
+    if set(body) <= set("N"):
+        return {"category": "national", "length": len(body) * 2}
+
+    if set(body) <= set("XA9B0/") and ("X" in body or "A" in body):
+        return {"category": "alphanumeric", "length": len(body)}
+
+    return {"category": "numeric-edited", "length": len(body)}
+
+
+def storage_size(usage: str, picture: Optional[Dict[str, Any]], sign_separate: bool = False) -> int:
+    """
+    Bytes one occurrence of an elementary item takes.
+    """
+    if usage in FIXED_SIZES:
+        return FIXED_SIZES[usage]
+    if picture is None:
+        return 0
+
+    digits = picture.get("digits", 0)
+    if usage in ("BINARY", "COMP-5"):
+        return 2 if digits <= 4 else 4 if digits <= 9 else 8
+    if usage == "PACKED":
+        return digits // 2 + 1
+
+    size = picture["length"]
+    if picture.get("signed") and sign_separate:
+        size += 1
+    return size
+
+
+# ==========================================================
+# ENTRY SPLITTING
+# ==========================================================
+
+def _entries(lines: List[str]):
+    """
+    Yields (entry text, first line number) for each period-terminated
+    DATA DIVISION entry. A period only ends an entry when followed by a
+    space or the end of the line, so PIC 9.99 stays whole.
+    """
+    in_data = False
+    buffer, start = [], None
+
+    for number, line in enumerate(lines, start=1):
+        if "DATA DIVISION" in line:
+            in_data = True
+            continue
+        if "PROCEDURE DIVISION" in line:
+            break
+        if not in_data or not line.strip():
+            continue
+
+        masked = _QUOTED.sub(lambda m: "'" * len(m.group(0)), line)
+        position = 0
+        for m in re.finditer(r"\.(?=\s|$)", masked):
+            if start is None:
+                start = number
+            buffer.append(line[position:m.start()])
+            yield " ".join(" ".join(buffer).split()), start
+            buffer, start = [], None
+            position = m.end()
+
+        rest = line[position:]
+        if rest.strip():
+            if start is None:
+                start = number
+            buffer.append(rest)
+
+    if buffer:
+        yield " ".join(" ".join(buffer).split()), start
+
+
+def _tokens(entry: str) -> List[str]:
+    tokens = re.findall(r"'[^']*'|\"[^\"]*\"|\S+", entry)
+    return [t if t[0] in "'\"" else t.rstrip(",;") for t in tokens]
+
+
+# ==========================================================
+# COMPILER
+# ==========================================================
+
+class _LayoutCompiler:
+
+    def __init__(self):
+        self.records = []
+        self.files = []
+        self.warnings = []
+        self.section = None
+        self.file = None
+        self.stack = []     # open items: (level, item)
+        self.last = None    # last item, for level 88
+
+    def add(self, entry: str, line: int):
+        tokens = _tokens(entry)
+        if not tokens:
+            return
+
+        if len(tokens) >= 2 and tokens[1] == "SECTION":
+            self.section = tokens[0]
+            self.file = None
+            self.stack = []
+            return
+
+        if tokens[0] in ("FD", "SD") and len(tokens) > 1:
+            self._add_file(tokens, line)
+            return
+
+        if tokens[0] == "COPY":
+            name = tokens[1] if len(tokens) > 1 else "?"
+            self.warnings.append(f"COPY {name} at line {line} was not expanded")
+            return
+
+        m = _LEVEL.match(entry)
+        if m:
+            self._add_item(int(m.group(1)), tokens[1:], line)
+
+    def finish(self) -> Dict[str, Any]:
+        for record in self.records:
+            _place(record, 0)
+
+        sizes = {id(record): record["size"] for record in self.records}
+        for file in self.files:
+            records = file.pop("_records")
+            file["records"] = [record["name"] for record in records]
+            # All records of a file share one record area
+            file["record_length"] = max((sizes[id(r)] for r in records), default=0)
+            declared = file["record_contains"]
+            if declared and records and declared != file["record_length"]:
+                self.warnings.append(
+                    f"{file['name']}: RECORD CONTAINS {declared} but its records "
+                    f"lay out to {file['record_length']} bytes"
+                )
+
+        return {"records": self.records, "files": self.files, "warnings": self.warnings}
+
+    # ---------------- entries ----------------
+
+    def _add_file(self, tokens, line):
+        self.file = {
+            "name": tokens[1],
+            "type": tokens[0],
+            "line": line,
+            "record_contains": None,
+            "recording_mode": None,
+            "_records": [],
+        }
+        text = " ".join(tokens[2:])
+        if m := re.search(r"RECORD\s+(?:CONTAINS\s+)?(\d+)(?:\s+TO\s+(\d+))?", text):
+            self.file["record_contains"] = int(m.group(2) or m.group(1))
+        if m := re.search(r"RECORDING\s+(?:MODE\s+)?(?:IS\s+)?([FVUS])\b", text):
+            self.file["recording_mode"] = m.group(1)
+        self.files.append(self.file)
+        self.stack = []
+
+    def _add_item(self, level, tokens, line):
+        if level == 88:
+            if self.last is not None:
+                self.last.setdefault("conditions", []).append({
+                    "name": tokens[0] if tokens else None,
+                    "values": " ".join(tokens[1:]).replace("VALUES ", "", 1).replace("VALUE ", "", 1)
+                })
+            return
+
+        if level == 66:
+            self.warnings.append(f"Level 66 RENAMES at line {line} is not laid out")
+            return
+
+        name = "FILLER"
+        if tokens and not _is_clause(tokens[0]):
+            name = tokens.pop(0)
+
+        item = {"level": level, "name": name, "line": line}
+        item.update(_clauses(tokens))
+
+        if item.pop("sync", False):
+            self.warnings.append(
+                f"{name} is SYNCHRONIZED; slack bytes are not inserted, offsets after it may be short"
+            )
+
+        # Levels 01 and 77 start a new record; others nest under the
+        # closest open item with a lower level
+        while self.stack and self.stack[-1][0] >= level:
+            self.stack.pop()
+
+        if level in (1, 77) or not self.stack:
+            self.records.append(item)
+            if self.file is not None and level == 1:
+                self.file["_records"].append(item)
+            item["section"] = self.section
+            item["file"] = self.file["name"] if self.file is not None else None
+        else:
+            parent = self.stack[-1][1]
+            parent.setdefault("children", []).append(item)
+            if "usage" not in item and parent.get("usage"):
+                item["usage"] = parent["usage"]
+
+        self.stack.append((level, item))
+        self.last = item
+
+
+def _is_clause(token: str) -> bool:
+    return token in (
+        "PIC", "PICTURE", "USAGE", "OCCURS", "REDEFINES", "VALUE", "VALUES",
+        "SIGN", "LEADING", "TRAILING", "SYNC", "SYNCHRONIZED", "JUST",
+        "JUSTIFIED", "BLANK", "EXTERNAL", "GLOBAL"
+    ) or token in USAGES
+
+
+def _clauses(tokens: List[str]) -> Dict[str, Any]:
+    item = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        following = tokens[i + 1:]
+
+        if token in ("PIC", "PICTURE"):
+            offset = 2 if following[:1] == ["IS"] else 1
+            if len(tokens) > i + offset:
+                item["picture"] = tokens[i + offset]
+            i += offset
+
+        elif token == "USAGE":
+            offset = 2 if following[:1] == ["IS"] else 1
+            if len(tokens) > i + offset:
+                item["usage"] = USAGES.get(tokens[i + offset], tokens[i + offset])
+            i += offset
+
+        elif token in USAGES:
+            item["usage"] = USAGES[token]
+
+        elif token == "OCCURS":
+            numbers = []
+            j = i + 1
+            while j < len(tokens) and (tokens[j].isdigit() or tokens[j] == "TO"):
+                if tokens[j].isdigit():
+                    numbers.append(int(tokens[j]))
+                j += 1
+            if numbers:
+                item["occurs"] = max(numbers)
+                if len(numbers) > 1:
+                    item["occurs_min"] = min(numbers)
+            rest = tokens[j:]
+            if "DEPENDING" in rest:
+                k = rest.index("DEPENDING") + 1
+                if k < len(rest) and rest[k] == "ON":
+                    k += 1
+                if k < len(rest):
+                    item["depending_on"] = rest[k]
+            i = j - 1
+
+        elif token == "REDEFINES" and following:
+            item["redefines"] = following[0]
+            i += 1
+
+        elif token in ("LEADING", "TRAILING"):
+            item["sign_position"] = token.lower()
+            item["sign_separate"] = "SEPARATE" in following[:2]
+
+        elif token in ("SYNC", "SYNCHRONIZED"):
+            item["sync"] = True
+
+        elif token in ("VALUE", "VALUES"):
+            break
+
+        i += 1
+
+    return item
+
+
+# ==========================================================
+# OFFSETS
+# ==========================================================
+
+def _place(item: Dict[str, Any], offset: int) -> int:
+    """
+    Assigns offsets and sizes below item, which starts at offset.
+    Returns the size of one occurrence.
+    """
+    item["offset"] = offset
+    item.setdefault("occurs", 1)
+    children = item.get("children")
+
+    if children:
+        item["category"] = "group"
+        position = end = offset
+        placed = {}
+        for child in children:
+            target = placed.get(child.get("redefines"))
+            start = target["offset"] if target is not None else position
+            size = _place(child, start) * child["occurs"]
+            if target is None:
+                position = start + size
+            end = max(end, start + size)
+            placed[child["name"]] = child
+        item["size"] = end - offset
+        return item["size"]
+
+    usage = item.setdefault("usage", "DISPLAY")
+    picture = analyze_picture(item["picture"]) if item.get("picture") else None
+
+    if usage in ("COMP-1", "COMP-2"):
+        item["category"] = "float"
+    elif usage in ("INDEX", "POINTER"):
+        item["category"] = "pointer"
+    elif picture is not None:
+        item["category"] = picture["category"]
+        for key in ("digits", "scale", "signed"):
+            if key in picture:
+                item[key] = picture[key]
+    else:
+        item["category"] = "alphanumeric"
+
+    if item.get("signed") and usage == "DISPLAY":
+        item.setdefault("sign_position", "trailing")
+        item.setdefault("sign_separate", False)
+
+    item["size"] = storage_size(usage, picture, item.get("sign_separate", False))
+    return item["size"]
@@ -0,0 +1,284 @@
+import re
+import time
+from backend.app.config.settings import settings
+from backend.app.core.metrics import instrument
+from backend.app.db.database import transaction
+from backend.app.db.write_queue import write_queue
+from backend.app.llm.similarity import SimilarityIndex
+
+# Words that do not change what a question asks for
+_FILLER = {"a", "an", "the", "this", "please", "paragraph", "step"}
+
+_NON_WORD = re.compile(r"[^a-z0-9\-]+")
+
+# Words that carry no topic: what is left of a question without them
+# is what the paraphrase lookup compares
+_QUESTION_WORDS = _FILLER | {
+    "what", "which", "where", "when", "how", "who", "why", "is", "are",
+    "does", "do", "did", "it", "its", "me", "you", "can", "could", "tell",
+    "explain", "describe", "show", "give", "about", "of", "in", "to", "for",
+    "and", "or", "there", "any", "program", "programs", "code", "get",
+}
+
+# Words that turn a question into a different one when swapped for
+# their opposite ("input" / "output file", "delete" / "update the
+# master"): questions must use the same words of every group
+_CONTRASTS = [
+    {"input": "input", "inputs": "input", "output": "output", "outputs": "output"},
+    {
+        "read": "read", "reads": "read", "reading": "read",
+        "write": "write", "writes": "write", "written": "write", "writing": "write",
+        "rewrite": "rewrite", "rewrites": "rewrite", "rewritten": "rewrite",
+        "update": "update", "updates": "update", "updated": "update",
+        "delete": "delete", "deletes": "delete", "deleted": "delete",
+        "insert": "insert", "inserts": "insert", "inserted": "insert",
+        "create": "create", "creates": "create", "created": "create",
+    },
+    {
+        "open": "open", "opens": "open", "opened": "open",
+        "close": "close", "closes": "close", "closed": "close",
+    },
+    {
+        "missing": "missing", "empty": "empty", "full": "full",
+        "exists": "exists", "exist": "exists", "found": "found",
+    },
+    {"first": "first", "last": "last", "next": "next", "previous": "previous"},
+    {"before": "before", "after": "after"},
+    {"start": "start", "starts": "start", "begin": "start", "end": "end", "ends": "end"},
+    {"min": "min", "minimum": "min", "max": "max", "maximum": "max"},
+    {"success": "success", "succeeds": "success", "fail": "fail", "fails": "fail", "failure": "fail"},
+    {"valid": "valid", "invalid": "invalid"},
+    {"not": "not", "never": "not", "no": "not", "without": "not"},
+]
+
+
+def normalize_question(question: str) -> str:
+    """
+    "What does paragraph MAIN-PARA do?" -> "what does main-para do"
+    """
+    words = _NON_WORD.sub(" ", question.lower()).split()
+    return " ".join(word for word in words if word not in _FILLER)
+
+
+def speculative_questions(ir: dict, language: str) -> list:
+    """
+    The questions worth answering before anyone asks: the configured
+    canned ones, then one per paragraph (COBOL) or step (JCL).
+    """
+    questions = [
+        q.strip() for q in settings.PRECOMPUTE_QUESTIONS.split("|") if q.strip()
+    ]
+
+    if language == "jcl":
+        names = [step.get("name") for step in ir.get("steps", [])]
+        template = "What does step {} do?"
+    else:
+        names = [paragraph.get("name") for paragraph in ir.get("paragraphs", [])]
+        template = "What does paragraph {} do?"
+
+    questions += [
+        template.format(name)
+        for name in names[:settings.PRECOMPUTE_MAX_PARAGRAPHS] if name
+    ]
+    return questions
+
+
+def save_answer(content_hash, question, answer):
+    write_queue.submit(
+        "answer", _insert_answer,
+        content_hash, normalize_question(question), question, answer, time.time()
+    )
+
+
+def _insert_answer(cur, content_hash, question_key, question, answer, now):
+    cur.execute(
+        """
+        INSERT OR REPLACE INTO precomputed_answers (
+            content_hash, question_key, question, answer, created_at
+        )
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (content_hash, question_key, question, answer, now)
+    )
+
+
+@instrument("db_load")
+def answered_questions(content_hash):
+    """
+    Normalized questions already answered for a program.
+    """
+    with transaction() as cur:
+        cur.execute(
+            "SELECT question_key FROM precomputed_answers WHERE content_hash = ?",
+            (content_hash,)
+        )
+        return {row[0] for row in cur.fetchall()}
+
+
+@instrument("db_load")
+def load_precomputed_answer(session_id, question):
+    """
+    Returns the precomputed answer to question for the session's
+    program, or None.
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT p.answer FROM sessions s
+            JOIN precomputed_answers p ON p.content_hash = s.content_hash
+            WHERE s.session_id = ? AND p.question_key = ?
+            """,
+            (session_id, normalize_question(question))
+        )
+        row = cur.fetchone()
+
+    return row[0] if row else None
+
+
+# ==========================================================
+# Paraphrase lookup over earlier answers
+# ==========================================================
+
+def ir_names(ir: dict) -> set:
+    """
+    Upper-cased names a question can refer to: program, paragraphs,
+    data items, JCL job, steps, DDs and datasets.
+    """
+    names = {ir.get("program_info", {}).get("program_id")}
+    names |= {ir.get("job", {}).get("name")}
+    names |= {p.get("name") for p in ir.get("paragraphs", [])}
+    names |= {v.get("name") for v in ir.get("variables", [])}
+    names |= set(ir.get("datasets", []))
+    for step in ir.get("steps", []):
+        names.add(step.get("name"))
+        names |= {dd.get("name") for dd in step.get("dds", [])}
+
+    return {name.upper() for name in names if isinstance(name, str) and name}
+
+
+def mentioned_names(question: str, names: set) -> frozenset:
+    tokens = (token.rstrip(".") for token in re.findall(r"[A-Z0-9\-.$#@]+", question.upper()))
+    return frozenset(token for token in tokens if token in names)
+
+
+def match_question(question: str, candidates: list, names: set, threshold: float):
+    """
+    Index of the candidate question that question paraphrases, or None.
+
+    Only the topic words are compared (see _QUESTION_WORDS), and
+    candidates must mention exactly the same IR names: "what does
+    CALC-PAY do" and "what does CALC-TAX do" are textually close but
+    ask different things. They must also use the same contrasting
+    words (see _CONTRASTS): "the input file" is not "the output file".
+
+    Questions with no topic words left ("what does CALC-PAY do",
+    "explain CALC-PAY") ask for a general explanation of the names they
+    mention, and match each other. Without a name they could ask
+    anything ("why?", "where is it?") and never match.
+
+    Returns:
+        (index, score), or (None, best score seen)
+    """
+    wanted = mentioned_names(question, names)
+    eligible = [
+        i for i, candidate in enumerate(candidates)
+        if mentioned_names(candidate, names) == wanted
+    ]
+    if not eligible:
+        return None, 0.0
+
+    topic = _topic(question, wanted)
+    if not topic:
+        if not wanted:
+            return None, 0.0
+        general = [i for i in eligible if not _topic(candidates[i], wanted)]
+        return (general[0], 1.0) if general else (None, 0.0)
+
+    contrasts = _contrasts(topic)
+    eligible = [i for i in eligible if _contrasts(_topic(candidates[i], wanted)) == contrasts]
+    if not eligible:
+        return None, 0.0
+    topics = [_topic(candidates[i], wanted) for i in eligible]
+
+    best, score = SimilarityIndex(topics).best(topic)
+    if best is None or score < threshold:
+        return None, score
+    return eligible[best], score
+
+
+def _topic(question: str, mentioned: frozenset) -> str:
+    words = normalize_question(question).split()
+    skip = _QUESTION_WORDS | {name.lower() for name in mentioned}
+    return " ".join(word for word in words if word not in skip)
+
+
+def _contrasts(topic: str) -> tuple:
+    words = topic.split()
+    return tuple(
+        frozenset(group[word] for word in words if word in group) for group in _CONTRASTS
+    )
+
+
+@instrument("db_load")
+def load_answer_candidates(session_id, limit=200):
+    """
+    Earlier (question, answer) pairs for the session's program: the
+    session's own chat turns, newest first, then precomputed answers.
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT role, message FROM chat_messages
+            WHERE session_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (session_id, 2 * limit)
+        )
+        messages = cur.fetchall()
+
+        cur.execute(
+            """
+            SELECT p.question, p.answer FROM sessions s
+            JOIN precomputed_answers p ON p.content_hash = s.content_hash
+            WHERE s.session_id = ?
+            LIMIT ?
+            """,
+            (session_id, limit)
+        )
+        precomputed = cur.fetchall()
+
+    # Newest first, so an assistant reply directly follows its question
+    pairs = []
+    for (role, message), (previous_role, previous) in zip(messages, messages[1:]):
+        if role == "assistant" and previous_role == "user" and _usable(message):
+            pairs.append((previous, message))
+
+    return (pairs + precomputed)[:limit]
+
+
+def find_similar_answer(session_id, question, ir, threshold=None):
+    """
+    An earlier answer to a paraphrase of question, or None.
+
+    Returns:
+        (answer, matched_question, score) or None
+    """
+    threshold = settings.SIMILARITY_THRESHOLD if threshold is None else threshold
+    candidates = load_answer_candidates(session_id, settings.SIMILARITY_MAX_CANDIDATES)
+    if not candidates:
+        return None
+
+    index, score = match_question(
+        question, [q for q, _ in candidates], ir_names(ir), threshold
+    )
+    if index is None:
+        return None
+
+    matched, answer = candidates[index]
+    return answer, matched, score
+
+
+def _usable(answer: str) -> bool:
+    # Failed turns are not worth repeating
+    return bool(answer) and not answer.startswith(("ERROR", "❌"))
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from backend.app.config.settings import settings
+from backend.app.core.ir_schema.ir import IR_VERSION
+from backend.app.core.metrics import instrument
+from backend.app.db.database import transaction
+
+
+def content_hash(code: str, language: str) -> str:
+    """
+    Hash of the normalized source, used as the key of a shared analysis.
+
+    Line endings, trailing whitespace and leading/trailing blank lines
+    are ignored, so cosmetic copies of a program map to one artifact.
+    The IR version and the optional IR sections are part of the key, so
+    a parser upgrade never serves IRs built by the old parser.
+    """
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").split("\n")]
+    normalized = "\n".join(lines).strip("\n")
+
+    digest = hashlib.sha256()
+    digest.update(f"ir{IR_VERSION}:{int(settings.IR_SCOPES)}{int(settings.IR_LAYOUTS)}".encode())
+    digest.update(b"\0")
+    digest.update(language.lower().encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_cacheable(result: dict) -> bool:
+    """
+    Failed LLM explanations are not shared, so a retry can succeed.
+    """
+    return not (result.get("explanation") or "").startswith("ERROR:")
+
+
+@instrument("db_load")
+def load_artifact(content_hash):
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT language, ir_json, analysis_json, explanation
+            FROM artifacts WHERE content_hash = ?
+            """,
+            (content_hash,)
+        )
+
+        row = cur.fetchone()
+
+    if not row:
+        return None
+
+    return {
+        "language": row[0],
+        "intermediate_representation": json.loads(row[1]),
+        "analysis": json.loads(row[2]) if row[2] else {},
+        "explanation": row[3] or ""
+    }
@@ -0,0 +1,133 @@
+import asyncio
+import uuid
+from typing import AsyncIterable, AsyncIterator, Iterable, Union
+
+from backend.app.config.settings import settings
+from backend.app.core.code_detector import detect_code_type
+from backend.app.core.engine import run_cached_pipeline
+from backend.app.llm.usage import usage_context
+from backend.app.services.chat_service import save_analyses
+
+
+async def analyze_members(members: Union[Iterable[dict], AsyncIterable[dict]]) -> AsyncIterator[dict]:
+    """
+    Analyzes many members concurrently and yields one result per member
+    as soon as it finishes (completion order, not submission order).
+
+    Members that finish together are persisted in one transaction
+    before their results are yielded, so every returned session_id
+    is immediately usable by /chat.
+
+    Members are pulled from the source only as analysis slots free up,
+    so a streamed archive is read at the pace of the analysis. A source
+    that fails with ValueError (a corrupt archive) or goes past
+    BATCH_MAX_MEMBERS ends the batch with an error result named None.
+
+    Args:
+        members: iterable or async iterable of {"name", "code",
+            "language"} dicts; a member with an "error" is reported
+            as is
+
+    Yields:
+        dict: per-member result with "status" of "ok" or "error"
+    """
+    source = members if hasattr(members, "__anext__") else _aiter(members)
+    limit = max(settings.BATCH_CONCURRENCY, 1)
+    pending = set()
+    started = 0
+    failure = None
+
+    async def refill():
+        nonlocal started, failure
+        while len(pending) < limit and failure is None:
+            try:
+                member = await anext(source, None)
+            except ValueError as e:
+                failure = {"name": None, "status": "error", "error": str(e)}
+                return
+            if member is None:
+                return
+            if started == settings.BATCH_MAX_MEMBERS:
+                failure = {
+                    "name": None,
+                    "status": "error",
+                    "error": f"Batch exceeds {settings.BATCH_MAX_MEMBERS} members."
+                }
+                return
+            started += 1
+            pending.add(asyncio.create_task(_analyze_member(member)))
+
+    try:
+        await refill()
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            await refill()
+
+            results = [task.result() for task in done]
+            await asyncio.to_thread(
+                save_analyses, [r for r in results if r["status"] == "ok"]
+            )
+
+            for result in results:
+                result.pop("content_hash", None)
+                yield result
+
+        if failure is not None:
+            yield failure
+    finally:
+        # The consumer left (client disconnect, aclose()): stop spending
+        # LLM tokens on results nobody will read
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if hasattr(source, "aclose"):
+            await source.aclose()
+
+
+async def _aiter(members: Iterable[dict]) -> AsyncIterator[dict]:
+    for member in members:
+        yield member
+
+
+async def _analyze_member(member: dict) -> dict:
+    name = member.get("name")
+    code = member.get("code") or ""
+
+    if member.get("error"):
+        return {"name": name, "status": "error", "error": member["error"]}
+
+    # Detection is CPU work on the whole member: keep it off the event loop
+    language = member.get("language") or await asyncio.to_thread(detect_code_type, code)
+    if not code.strip() or not language:
+        return {
+            "name": name,
+            "status": "error",
+            "error": "Not recognized as COBOL or JCL code."
+        }
+
+    session_id = str(uuid.uuid4())
+
+    try:
+        with usage_context(session_id):
+            result = await run_cached_pipeline(code=code, language=language)
+    except Exception as e:
+        return {
+            "name": name,
+            "language": language,
+            "status": "error",
+            "error": str(e)
+        }
+
+    return {
+        "name": name,
+        "status": "ok",
+        "session_id": session_id,
+        "language": language,
+        "explanation": result.get("explanation", ""),
+        "intermediate_representation": result.get("intermediate_representation") or {},
+        "analysis": result.get("analysis", {}),
+        "cached": result["cached"],
+        "content_hash": result["content_hash"]
+    }
@@ -1,63 +1,370 @@
 import json
-from backend.app.db.database import get_connection
+import time
+from backend.app.config.settings import settings
+from backend.app.core.metrics import instrument
+from backend.app.core.serialization import dumps, loads
+from backend.app.db.database import transaction
+from backend.app.db.ir_cache import ir_cache
+from backend.app.db.shared_cache import shared_cache
+from backend.app.db.write_queue import write_queue
+from backend.app.services.artifact_service import is_cacheable
+from backend.app.services.warehouse_service import save_to_warehouse
 
-def save_session(session_id, language):
-    conn = get_connection()
-    cur = conn.cursor()
+# Writes go through the write-behind queue; see write_queue.WriteQueue.
+# Each public save_* builds its rows on the caller's thread and hands the
+# writer a small function that executes them.
+
+@instrument("db_save")
+def save_session(session_id, language, content_hash=None):
+    write_queue.submit(
+        "session", _insert_session, session_id, language, content_hash, time.time()
+    )
+
+
+def _insert_session(cur, session_id, language, content_hash, now):
     cur.execute(
-        "INSERT OR IGNORE INTO sessions VALUES (?, ?)",
-        (session_id, language)
+        """
+        INSERT OR IGNORE INTO sessions (
+            session_id, language, content_hash, created_at, last_access
+        )
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (session_id, language, content_hash, now, now)
     )
-    conn.commit()
-    conn.close()
 
 
+@instrument("db_save")
 def save_ir(session_id, ir):
     if ir is None:
         raise ValueError("IR is None — pipeline did not return IR")
 
-    conn = get_connection()
-    cur = conn.cursor()
+    ir_json = json.dumps(ir)
+    future = write_queue.submit(
+        "ir", _insert_ir, session_id, ir_json,
+        pending={("ir", session_id): ir}
+    )
+    _cache_when_committed(future, [(session_id, ir, len(ir_json))])
+
 
+def _insert_ir(cur, session_id, ir_json):
     cur.execute(
         """
         INSERT OR REPLACE INTO ir_store (session_id, ir_json)
         VALUES (?, ?)
         """,
-        (session_id, json.dumps(ir))
+        (session_id, ir_json)
     )
 
-    conn.commit()
-    conn.close()
 
+@instrument("db_load")
+def load_ir(session_id):
+    """
+    Returns the session's IR, or None if the session is unknown or has
+    expired. Reading a session counts as using it (see SESSION_TTL_SECONDS).
+    """
+    # Read-your-writes: an analysis still in the write queue is served as is
+    pending = write_queue.peek(("ir", session_id))
+    if pending is not None:
+        return pending
 
+    now = time.time()
+    cutoff = now - settings.SESSION_TTL_SECONDS if settings.SESSION_TTL_SECONDS > 0 else None
 
+    cached = ir_cache.get(session_id)
+    if cached:
+        ir, last_access = cached
+        if cutoff is None or last_access >= cutoff:
+            _keep_alive(session_id, last_access, now)
+            return ir
+        ir_cache.invalidate(session_id)
 
-def load_ir(session_id):
-    conn = get_connection()
-    cur = conn.cursor()
+    # Another worker may already have loaded it
+    shared = _load_shared_ir(session_id, cutoff)
+    if shared:
+        ir, last_access, size = shared
+        ir_cache.put(session_id, ir, size, last_access)
+        _keep_alive(session_id, last_access, now)
+        return ir
 
-    cur.execute(
-        "SELECT ir_json FROM ir_store WHERE session_id = ?",
-        (session_id,)
-    )
+    with transaction() as cur:
+        # Sessions reference a shared artifact; older sessions own an ir_store copy
+        cur.execute(
+            """
+            SELECT COALESCE(a.ir_json, i.ir_json), s.last_access FROM sessions s
+            LEFT JOIN artifacts a ON a.content_hash = s.content_hash
+            LEFT JOIN ir_store i ON i.session_id = s.session_id
+            WHERE s.session_id = ? AND (? IS NULL OR s.last_access >= ?)
+            """,
+            (session_id, cutoff, cutoff)
+        )
 
-    row = cur.fetchone()
-    conn.close()
+        row = cur.fetchone()
 
     if not row or not row[0]:
         return None
 
-    return json.loads(row[0])
+    ir = json.loads(row[0])
+    last_access = row[1] or 0
+    _cache_ir(session_id, ir, len(row[0]), last_access)
+    _keep_alive(session_id, last_access, now)
+
+    return ir
+
+
+def touch_session(session_id, now=None):
+    now = now or time.time()
+    write_queue.submit("touch", _touch_session, session_id, now)
+    ir_cache.touch(session_id, now)
+
+
+def _keep_alive(session_id, last_access, now):
+    # Keep active sessions alive, without a write on every chat turn
+    if now - last_access > settings.SESSION_TOUCH_SECONDS:
+        touch_session(session_id, now)
+
+
+def _cache_when_committed(future, entries):
+    """
+    Writes IRs through to the cache once their rows are committed, so the
+    cache never holds a session the database does not have.
+    """
+    def on_done(done):
+        if done.exception() is None:
+            now = time.time()
+            for session_id, ir, size in entries:
+                _cache_ir(session_id, ir, size, now)
+
+    future.add_done_callback(on_done)
+
+
+def _cache_ir(session_id, ir, size, last_access):
+    ir_cache.put(session_id, ir, size, last_access)
+
+    # JSON, never pickle: whoever can write the cache file must not be
+    # able to run code in the workers that read it
+    if shared_cache.enabled:
+        shared_cache.put("ir", session_id, dumps([ir, last_access, size]))
+
+
+def _load_shared_ir(session_id, cutoff):
+    value = shared_cache.get("ir", session_id)
+    if value is None:
+        return None
+
+    try:
+        ir, last_access, size = loads(value)
+    except (ValueError, TypeError):
+        # Not ours (or from an older release): the database has it
+        return None
+    # The copy's last_access is from when it was stored; past the TTL the
+    # database has the authoritative answer
+    if cutoff is not None and last_access < cutoff:
+        return None
 
+    return ir, last_access, size
 
 
+def _touch_session(cur, session_id, now):
+    cur.execute(
+        "UPDATE sessions SET last_access = ? WHERE session_id = ?",
+        (now, session_id)
+    )
+
+
+@instrument("db_save")
 def save_message(session_id, role, message):
-    conn = get_connection()
-    cur = conn.cursor()
+    # Always waits for the commit, whatever WRITE_DURABILITY says: the
+    # next turn reads the conversation back (chat memory, similar
+    # answers) and must see this message
+    write_queue.submit(
+        "message", _insert_message, session_id, role, message, time.time()
+    ).result()
+
+
+def _insert_message(cur, session_id, role, message, created_at):
     cur.execute(
-        "INSERT INTO chat_messages VALUES (?, ?, ?)",
-        (session_id, role, message)
+        """
+        INSERT INTO chat_messages (session_id, role, message, created_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        (session_id, role, message, created_at)
+    )
+
+
+@instrument("db_load")
+def load_messages(session_id, after_id=0):
+    """
+    Returns (message_id, role, message) tuples for a session,
+    oldest first, restricted to messages newer than after_id.
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT id, role, message FROM chat_messages
+            WHERE session_id = ? AND id > ?
+            ORDER BY id
+            """,
+            (session_id, after_id)
+        )
+
+        rows = cur.fetchall()
+    return rows
+
+
+@instrument("db_load")
+def load_message_page(session_id, cursor=0, limit=50):
+    """
+    One page of a session's history, oldest first, for the history API.
+
+    Args:
+        cursor: id of the last message already seen (0 = from the start)
+        limit: maximum messages returned
+
+    Returns:
+        (messages, next_cursor): message dicts, and the cursor for the
+        following page or None when this was the last one
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT id, role, message, created_at FROM chat_messages
+            WHERE session_id = ? AND id > ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (session_id, cursor, limit + 1)
+        )
+
+        rows = cur.fetchall()
+
+    messages = [
+        {"id": row[0], "role": row[1], "message": row[2], "created_at": row[3]}
+        for row in rows[:limit]
+    ]
+    next_cursor = messages[-1]["id"] if len(rows) > limit else None
+    return messages, next_cursor
+
+
+@instrument("db_load")
+def load_summary(session_id):
+    """
+    Returns (summary, last_message_id) for a session.
+    last_message_id is the newest message already folded into the summary.
+    """
+    with transaction() as cur:
+        cur.execute(
+            "SELECT summary, last_message_id FROM chat_summaries WHERE session_id = ?",
+            (session_id,)
+        )
+
+        row = cur.fetchone()
+
+    if not row:
+        return "", 0
+
+    return row[0] or "", row[1] or 0
+
+
+@instrument("db_save")
+def save_summary(session_id, summary, last_message_id):
+    with transaction() as cur:
+        cur.execute(
+            """
+            INSERT OR REPLACE INTO chat_summaries (session_id, summary, last_message_id)
+            VALUES (?, ?, ?)
+            """,
+            (session_id, summary, last_message_id)
+        )
+
+
+@instrument("db_save")
+def save_analyses(records):
+    """
+    Persists analyzed programs and their sessions in a single transaction.
+
+    Successful analyses are stored once per content hash in artifacts and
+    sessions just reference them. Results whose explanation failed keep a
+    private ir_store copy, so the next submission re-runs the pipeline.
+
+    Args:
+        records: iterable of run_pipeline results, each with
+            "session_id", "language" and "content_hash" added
+    """
+    records = list(records)
+    if not records:
+        return
+
+    now = time.time()
+    shared = [r for r in records if is_cacheable(r)]
+    private = [r for r in records if not is_cacheable(r)]
+
+    # Cached hits are written too (INSERT OR IGNORE): the sweeper may
+    # have dropped the artifact since it was looked up, and the session
+    # must never reference a missing one
+    artifacts = list({
+        r["content_hash"]: (
+            r["content_hash"],
+            r["language"],
+            json.dumps(r["intermediate_representation"]),
+            json.dumps(r.get("analysis", {})),
+            r.get("explanation", ""),
+            now
+        )
+        for r in shared
+    }.values())
+    sessions = (
+        [(r["session_id"], r["language"], r["content_hash"], now, now) for r in shared]
+        + [(r["session_id"], r["language"], None, now, now) for r in private]
+    )
+    ir_rows = [
+        (r["session_id"], json.dumps(r["intermediate_representation"]))
+        for r in private
+    ]
+
+    future = write_queue.submit(
+        "analysis", _insert_analyses, artifacts, sessions, ir_rows,
+        pending={
+            ("ir", r["session_id"]): r["intermediate_representation"]
+            for r in records
+        }
+    )
+
+    # Sessions of already-stored artifacts are cached on their first read
+    artifact_sizes = {row[0]: len(row[2]) for row in artifacts}
+    entries = [
+        (r["session_id"], r["intermediate_representation"], artifact_sizes[r["content_hash"]])
+        for r in shared if not r.get("cached")
+    ] + [
+        (session_id, r["intermediate_representation"], len(ir_json))
+        for r, (session_id, ir_json) in zip(private, ir_rows)
+    ]
+    _cache_when_committed(future, entries)
+    save_to_warehouse(records)
+
+
+def _insert_analyses(cur, artifacts, sessions, ir_rows):
+    cur.executemany(
+        """
+        INSERT OR IGNORE INTO artifacts (
+            content_hash, language, ir_json, analysis_json, explanation, created_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        artifacts
+    )
+    cur.executemany(
+        """
+        INSERT OR IGNORE INTO sessions (
+            session_id, language, content_hash, created_at, last_access
+        )
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        sessions
+    )
+    cur.executemany(
+        """
+        INSERT OR REPLACE INTO ir_store (session_id, ir_json)
+        VALUES (?, ?)
+        """,
+        ir_rows
     )
-    conn.commit()
-    conn.close()
@@ -0,0 +1,145 @@
+import json
+import time
+from backend.app.db.database import transaction
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Progress stages reported while a job runs
+STAGES = ["queued", "parsed", "summarized", "explained"]
+
+
+def create_job(job_id, code, language):
+    now = time.time()
+    with transaction() as cur:
+        cur.execute(
+            """
+            INSERT INTO jobs (job_id, status, stage, language, code, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job_id, QUEUED, "queued", language, code, now, now)
+        )
+
+
+def update_job(job_id, claimed_by=None, **fields):
+    """
+    Updates any of: status, stage, session_id, result, error.
+
+    Args:
+        claimed_by: the runner's claim (session_id); when given, the job
+            is only updated while that claim still holds, so a runner
+            whose job was requeued and claimed again cannot overwrite it
+
+    Returns:
+        bool: whether the job was updated
+    """
+    if "result" in fields:
+        fields["result_json"] = json.dumps(fields.pop("result"))
+
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    where, params = "job_id = ?", [job_id]
+    if claimed_by is not None:
+        where += " AND status = ? AND session_id = ?"
+        params += [RUNNING, claimed_by]
+
+    with transaction() as cur:
+        cur.execute(
+            f"UPDATE jobs SET {assignments} WHERE {where}",
+            (*fields.values(), *params)
+        )
+        updated = cur.rowcount == 1
+    return updated
+
+
+def get_job(job_id, include_code=False):
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT job_id, status, stage, language, session_id,
+                   result_json, error, created_at, updated_at, code
+            FROM jobs WHERE job_id = ?
+            """,
+            (job_id,)
+        )
+        row = cur.fetchone()
+
+    if not row:
+        return None
+
+    job = {
+        "job_id": row[0],
+        "status": row[1],
+        "stage": row[2],
+        "language": row[3],
+        "session_id": row[4],
+        "result": json.loads(row[5]) if row[5] else None,
+        "error": row[6],
+        "created_at": row[7],
+        "updated_at": row[8]
+    }
+
+    if include_code:
+        job["code"] = row[9]
+
+    return job
+
+
+def claim_job(job_id, session_id):
+    """
+    Atomically moves a queued job to running. Returns False if another
+    worker (or process) already claimed it.
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            UPDATE jobs SET status = ?, session_id = ?, updated_at = ?
+            WHERE job_id = ? AND status = ?
+            """,
+            (RUNNING, session_id, time.time(), job_id, QUEUED)
+        )
+        claimed = cur.rowcount == 1
+    return claimed
+
+
+def touch_job(job_id, session_id):
+    """
+    Heartbeat of a running job: refreshes updated_at while the claim
+    (session_id) still holds. Returns False if the job was requeued or
+    claimed again meanwhile.
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            UPDATE jobs SET updated_at = ?
+            WHERE job_id = ? AND status = ? AND session_id = ?
+            """,
+            (time.time(), job_id, RUNNING, session_id)
+        )
+        touched = cur.rowcount == 1
+    return touched
+
+
+def requeue_unfinished_jobs(stale_after):
+    """
+    Returns ids of queued jobs, oldest first. Running jobs that have not
+    reported progress for stale_after seconds (their worker died) are
+    reset to queued first.
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            UPDATE jobs SET status = ?, stage = 'queued'
+            WHERE status = ? AND updated_at < ?
+            """,
+            (QUEUED, RUNNING, time.time() - stale_after)
+        )
+        cur.execute(
+            "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at",
+            (QUEUED,)
+        )
+        rows = cur.fetchall()
+    return [row[0] for row in rows]
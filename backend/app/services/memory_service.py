@@ -0,0 +1,69 @@
+from backend.app.config.settings import settings
+from backend.app.core.deadline import RequestAborted
+from backend.app.llm.explainer import summarize_conversation
+from backend.app.services.chat_service import (
+    load_messages,
+    load_summary,
+    save_summary
+)
+
+
+def build_chat_context(session_id: str) -> dict:
+    """
+    Builds the bounded conversation context for a chat turn.
+
+    The most recent messages are returned verbatim. Anything older is
+    folded into a rolling per-session summary, a batch at a time, so the
+    prompt stays roughly the same size however long the conversation gets.
+
+    Returns:
+        dict: {"summary": str, "recent": [(role, message), ...]}
+    """
+    summary, last_id = load_summary(session_id)
+
+    # Only messages not yet folded into the summary are read back
+    pending = load_messages(session_id, after_id=last_id)
+
+    window = max(settings.CHAT_HISTORY_MESSAGES, 0)
+    overflow = pending[:-window] if window else pending
+
+    # Compact in batches so the summarizer is not called on every turn
+    if len(overflow) >= max(settings.CHAT_SUMMARY_BATCH, 1):
+        summary = _compact(summary, overflow)
+        save_summary(session_id, summary, overflow[-1][0])
+        pending = pending[len(overflow):]
+
+    recent = [
+        (role, _clip(message, settings.CHAT_MESSAGE_MAX_CHARS))
+        for _, role, message in pending
+    ]
+
+    return {"summary": summary, "recent": recent}
+
+
+# ---------------- helpers ----------------
+
+def _compact(summary: str, messages: list) -> str:
+    turns = [
+        (role, _clip(message, settings.CHAT_MESSAGE_MAX_CHARS))
+        for _, role, message in messages
+    ]
+
+    try:
+        updated = summarize_conversation(summary, turns)
+    except RequestAborted:
+        raise
+    except Exception:
+        # Fall back to an extractive digest so the window still advances
+        digest = "\n".join(f"{role}: {message[:200]}" for role, message in turns)
+        updated = f"{summary}\n{digest}".strip()
+
+    # Keep the newest part of the summary when it outgrows its budget
+    return updated[-settings.CHAT_SUMMARY_MAX_CHARS:]
+
+
+def _clip(text: str, limit: int) -> str:
+    text = text or ""
+    if len(text) <= limit:
+        return text
+    return text[:limit] + " ...[truncated]"
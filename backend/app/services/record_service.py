@@ -0,0 +1,68 @@
+import math
+from decimal import Decimal
+from typing import Optional
+
+from backend.app.ingest.records import decode_file
+
+
+def find_record(layouts: dict, name: str):
+    """
+    Looks up a compiled record by its 01-level name, or by the FD / SD
+    name of a file (its first record, at the file's record length).
+
+    Returns:
+        (record, record_length) or None
+    """
+    wanted = name.upper()
+    records = {record["name"]: record for record in layouts.get("records", [])}
+
+    if wanted in records:
+        record = records[wanted]
+        return record, record["size"]
+
+    for file in layouts.get("files", []):
+        if file["name"] == wanted and file["records"]:
+            return records[file["records"][0]], file["record_length"]
+
+    return None
+
+
+def decode_records(path: str, layouts: dict, name: str, codepage: str = "cp037",
+                   start: int = 0, limit: Optional[int] = None) -> Optional[dict]:
+    """
+    Decodes the record file at path with the named record layout.
+    Returns None when the layouts have no such record; raises
+    ValueError for an unusable codepage or layout.
+    """
+    found = find_record(layouts, name)
+    if found is None:
+        return None
+
+    record, record_length = found
+    result = decode_file(
+        path, record, start, limit, codepage=codepage, record_length=record_length
+    )
+    result["record"] = record["name"]
+    result["columns"] = {
+        column: jsonable(values) for column, values in result["columns"].items()
+    }
+    return result
+
+
+def jsonable(values) -> list:
+    """
+    A decoded column as JSON-ready values: Decimals (scaled fields)
+    become strings, since a float would lose cents on large amounts;
+    NumPy arrays become lists, NaN (invalid data) None.
+    """
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+
+    converted = []
+    for value in values:
+        if isinstance(value, Decimal):
+            value = str(value)
+        elif isinstance(value, float) and math.isnan(value):
+            value = None
+        converted.append(value)
+    return converted
@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import time
+
+from backend.app.core.metrics import EVICTED_ROWS
+from backend.app.db import database
+from backend.app.db.database import transaction
+from backend.app.db.ir_cache import ir_cache
+from backend.app.db.shared_cache import shared_cache
+from backend.app.services.job_service import DONE, FAILED
+
+# Tables reported by storage_stats()
+TABLES = [
+    "sessions",
+    "ir_store",
+    "artifacts",
+    "precomputed_answers",
+    "chat_messages",
+    "chat_summaries",
+    "jobs",
+    "llm_usage",
+]
+
+
+def sweep_expired(ttl_seconds, batch_size=200, vacuum_pages=1000, now=None):
+    """
+    Deletes sessions unused for ttl_seconds, with their IR copies, chat
+    history and summaries, then finished jobs and artifacts no session
+    references any more (with their precomputed answers). Every batch is
+    its own short transaction so request-path writes are never blocked
+    for long.
+
+    llm_usage rows are kept on purpose: they are the record of what was
+    spent, and /usage totals must not shrink as sessions expire.
+
+    Returns:
+        dict: rows deleted per table
+    """
+    deleted = {table: 0 for table in TABLES}
+    if ttl_seconds <= 0:
+        return deleted
+
+    cutoff = (now or time.time()) - ttl_seconds
+    batch_size = max(batch_size, 1)
+
+    while True:
+        with transaction() as cur:
+            cur.execute(
+                "SELECT session_id FROM sessions WHERE last_access < ? LIMIT ?",
+                (cutoff, batch_size)
+            )
+            ids = [(row[0],) for row in cur.fetchall()]
+
+            for table in ("chat_messages", "chat_summaries", "ir_store", "sessions"):
+                cur.executemany(f"DELETE FROM {table} WHERE session_id = ?", ids)
+                deleted[table] += cur.rowcount if cur.rowcount > 0 else 0
+
+        expired = [session_id for (session_id,) in ids]
+        ir_cache.invalidate(*expired)
+        shared_cache.delete("ir", *expired)
+
+        if len(ids) < batch_size:
+            break
+
+    deleted["jobs"] += _delete_in_batches(
+        """
+        DELETE FROM jobs WHERE rowid IN (
+            SELECT rowid FROM jobs
+            WHERE status IN (?, ?) AND updated_at < ?
+            LIMIT ?
+        )
+        """,
+        (DONE, FAILED, cutoff),
+        batch_size
+    )
+
+    # Shared artifacts are dropped once their last session has gone
+    deleted["artifacts"] += _delete_in_batches(
+        """
+        DELETE FROM artifacts WHERE content_hash IN (
+            SELECT content_hash FROM artifacts a
+            WHERE a.created_at < ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM sessions s WHERE s.content_hash = a.content_hash
+              )
+            LIMIT ?
+        )
+        """,
+        (cutoff,),
+        batch_size
+    )
+
+    # ...and so are the answers precomputed for them
+    deleted["precomputed_answers"] += _delete_in_batches(
+        """
+        DELETE FROM precomputed_answers WHERE rowid IN (
+            SELECT p.rowid FROM precomputed_answers p
+            WHERE p.created_at < ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM artifacts a WHERE a.content_hash = p.content_hash
+              )
+            LIMIT ?
+        )
+        """,
+        (cutoff,),
+        batch_size
+    )
+
+    for table, count in deleted.items():
+        if count:
+            EVICTED_ROWS.inc(count, table=table)
+
+    reclaim_space(vacuum_pages)
+    return deleted
+
+
+def reclaim_space(max_pages=1000, step=100):
+    """
+    Returns free pages to the filesystem with PRAGMA incremental_vacuum,
+    a few at a time so the write lock is only held briefly.
+
+    Returns:
+        int: pages reclaimed
+    """
+    reclaimed = 0
+    while reclaimed < max_pages:
+        with transaction() as cur:
+            free = cur.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            pages = min(step, free, max_pages - reclaimed)
+            # executescript steps the pragma to completion; execute() would
+            # stop after the first freed page
+            cur.executescript(f"PRAGMA incremental_vacuum({pages});")
+        reclaimed += pages
+
+    if reclaimed:
+        # In WAL mode the file is truncated when the WAL is checkpointed
+        with transaction() as cur:
+            cur.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+    return reclaimed
+
+
+def storage_stats():
+    """
+    Row counts and on-disk size per table, plus file-level page usage.
+    """
+    with transaction() as cur:
+        page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = cur.execute("PRAGMA freelist_count").fetchone()[0]
+
+        tables = {
+            table: {"rows": cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]}
+            for table in TABLES
+        }
+
+        # dbstat is an optional SQLite build feature
+        try:
+            sizes = cur.execute(
+                "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            sizes = []
+
+    for name, size in sizes:
+        if name in tables:
+            tables[name]["bytes"] = size
+
+    return {
+        "file_bytes": os.path.getsize(database.DB_NAME),
+        "page_size": page_size,
+        "page_count": page_count,
+        "free_pages": free_pages,
+        "tables": tables,
+        "evicted": {
+            labels["table"]: value for _, labels, value in EVICTED_ROWS.samples()
+        }
+    }
+
+
+# ---------------- helpers ----------------
+
+def _delete_in_batches(sql, params, batch_size):
+    total = 0
+    while True:
+        with transaction() as cur:
+            cur.execute(sql, (*params, batch_size))
+            count = cur.rowcount
+        total += count
+        if count < batch_size:
+            return total
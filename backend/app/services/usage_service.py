@@ -0,0 +1,140 @@
+import time
+from backend.app.db.database import transaction
+
+
+def record_usage(
+    session_id,
+    template,
+    model,
+    prompt_tokens,
+    completion_tokens,
+    total_tokens,
+    latency_ms,
+    prompt_chars,
+    status="ok"
+):
+    with transaction() as cur:
+        cur.execute(
+            """
+            INSERT INTO llm_usage (
+                session_id, template, model,
+                prompt_tokens, completion_tokens, total_tokens,
+                latency_ms, prompt_chars, status, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                session_id, template, model,
+                prompt_tokens, completion_tokens, total_tokens,
+                latency_ms, prompt_chars, status, time.time()
+            )
+        )
+
+
+def get_session_usage(session_id):
+    """
+    Returns totals for one session plus a per-template breakdown.
+    """
+    with transaction() as cur:
+        cur.execute(
+            f"""
+            SELECT template, model, {_AGGREGATES}
+            FROM llm_usage
+            WHERE session_id = ?
+            GROUP BY template, model
+            ORDER BY template
+            """,
+            (session_id,)
+        )
+        rows = cur.fetchall()
+
+    by_template = [_row_to_dict(row[2:], template=row[0], model=row[1]) for row in rows]
+
+    return {
+        "session_id": session_id,
+        "totals": _sum_groups(by_template),
+        "by_template": by_template
+    }
+
+
+def get_usage_summary(since=None):
+    """
+    Returns usage aggregated per template and model across all sessions.
+    """
+    with transaction() as cur:
+        cur.execute(
+            f"""
+            SELECT template, model, {_AGGREGATES},
+                   COUNT(DISTINCT session_id)
+            FROM llm_usage
+            WHERE created_at >= ?
+            GROUP BY template, model
+            ORDER BY SUM(total_tokens) DESC
+            """,
+            (since or 0,)
+        )
+        rows = cur.fetchall()
+
+    by_template = []
+    for row in rows:
+        group = _row_to_dict(row[2:-1], template=row[0], model=row[1])
+        group["sessions"] = row[-1]
+        by_template.append(group)
+
+    return {
+        "totals": _sum_groups(by_template),
+        "by_template": by_template
+    }
+
+
+# ---------------- helpers ----------------
+
+_AGGREGATES = """
+    COUNT(*),
+    SUM(status = 'error'),
+    SUM(status = 'cached'),
+    COALESCE(SUM(prompt_tokens), 0),
+    COALESCE(SUM(completion_tokens), 0),
+    COALESCE(SUM(total_tokens), 0),
+    COALESCE(SUM(latency_ms), 0),
+    COALESCE(MAX(latency_ms), 0),
+    COALESCE(SUM(prompt_chars), 0)
+"""
+
+_FIELDS = [
+    "calls",
+    "errors",
+    "cache_hits",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "total_latency_ms",
+    "max_latency_ms",
+    "prompt_chars"
+]
+
+
+def _row_to_dict(values, **labels):
+    group = dict(labels)
+    group.update(zip(_FIELDS, values))
+    group["avg_latency_ms"] = (
+        round(group["total_latency_ms"] / group["calls"], 2) if group["calls"] else 0.0
+    )
+    return group
+
+
+def _sum_groups(groups):
+    totals = {field: 0 for field in _FIELDS if field != "max_latency_ms"}
+    totals["max_latency_ms"] = 0
+
+    for group in groups:
+        for field in totals:
+            if field == "max_latency_ms":
+                totals[field] = max(totals[field], group[field])
+            else:
+                totals[field] += group[field]
+
+    totals["avg_latency_ms"] = (
+        round(totals["total_latency_ms"] / totals["calls"], 2) if totals["calls"] else 0.0
+    )
+    return totals
@@ -0,0 +1,417 @@
+"""
+IR warehouse: the statements, control flow, file operations, variables
+and performs of every analyzed program, exported from the IR into
+indexed wh_* tables so repository-wide questions are plain SQL instead
+of decoding every stored IR.
+
+Programs are keyed by name (PROGRAM-ID, JCL job name, else the batch
+member name). Re-analyzing a program replaces its rows; analyzing the
+same content again only updates its timestamp.
+
+Every line-bearing row carries its paragraph and loop_depth, the number
+of looping inline PERFORMs (UNTIL / VARYING / TIMES) around it. Loops
+through out-of-line PERFORMs are resolved at query time from
+wh_performs (see file_operations).
+"""
+import json
+import re
+import sqlite3
+import time
+from bisect import bisect_right
+
+from backend.app.config.settings import settings
+from backend.app.core.ir_schema.scopes import ScopeIndex
+from backend.app.core.metrics import instrument
+from backend.app.db import database
+from backend.app.db.database import transaction
+from backend.app.db.write_queue import write_queue
+
+CHILD_TABLES = (
+    "wh_statements", "wh_control_flow", "wh_file_operations",
+    "wh_variables", "wh_performs", "wh_references",
+)
+
+_LOOP = re.compile(r"\b(UNTIL|VARYING|TIMES)\b")
+_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"")
+_NAME = re.compile(r"(?<![A-Z0-9\-])[A-Z][A-Z0-9\-]*(?![A-Z0-9\-])")
+
+# Words in statement operands and conditions that are not data names
+_NOT_NAMES = {
+    "TO", "FROM", "BY", "GIVING", "INTO", "OF", "IN", "ROUNDED", "AND", "OR",
+    "NOT", "IS", "ARE", "EQUAL", "EQUALS", "GREATER", "LESS", "THAN", "THEN",
+    "ZERO", "ZEROS", "ZEROES", "SPACE", "SPACES", "HIGH-VALUE", "HIGH-VALUES",
+    "LOW-VALUE", "LOW-VALUES", "QUOTE", "QUOTES", "ALL", "FUNCTION", "UPON",
+    "CORR", "CORRESPONDING", "ON", "SIZE", "ERROR", "NUMERIC", "ALPHABETIC",
+    "POSITIVE", "NEGATIVE", "TRUE", "FALSE", "WITH", "NO", "ADVANCING",
+}
+
+
+def program_key(ir: dict, name: str = None, content_hash: str = None):
+    """
+    The name a program is filed under in the warehouse.
+    """
+    return (
+        ir.get("program_info", {}).get("program_id")
+        or ir.get("job", {}).get("name")
+        or name
+        or content_hash
+    )
+
+
+def export_rows(ir: dict) -> dict:
+    """
+    The warehouse rows of one IR, without program ids: {table: [tuple]}
+    in the column order of the wh_* tables after program_id.
+    """
+    locate = _Locator(ir)
+    paragraphs = {p.get("name") for p in ir.get("paragraphs", [])}
+    rows = {table: [] for table in CHILD_TABLES}
+
+    for entry in ir.get("statements", []):
+        line = entry.get("line")
+        kind = entry.get("type")
+        target, source = _operands(entry)
+        rows["wh_statements"].append((line, *locate(line), kind, target, source))
+        rows["wh_references"] += _references(line, kind, target, source, paragraphs)
+
+    loop_specs = {}
+    for entry in ir.get("control_flow", []):
+        line = entry.get("line")
+        kind = entry.get("type")
+        rows["wh_control_flow"].append(
+            (line, *locate(line), kind, entry.get("condition"), entry.get("target"))
+        )
+        if kind == "PERFORM":
+            loop_specs[line] = entry.get("target") or ""
+        if entry.get("condition"):
+            rows["wh_references"] += _references(line, kind, None, entry["condition"], paragraphs)
+
+    for entry in ir.get("file_operations", []):
+        line = entry.get("line")
+        rows["wh_file_operations"].append((line, *locate(line), entry.get("operation")))
+
+    for entry in ir.get("variables", []):
+        rows["wh_variables"].append((entry.get("level"), entry.get("name"), entry.get("picture")))
+
+    for entry in ir.get("performs", []):
+        line = entry.get("line")
+        # Inline PERFORMs have no paragraph target; their body is
+        # covered by loop_depth instead
+        target = entry.get("target") if entry.get("target") in paragraphs else None
+        looped = int(target is not None and bool(_LOOP.search(loop_specs.get(line, ""))))
+        rows["wh_performs"].append((line, *locate(line), target, looped))
+
+    return rows
+
+
+def save_to_warehouse(records):
+    """
+    Queues warehouse upserts for analyzed programs (save_analyses
+    records; batch results carry a member "name").
+    """
+    if not settings.WAREHOUSE:
+        return
+
+    programs = []
+    for record in records:
+        ir = record.get("intermediate_representation") or {}
+        key = program_key(ir, record.get("name"), record.get("content_hash"))
+        if key:
+            programs.append((
+                key, record.get("language"), record.get("content_hash"),
+                record.get("session_id"), export_rows(ir)
+            ))
+
+    if programs:
+        write_queue.submit("warehouse", _upsert_programs, programs, time.time())
+
+
+def _upsert_programs(cur, programs, now):
+    for key, language, content_hash, session_id, rows in programs:
+        cur.execute("SELECT id, content_hash FROM wh_programs WHERE program = ?", (key,))
+        found = cur.fetchone()
+
+        if found is not None and content_hash and found[1] == content_hash:
+            cur.execute(
+                "UPDATE wh_programs SET session_id = COALESCE(?, session_id), analyzed_at = ? WHERE id = ?",
+                (session_id, now, found[0])
+            )
+            continue
+
+        if found is not None:
+            program_id = found[0]
+            for table in CHILD_TABLES:
+                cur.execute(f"DELETE FROM {table} WHERE program_id = ?", (program_id,))
+            cur.execute(
+                """
+                UPDATE wh_programs
+                SET language = ?, content_hash = ?, session_id = ?, analyzed_at = ?
+                WHERE id = ?
+                """,
+                (language, content_hash, session_id, now, program_id)
+            )
+        else:
+            cur.execute(
+                """
+                INSERT INTO wh_programs (program, language, content_hash, session_id, analyzed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, language, content_hash, session_id, now)
+            )
+            program_id = cur.lastrowid
+
+        for table, table_rows in rows.items():
+            if table_rows:
+                marks = ", ".join("?" * (len(table_rows[0]) + 1))
+                cur.executemany(
+                    f"INSERT INTO {table} VALUES ({marks})",
+                    [(program_id, *row) for row in table_rows]
+                )
+
+
+def rebuild_warehouse(batch_size=200):
+    """
+    Exports every stored artifact into the warehouse (a backfill, e.g.
+    after enabling WAREHOUSE). Returns the number of programs exported.
+    """
+    exported = 0
+    last = 0
+
+    while True:
+        with transaction() as cur:
+            cur.execute(
+                """
+                SELECT rowid, content_hash, language, ir_json FROM artifacts
+                WHERE rowid > ? ORDER BY rowid LIMIT ?
+                """,
+                (last, batch_size)
+            )
+            artifacts = cur.fetchall()
+
+        if not artifacts:
+            return exported
+
+        last = artifacts[-1][0]
+        programs = []
+        for _, content_hash, language, ir_json in artifacts:
+            ir = json.loads(ir_json or "{}")
+            key = program_key(ir, content_hash=content_hash)
+            programs.append((key, language, content_hash, None, export_rows(ir)))
+
+        with transaction() as cur:
+            _upsert_programs(cur, programs, time.time())
+        exported += len(programs)
+
+
+# ==========================================================
+# Queries
+# ==========================================================
+
+@instrument("db_load")
+def list_programs(language=None, limit=100, offset=0):
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT program, language, content_hash, session_id, analyzed_at
+            FROM wh_programs
+            WHERE ? IS NULL OR language = ?
+            ORDER BY program
+            LIMIT ? OFFSET ?
+            """,
+            (language, language, limit, offset)
+        )
+        return [
+            dict(zip(("program", "language", "content_hash", "session_id", "analyzed_at"), row))
+            for row in cur.fetchall()
+        ]
+
+
+@instrument("db_load")
+def file_operations(operation, in_loop=False, program=None, limit=1000):
+    """
+    File operations of one kind across all programs, e.g. every REWRITE.
+
+    With in_loop, only those that run inside a PERFORM loop: under a
+    looping inline PERFORM, or in a paragraph reached from a looping
+    PERFORM (directly or through further PERFORMs).
+    """
+    loop_filter = ""
+    if in_loop:
+        loop_filter = """
+            AND (f.loop_depth > 0 OR EXISTS (
+                SELECT 1 FROM looped l
+                WHERE l.program_id = f.program_id AND l.paragraph = f.paragraph
+            ))
+        """
+
+    with transaction() as cur:
+        cur.execute(
+            f"""
+            WITH RECURSIVE looped(program_id, paragraph) AS (
+                SELECT program_id, target FROM wh_performs
+                WHERE target IS NOT NULL AND (looped = 1 OR loop_depth > 0)
+                UNION
+                SELECT p.program_id, p.target FROM wh_performs p
+                JOIN looped l ON l.program_id = p.program_id AND l.paragraph = p.paragraph
+                WHERE p.target IS NOT NULL
+            )
+            SELECT g.program, f.line, f.paragraph, f.loop_depth, f.operation
+            FROM wh_file_operations f
+            JOIN wh_programs g ON g.id = f.program_id
+            WHERE f.operation = ? AND (? IS NULL OR g.program = ?)
+            {loop_filter}
+            ORDER BY g.program, f.line
+            LIMIT ?
+            """,
+            (operation.upper(), program, program, limit)
+        )
+        return [
+            dict(zip(("program", "line", "paragraph", "loop_depth", "operation"), row))
+            for row in cur.fetchall()
+        ]
+
+
+@instrument("db_load")
+def variable_references(name, kind=None, role=None, limit=1000):
+    """
+    Statements and conditions that reference a data name across all
+    programs, e.g. every COMPUTE touching WS-RATE. role is "write" (the
+    name is assigned) or "read".
+    """
+    with transaction() as cur:
+        cur.execute(
+            """
+            SELECT g.program, r.line, r.kind, r.role, s.paragraph, s.target, s.source
+            FROM wh_references r
+            JOIN wh_programs g ON g.id = r.program_id
+            LEFT JOIN wh_statements s
+                ON s.program_id = r.program_id AND s.line = r.line AND s.type = r.kind
+            WHERE r.name = ? AND (? IS NULL OR r.kind = ?) AND (? IS NULL OR r.role = ?)
+            ORDER BY g.program, r.line
+            LIMIT ?
+            """,
+            (name.upper(), kind and kind.upper(), kind and kind.upper(), role, role, limit)
+        )
+        return [
+            dict(zip(("program", "line", "kind", "role", "paragraph", "target", "source"), row))
+            for row in cur.fetchall()
+        ]
+
+
+def run_query(sql, params=(), limit=None, timeout=None):
+    """
+    Runs one read-only SELECT against the wh_* tables on a separate
+    read-only connection. Anything but reading the warehouse is refused
+    by an authorizer, and the query is interrupted after timeout seconds.
+
+    Returns:
+        dict: {"columns", "rows", "truncated"}
+
+    Raises:
+        ValueError: the statement is not a valid read-only query
+    """
+    limit = settings.WAREHOUSE_QUERY_LIMIT if limit is None else limit
+    timeout = settings.WAREHOUSE_QUERY_TIMEOUT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    conn = sqlite3.connect(f"file:{database.DB_NAME}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        conn.set_authorizer(_read_only)
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            cur = conn.execute(sql, params)
+            rows = cur.fetchmany(limit + 1)
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                raise ValueError(f"Query exceeded {timeout:g} seconds.")
+            raise ValueError(str(e))
+        except (sqlite3.DatabaseError, sqlite3.Warning) as e:
+            raise ValueError(str(e))
+
+        return {
+            "columns": [column[0] for column in cur.description or ()],
+            "rows": [list(row) for row in rows[:limit]],
+            "truncated": len(rows) > limit,
+        }
+    finally:
+        conn.close()
+
+
+_READ_ACTIONS = {
+    sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE
+}
+
+
+def _read_only(action, table, *_):
+    # Only the warehouse is readable: sessions, chat messages and the
+    # rest of the database stay out of reach of ad-hoc queries
+    if action not in _READ_ACTIONS:
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_READ and not (table or "").lower().startswith("wh_"):
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+# ==========================================================
+# Export helpers
+# ==========================================================
+
+class _Locator:
+    """
+    line -> (paragraph, loop_depth), from the scope tree when the IR has
+    one, else from paragraph start lines (loop_depth 0).
+    """
+
+    def __init__(self, ir):
+        root = ir.get("scopes")
+        self._index = ScopeIndex(root) if root else None
+        paragraphs = sorted(
+            (p.get("line") or 0, p.get("name")) for p in ir.get("paragraphs", [])
+        )
+        self._starts = [line for line, _ in paragraphs]
+        self._names = [name for _, name in paragraphs]
+
+    def __call__(self, line):
+        if line is None:
+            return None, 0
+
+        if self._index is not None:
+            path = self._index.path(line)
+            paragraph = next(
+                (node.get("name") for node in reversed(path) if node["type"] == "PARAGRAPH"), None
+            )
+            depth = sum(
+                1 for node in path
+                if node["type"] == "PERFORM" and _LOOP.search(node.get("spec") or "")
+            )
+            return paragraph, depth
+
+        position = bisect_right(self._starts, line) - 1
+        return (self._names[position] if position >= 0 else None), 0
+
+
+def _operands(entry):
+    """
+    (target, source) of a statement: what it assigns and what it reads.
+    """
+    target = entry.get("target") or entry.get("to") or entry.get("result")
+    if entry.get("type") == "MULTIPLY":
+        source = f"{entry.get('left')} BY {entry.get('right')}"
+    else:
+        source = (
+            entry.get("expression") or entry.get("from")
+            or entry.get("operands") or entry.get("value")
+        )
+    return target, source
+
+
+def _references(line, kind, target, source, paragraphs):
+    rows = []
+    for role, text in (("write", target), ("read", source)):
+        if not text:
+            continue
+        names = _NAME.findall(_LITERAL.sub(" ", text.upper()))
+        for name in dict.fromkeys(names):
+            if name not in _NOT_NAMES and name not in paragraphs:
+                rows.append((line, name, kind, role))
+    return rows
@@ -0,0 +1,115 @@
+"""
+Concurrent read/write throughput of the SQLite access layer.
+
+Compares the original pattern (new connection per call, rollback
+journal, commit + close every statement) with the pooled WAL layer,
+with and without the write-behind queue, using the /chat mix: load_ir + 2x save_message per turn.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_db [threads] [turns_per_thread]
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from backend.app.db import database
+from backend.app.db.write_queue import write_queue
+from backend.app.services import chat_service
+
+IR = {"statements": [{"type": "MOVE", "from": f"A-{i}", "to": f"B-{i}", "line": i} for i in range(200)]}
+
+
+# ---------------- original access pattern ----------------
+
+def legacy_load_ir(session_id):
+    conn = sqlite3.connect(database.DB_NAME, check_same_thread=False)
+    row = conn.execute("SELECT ir_json FROM ir_store WHERE session_id = ?", (session_id,)).fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def legacy_save_message(session_id, role, message):
+    conn = sqlite3.connect(database.DB_NAME, check_same_thread=False)
+    conn.execute(
+        "INSERT INTO chat_messages (session_id, role, message) VALUES (?, ?, ?)",
+        (session_id, role, message)
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_setup(path):
+    # init_db() leaves the file in WAL mode; switching back needs it closed
+    database.close_connections()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+
+# ---------------- harness ----------------
+
+def run(label, load_ir, save_message, threads, turns):
+    def worker(index):
+        session_id = f"S{index % 8}"
+        for turn in range(turns):
+            assert load_ir(session_id) is not None
+            save_message(session_id, "user", f"question {turn}")
+            save_message(session_id, "assistant", f"answer {turn}")
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ops = threads * turns * 3
+    print(f"{label:<36}{threads:>8}{ops:>10}{elapsed:>10.2f}{ops / elapsed:>12,.0f}")
+
+
+def fresh_db(directory, name):
+    database.close_connections()
+    database.DB_NAME = os.path.join(directory, name)
+    database.init_db()
+    chat_service.save_analyses([
+        {
+            "session_id": f"S{i}",
+            "language": "cobol",
+            "content_hash": None,
+            "intermediate_representation": IR,
+            "explanation": "ERROR: private copy"  # forces an ir_store row
+        }
+        for i in range(8)
+    ])
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"{'layer':<36}{'threads':>8}{'ops':>10}{'seconds':>10}{'ops/s':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sorted({1, threads}):
+            fresh_db(directory, f"legacy-{count}.db")
+            legacy_setup(database.DB_NAME)
+            run("connect-per-call, rollback journal", legacy_load_ir, legacy_save_message, count, turns)
+
+            fresh_db(directory, f"pooled-{count}.db")
+            run("pooled connections, WAL", chat_service.load_ir, chat_service.save_message, count, turns)
+
+            fresh_db(directory, f"queued-{count}.db")
+            write_queue.start()
+            run("pooled WAL + write-behind", chat_service.load_ir, chat_service.save_message, count, turns)
+            write_queue.stop()
+
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Response size and encode time for /analyze payloads.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_serialization [statements]
+"""
+import gzip
+import json
+import sys
+import time
+
+from backend.app.analyzers.summarizer import summarize
+from backend.app.core.parser_factory import parse_code
+from backend.app.core import serialization
+from backend.app.core.serialization import dumps, select_fields
+
+
+def build_payload(statements: int) -> dict:
+    body = "".join(
+        f"       PARA-{i}.\n"
+        f"           MOVE WS-A-{i} TO WS-B-{i}.\n"
+        f"           COMPUTE WS-TOTAL = WS-TOTAL + WS-B-{i}.\n"
+        f"           IF WS-B-{i} > 100\n"
+        f"               PERFORM PARA-{i + 1}.\n"
+        for i in range(statements // 3)
+    )
+    code = (
+        "       IDENTIFICATION DIVISION.\n"
+        "       PROGRAM-ID. BENCH.\n"
+        "       PROCEDURE DIVISION.\n" + body
+    )
+    ir = parse_code(code, "cobol")
+
+    return {
+        "session_id": "00000000-0000-0000-0000-000000000000",
+        "language": "cobol",
+        "explanation": "This program moves and accumulates values. " * 40,
+        "intermediate_representation": ir,
+        "analysis": summarize(ir),
+        "cached": False
+    }
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def encoders():
+    yield "json (default)", lambda p: json.dumps(p).encode("utf-8")
+
+    try:
+        from fastapi.encoders import jsonable_encoder
+        yield "fastapi default", lambda p: json.dumps(jsonable_encoder(p)).encode("utf-8")
+    except ImportError:
+        pass
+
+    yield "dumps()" + (" [orjson]" if serialization.orjson else " [compact json]"), dumps
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    payload = build_payload(statements)
+    views = {
+        "full": payload,
+        "explanation,summary": select_fields(payload, ["explanation", "analysis"])
+    }
+
+    print(f"{'payload':<22}{'encoder':<26}{'bytes':>12}{'ms':>10}")
+    for view, data in views.items():
+        for name, encode in encoders():
+            body, ms = timed(lambda: encode(data))
+            print(f"{view:<22}{name:<26}{len(body):>12,}{ms:>10.2f}")
+
+    raw = dumps(payload)
+    print(f"\n{'compression (full)':<48}{'bytes':>12}{'ms':>10}")
+    body, ms = timed(lambda: gzip.compress(raw, compresslevel=5))
+    print(f"{'gzip level 5':<48}{len(body):>12,}{ms:>10.2f}")
+
+    if serialization.brotli:
+        body, ms = timed(lambda: serialization.brotli.compress(raw, quality=4))
+        print(f"{'brotli quality 4':<48}{len(body):>12,}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start import time, per module.
+
+Runs a fresh interpreter with -X importtime for each target module and
+reports its total import time, the slowest modules it pulled in, and
+whether any deferred dependency was imported eagerly.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_startup [module ...] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "backend.app.main",
+    "backend.app.core.engine",
+    "backend.app.core.parser_factory",
+    "backend.app.llm.explainer",
+    "backend.app.services.chat_service",
+]
+
+# Must not be imported until first use
+DEFERRED = [
+    "groq",
+    "backend.app.parsers.regex_parser.cobol_regex_parser",
+    "backend.app.parsers.jcl_parser.parser",
+]
+
+
+def import_times(module: str):
+    """
+    Returns ({module: cumulative microseconds}, error text or None).
+    """
+    env = dict(os.environ)
+    env.pop("GROQ_API_KEY", None)  # startup must not need the key
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env
+    )
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1]
+
+    return times, error
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times, error = import_times(module)
+
+        if error:
+            print(f"{module}: FAILED ({error})\n")
+            continue
+
+        print(f"{module}: {times.get(module, 0) / 1000:.1f} ms")
+
+        slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)
+        for name, cumulative in slowest[1:args.top + 1]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        eager = [name for name in DEFERRED if name in times]
+        print(f"    deferred modules imported eagerly: {', '.join(eager) or 'none'}\n")
+
+
+if __name__ == "__main__":
+    main()
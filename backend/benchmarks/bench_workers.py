@@ -0,0 +1,137 @@
+"""
+Throughput of the storage layer as worker processes are added.
+
+Each worker process plays a uvicorn worker serving /chat turns against
+one shared database and shared cache file: load the session's IR
+(in-process LRU -> shared cache -> SQLite), look up a cached LLM answer
+in the shared tier, and queue two chat messages on the write-behind
+queue. Sessions are spread so most IR loads miss the small in-process
+cache, which is the case multi-worker mode is meant to fix.
+
+Scaling is only meaningful up to the number of CPU cores; the report
+gives efficiency against min(workers, cores).
+
+Run from the project root:
+    python -m backend.benchmarks.bench_workers [--workers 1,2,4] [--seconds 3]
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+SESSIONS = 400
+IR = {"statements": [{"type": "MOVE", "from": f"A-{i}", "to": f"B-{i}", "line": i} for i in range(500)]}
+
+
+def worker(db_path, cache_path, seconds, barrier, results):
+    # Configure before the app modules read their settings
+    os.environ.update({
+        "DB_PATH": db_path,
+        "SHARED_CACHE": "1",
+        "SHARED_CACHE_PATH": cache_path,
+        "IR_CACHE_MAX_BYTES": str(256 * 1024),
+    })
+
+    from backend.app.db.database import init_db, close_connections
+    from backend.app.db.shared_cache import shared_cache
+    from backend.app.db.write_queue import write_queue
+    from backend.app.services.chat_service import load_ir, save_message
+
+    init_db()
+    write_queue.start()
+    rng = random.Random(os.getpid())
+
+    barrier.wait()
+    turns = 0
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        session_id = f"S{rng.randrange(SESSIONS)}"
+        assert load_ir(session_id) is not None
+        shared_cache.get("llm", hashlib.sha256(session_id.encode()).hexdigest())
+        save_message(session_id, "user", "What does MAIN-PARA do?")
+        save_message(session_id, "assistant", "It moves A to B.")
+        turns += 1
+
+    write_queue.stop()
+    close_connections()
+    results.put(turns)
+
+
+def seed(db_path, cache_path):
+    os.environ.update({"DB_PATH": db_path, "SHARED_CACHE_PATH": cache_path})
+
+    from backend.app.db import database
+    from backend.app.db.shared_cache import SharedCache
+    from backend.app.services.chat_service import save_analyses
+
+    database.DB_NAME = db_path
+    database.init_db()
+    save_analyses([
+        {
+            "session_id": f"S{i}",
+            "language": "cobol",
+            "content_hash": f"H{i}",
+            "intermediate_representation": IR,
+            "analysis": {},
+            "explanation": "Moves A to B."
+        }
+        for i in range(SESSIONS)
+    ])
+
+    llm = SharedCache(cache_path, max_bytes=1 << 30)
+    for i in range(SESSIONS):
+        key = hashlib.sha256(f"S{i}".encode()).hexdigest()
+        llm.put("llm", key, b"It moves A to B.")
+    database.close_connections()
+
+
+def run(count, seconds):
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "chat.db")
+        cache_path = os.path.join(directory, "cache.db")
+        seed(db_path, cache_path)
+
+        barrier = context.Barrier(count)
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(db_path, cache_path, seconds, barrier, results))
+            for _ in range(count)
+        ]
+        for process in processes:
+            process.start()
+        turns = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+
+    return turns / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = [int(n) for n in args.workers.split(",")]
+
+    print(f"cores: {cores}")
+    print(f"{'workers':>8}{'turns/s':>12}{'speedup':>10}{'efficiency':>12}")
+
+    base = None
+    for count in counts:
+        rate = run(count, args.seconds)
+        base = base or rate / min(count, cores)
+        speedup = rate / base
+        efficiency = speedup / min(count, cores)
+        print(f"{count:>8}{rate:>12,.0f}{speedup:>10.2f}{efficiency:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Hit rate and false-hit rate of the paraphrase cache on a labelled set.
+
+Questions about one sample program are grouped by intent: questions in
+a group should share an answer, questions in different groups should
+not. For every question, the cache holds one other question from each
+group (its own group included, unless the group is a singleton) and
+the question is looked up against it:
+
+  hit        matched a question of its own group
+  false hit  matched a question of another group (a wrong answer served)
+  miss       nothing above the threshold (the LLM is called)
+
+Hit rate is over questions that had a paraphrase cached; false-hit rate
+is over all lookups. NEAR_MISSES are pairs that look alike but ask
+different things; any match among them is reported as a near-miss hit.
+
+Run from the project root:
+    python -m backend.benchmarks.eval_similarity [--thresholds 0.3,0.4,0.5]
+"""
+import argparse
+import time
+
+from backend.app.services.answer_service import ir_names, match_question
+
+IR = {
+    "program_info": {"program_id": "PAYROLL"},
+    "paragraphs": [
+        {"name": "MAIN-PARA"}, {"name": "CALC-PAY"},
+        {"name": "CALC-TAX"}, {"name": "WRITE-REPORT"},
+    ],
+    "variables": [
+        {"name": "WS-TOTAL"}, {"name": "WS-RATE"}, {"name": "WS-HOURS"},
+    ],
+}
+
+GROUPS = [
+    [
+        "What does this program do?",
+        "What is the purpose of this program?",
+        "Explain what the program does",
+        "Give me an overview of the program",
+        "summarize what this program does",
+    ],
+    [
+        "What files does it use?",
+        "Which files does the program use?",
+        "which files are used",
+        "What files are read or written?",
+        "list the files the program uses",
+    ],
+    [
+        "Where is the file opened?",
+        "Which paragraph opens the file?",
+        "where does it open the file",
+        "where are files opened",
+    ],
+    [
+        "Where is the file closed?",
+        "Which paragraph closes the file?",
+    ],
+    [
+        "Explain the IF logic",
+        "Explain the IF conditions",
+        "what do the IF statements do",
+        "explain the if logic please",
+    ],
+    [
+        "What does CALC-PAY do?",
+        "What does paragraph CALC-PAY do?",
+        "explain CALC-PAY",
+        "Explain paragraph CALC-PAY",
+    ],
+    [
+        "What does CALC-TAX do?",
+        "explain the CALC-TAX paragraph",
+        "What is CALC-TAX for?",
+    ],
+    [
+        "How is WS-TOTAL computed?",
+        "How is WS-TOTAL calculated?",
+        "how does WS-TOTAL get computed",
+    ],
+    [
+        "Where is WS-RATE used?",
+        "Which statements use WS-RATE?",
+        "where is WS-RATE referenced",
+    ],
+    [
+        "How is WS-RATE computed?",
+        "How is WS-RATE calculated?",
+    ],
+    [
+        "What are the variables?",
+        "List the variables",
+        "Which data items does it declare?",
+    ],
+    ["Does the program call other programs?"],
+    ["What happens when the program ends?"],
+    ["Is there any error handling?"],
+    ["What does WRITE-REPORT do?"],
+    ["How is WS-TOTAL displayed?"],
+    ["What is the value of WS-RATE?"],
+    ["Which files are written?"],
+    ["What is WS-HOURS used for?"],
+]
+
+# (question, cached question) pairs that must never match
+NEAR_MISSES = [
+    ("Why?", "What does it do?"),
+    ("Where is it?", "What does it do?"),
+    ("Where is it?", "Why?"),
+    ("What is the output file?", "What is the input file?"),
+    ("Does it delete the master file?", "Does it update the master file?"),
+    ("What happens if the file is missing?", "What happens if the file is empty?"),
+    ("Where is the file closed?", "Where is the file opened?"),
+    ("Which files are written?", "Which files are read?"),
+    ("What is the first record?", "What is the last record?"),
+    ("What happens when the read fails?", "What happens when the read succeeds?"),
+    ("Is WS-TOTAL not displayed?", "Is WS-TOTAL displayed?"),
+    ("What is the maximum WS-RATE?", "What is the minimum WS-RATE?"),
+]
+
+
+def lookups():
+    """
+    Yields (question, cached questions, index of own group's question
+    in cached or None).
+    """
+    for g, group in enumerate(GROUPS):
+        for q, question in enumerate(group):
+            cached = []
+            own = None
+            for h, other in enumerate(GROUPS):
+                if h == g:
+                    if len(group) > 1:
+                        own = len(cached)
+                        cached.append(group[(q + 1) % len(group)])
+                else:
+                    cached.append(other[0])
+            yield question, cached, own
+
+
+def evaluate(threshold: float, names: set) -> dict:
+    hits = false_hits = misses = answerable = total = 0
+    false_examples = []
+
+    for question, cached, own in lookups():
+        total += 1
+        answerable += own is not None
+        index, _ = match_question(question, cached, names, threshold)
+        if index is None:
+            misses += 1
+        elif index == own:
+            hits += 1
+        else:
+            false_hits += 1
+            false_examples.append((question, cached[index]))
+
+    near_miss_hits = []
+    for question, cached in NEAR_MISSES:
+        if match_question(question, [cached], names, threshold)[0] is not None:
+            near_miss_hits.append((question, cached))
+
+    return {
+        "threshold": threshold,
+        "hit_rate": hits / answerable,
+        "false_hit_rate": false_hits / total,
+        "misses": misses,
+        "false_examples": false_examples + near_miss_hits,
+        "near_miss_hits": len(near_miss_hits),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--thresholds", default="0.2,0.3,0.35,0.4,0.45,0.5,0.6,0.7")
+    parser.add_argument("--show-false", action="store_true")
+    args = parser.parse_args()
+
+    names = ir_names(IR)
+    questions = sum(len(group) for group in GROUPS)
+    print(f"{questions} questions in {len(GROUPS)} intents")
+    print(f"{'threshold':>9}  {'hit rate':>8}  {'false hits':>10}  {'misses':>6}  {'near misses hit':>15}")
+
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        result = evaluate(threshold, names)
+        print(
+            f"{threshold:>9.2f}  {result['hit_rate']:>8.1%}  "
+            f"{result['false_hit_rate']:>10.1%}  {result['misses']:>6}  "
+            f"{result['near_miss_hits']:>8}/{len(NEAR_MISSES)}"
+        )
+        if args.show_false:
+            for question, matched in result["false_examples"]:
+                print(f"{'':>11}{question!r} -> {matched!r}")
+
+    cached = [group[0] for group in GROUPS] * 11   # about 200 candidates
+    start = time.perf_counter()
+    for _ in range(50):
+        match_question("which paragraph opens the file", cached, names, 0.5)
+    per_lookup = (time.perf_counter() - start) / 50
+    print(f"\nlookup over {len(cached)} cached questions: {per_lookup * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
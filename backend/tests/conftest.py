@@ -0,0 +1,69 @@
+import time
+import types
+
+import pytest
+
+from backend.app.db import database
+from backend.app.db.ir_cache import ir_cache
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """
+    Points the app at a fresh SQLite file for the duration of a test.
+    """
+    path = str(tmp_path / "test_chat.db")
+    monkeypatch.setattr(database, "DB_NAME", path)
+    database.init_db()
+    ir_cache.clear()
+    yield path
+    database.close_connections()
+    ir_cache.clear()
+
+
+class FakeStream:
+    """
+    Streams text in chunks like the Groq SDK's stream=True response.
+    """
+
+    def __init__(self, text, first_delay=0.0, chunk_delay=0.0, chunks=4):
+        size = max(len(text) // chunks, 1)
+        self.parts = [text[i:i + size] for i in range(0, len(text), size)]
+        self.first_delay = first_delay
+        self.chunk_delay = chunk_delay
+        self.closed = False
+
+    def __iter__(self):
+        for index, part in enumerate(self.parts):
+            time.sleep(self.first_delay if index == 0 else self.chunk_delay)
+            yield types.SimpleNamespace(
+                model="fake-model",
+                choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=part))]
+            )
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    Replaces the Groq client. Append (text, first_delay, chunk_delay)
+    tuples to .replies; each completion request pops the next one.
+    """
+    from backend.app.llm import client
+
+    fake = types.SimpleNamespace(replies=[], requests=[], streams=[])
+
+    def create(**kwargs):
+        fake.requests.append(kwargs)
+        text, first_delay, chunk_delay = fake.replies.pop(0)
+        stream = FakeStream(text, first_delay, chunk_delay)
+        fake.streams.append(stream)
+        return stream
+
+    fake.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=create))
+    monkeypatch.setattr(client, "get_client", lambda: fake)
+    monkeypatch.setattr(client.settings, "LLM_HEDGE", False)
+    client._ttft_samples.clear()
+    return fake
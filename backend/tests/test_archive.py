@@ -0,0 +1,219 @@
+import asyncio
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from backend.app.config.settings import settings
+from backend.app.ingest.archive import IEBUPDTE, TAR, ZIP, aiter_archive, archive_format, iter_archive
+from backend.app.services import batch_service
+
+COBOL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. PAYROLL.
+       PROCEDURE DIVISION.
+           STOP RUN.
+"""
+
+JCL = """//PAYJOB   JOB (ACCT),'PAYROLL'
+//STEP1    EXEC PGM=PAYROLL
+"""
+
+
+class _Unseekable(io.RawIOBase):
+    # zipfile writes data descriptors when it cannot seek back
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+
+def _zip(compression=zipfile.ZIP_DEFLATED, seekable=True):
+    target = io.BytesIO() if seekable else _Unseekable()
+    with zipfile.ZipFile(target, "w", compression) as archive:
+        archive.writestr("src/", "")
+        archive.writestr("src/PAYROLL.cbl", COBOL)
+        archive.writestr("jcl/PAYJOB.jcl", JCL)
+    return bytes(target.getvalue() if seekable else target.data)
+
+
+def _tar(mode="w:gz"):
+    target = io.BytesIO()
+    with tarfile.open(fileobj=target, mode=mode) as archive:
+        for name, text in (("PAYROLL.cbl", COBOL), ("PAYJOB.jcl", JCL)):
+            data = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return target.getvalue()
+
+
+def _iebupdte(codepage=None):
+    lines = ["./ ADD NAME=PAYROLL,LIST=ALL"] + COBOL.splitlines()
+    lines += ["./ ADD NAME=PAYJOB"] + JCL.splitlines() + ["./ ENDUP"]
+    if codepage is None:
+        return ("\n".join(lines) + "\n").encode()
+    return b"".join(line.ljust(80).encode(codepage) for line in lines)
+
+
+def _members(data):
+    return [(m["name"], m.get("language")) for m in iter_archive(io.BytesIO(data))]
+
+
+def test_archive_format():
+    assert archive_format(_zip()) == ZIP
+    assert archive_format(_tar()) == TAR
+    assert archive_format(_tar("w")) == TAR
+    assert archive_format(_iebupdte()) == IEBUPDTE
+    assert archive_format(_iebupdte("cp037")) == IEBUPDTE
+    assert archive_format(b"hello") is None
+
+
+@pytest.mark.parametrize("data", [
+    _zip(),
+    _zip(zipfile.ZIP_STORED),
+    _zip(seekable=False),
+    _tar(),
+    _tar("w:bz2"),
+    _tar("w"),
+])
+def test_zip_and_tar_members(data):
+    members = [(name.rsplit("/", 1)[-1], language) for name, language in _members(data)]
+    assert members == [("PAYROLL.cbl", "cobol"), ("PAYJOB.jcl", "jcl")]
+
+
+def test_member_code_is_decoded():
+    members = list(iter_archive(io.BytesIO(_zip(seekable=False))))
+
+    assert members[0]["name"] == "src/PAYROLL.cbl"
+    assert members[0]["code"] == COBOL.rstrip("\n")
+    assert members[1]["code"] == JCL.rstrip("\n")
+
+
+@pytest.mark.parametrize("codepage", [None, "cp037"])
+def test_iebupdte_members(codepage):
+    members = list(iter_archive(io.BytesIO(_iebupdte(codepage))))
+
+    assert [(m["name"], m["language"]) for m in members] == [
+        ("PAYROLL", "cobol"), ("PAYJOB", "jcl")
+    ]
+    assert "PROGRAM-ID. PAYROLL." in members[0]["code"]
+    assert "./" not in members[1]["code"]
+
+
+def test_large_members_are_skipped_with_an_error(monkeypatch):
+    monkeypatch.setattr(settings, "MEMBER_MAX_BYTES", 60)
+
+    for data in (_zip(), _zip(zipfile.ZIP_STORED), _tar(), _iebupdte()):
+        members = list(iter_archive(io.BytesIO(data)))
+        by_name = {m["name"].rsplit("/", 1)[-1].split(".")[0]: m for m in members}
+        assert "error" in by_name["PAYROLL"]
+        assert by_name["PAYJOB"]["language"] == "jcl"
+
+
+def test_bad_archives():
+    with pytest.raises(ValueError):
+        list(iter_archive(io.BytesIO(b"IEBCOPY unload bytes")))
+
+    corrupt = bytearray(_zip(zipfile.ZIP_STORED))
+    corrupt[corrupt.index(b"PROGRAM-ID")] ^= 0x01
+    with pytest.raises(ValueError, match="CRC"):
+        list(iter_archive(io.BytesIO(bytes(corrupt))))
+
+    with pytest.raises(ValueError):
+        list(iter_archive(io.BytesIO(_tar()[:100])))
+
+
+def test_aiter_archive_reads_body_chunks():
+    data = _zip(seekable=False)
+
+    async def body():
+        for start in range(0, len(data), 7):
+            yield data[start:start + 7]
+
+    async def collect():
+        return [m["name"] async for m in aiter_archive(body())]
+
+    assert asyncio.run(collect()) == ["src/PAYROLL.cbl", "jcl/PAYJOB.jcl"]
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    async def run(code, language):
+        return {"explanation": "", "cached": False, "content_hash": None}
+
+    monkeypatch.setattr(batch_service, "run_cached_pipeline", run)
+    monkeypatch.setattr(batch_service, "save_analyses", lambda results: None)
+
+
+def test_analyze_members_pulls_async_sources_lazily(monkeypatch, fake_pipeline):
+    monkeypatch.setattr(settings, "BATCH_CONCURRENCY", 2)
+    pulled = []
+
+    async def source():
+        for i in range(5):
+            pulled.append(i)
+            yield {"name": f"M{i}", "code": JCL}
+
+    async def first_result():
+        results = batch_service.analyze_members(source())
+        first = await anext(results)
+        await results.aclose()
+        return first
+
+    assert asyncio.run(first_result())["status"] == "ok"
+    # Two in flight and at most two more pulled as they finished
+    assert len(pulled) <= 4
+
+
+def test_analyze_members_reports_source_failures(monkeypatch, fake_pipeline):
+    async def source():
+        yield {"name": "GOOD", "code": JCL}
+        yield {"name": "BIG", "error": "Member exceeds 1 bytes."}
+        raise ValueError("Truncated zip archive.")
+
+    async def collect():
+        return [r async for r in batch_service.analyze_members(source())]
+
+    results = {r["name"]: r for r in asyncio.run(collect())}
+    assert results["GOOD"]["status"] == "ok"
+    assert results["BIG"]["error"] == "Member exceeds 1 bytes."
+    assert results[None]["error"] == "Truncated zip archive."
+
+    monkeypatch.setattr(settings, "BATCH_MAX_MEMBERS", 1)
+    results = [r["name"] for r in asyncio.run(collect())]
+    assert results == ["GOOD", None]
+
+
+def test_analyze_members_cancels_in_flight_work_when_consumer_leaves(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_CONCURRENCY", 3)
+    monkeypatch.setattr(batch_service, "save_analyses", lambda results: None)
+    cancelled = []
+
+    async def run(code, language):
+        if "FAST" in code:
+            return {"explanation": "", "cached": False, "content_hash": None}
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(code)
+            raise
+
+    monkeypatch.setattr(batch_service, "run_cached_pipeline", run)
+    members = [{"name": "FAST", "code": JCL + "//* FAST"}] + [
+        {"name": f"SLOW{i}", "code": JCL + f"//* SLOW{i}"} for i in range(2)
+    ]
+
+    async def first_then_leave():
+        results = batch_service.analyze_members(members)
+        first = await anext(results)
+        await results.aclose()
+        # Checked before asyncio.run() cancels leftovers itself
+        return first["name"], len(cancelled)
+
+    assert asyncio.run(first_then_leave()) == ("FAST", 2)
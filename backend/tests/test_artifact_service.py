@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+from backend.app.db import database
+from backend.app.services.artifact_service import content_hash, load_artifact
+from backend.app.services.chat_service import save_analyses, load_ir
+
+
+def _result(session_id, key, explanation="Program displays HELLO.", cached=False):
+    return {
+        "session_id": session_id,
+        "language": "cobol",
+        "content_hash": key,
+        "cached": cached,
+        "intermediate_representation": {"program_info": {"program_id": "HELLO"}},
+        "analysis": {"total_statements": 1},
+        "explanation": explanation
+    }
+
+
+def test_content_hash_ignores_cosmetic_whitespace():
+    code = "       PROGRAM-ID. HELLO.\n       PROCEDURE DIVISION.\n"
+    variant = "\r\n       PROGRAM-ID. HELLO.   \r\n       PROCEDURE DIVISION.\r\n\r\n"
+
+    assert content_hash(code, "cobol") == content_hash(variant, "COBOL")
+
+
+def test_content_hash_depends_on_code_and_language():
+    code = "       PROGRAM-ID. HELLO.\n"
+
+    assert content_hash(code, "cobol") != content_hash(code, "jcl")
+    assert content_hash(code, "cobol") != content_hash(code + "       STOP RUN.", "cobol")
+
+
+def test_content_hash_changes_with_parser_output(monkeypatch):
+    from backend.app.config.settings import settings
+    from backend.app.services import artifact_service
+
+    code = "       PROGRAM-ID. HELLO.\n"
+    before = content_hash(code, "cobol")
+
+    monkeypatch.setattr(artifact_service, "IR_VERSION", artifact_service.IR_VERSION + 1)
+    assert content_hash(code, "cobol") != before
+
+    monkeypatch.undo()
+    monkeypatch.setattr(settings, "IR_LAYOUTS", not settings.IR_LAYOUTS)
+    assert content_hash(code, "cobol") != before
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_sessions_share_one_artifact():
+    save_analyses([_result("S1", "H1")])
+    save_analyses([_result("S2", "H1", cached=True)])
+
+    conn = database.get_connection()
+    artifacts = conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+    copies = conn.execute("SELECT COUNT(*) FROM ir_store").fetchone()[0]
+    conn.close()
+
+    assert artifacts == 1
+    assert copies == 0
+    assert load_ir("S1") == load_ir("S2") == {"program_info": {"program_id": "HELLO"}}
+    assert load_artifact("H1")["explanation"] == "Program displays HELLO."
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_cached_hit_restores_a_swept_artifact():
+    save_analyses([_result("S1", "H1")])
+    # The sweeper drops the artifact after the engine loaded it
+    with database.transaction() as cur:
+        cur.execute("DELETE FROM sessions")
+        cur.execute("DELETE FROM artifacts")
+
+    save_analyses([_result("S2", "H1", cached=True)])
+
+    assert load_artifact("H1")["explanation"] == "Program displays HELLO."
+    assert load_ir("S2") == {"program_info": {"program_id": "HELLO"}}
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_failed_explanation_is_not_shared():
+    save_analyses([_result("S1", "H1", explanation="ERROR: rate limited")])
+
+    assert load_artifact("H1") is None
+    assert load_ir("S1") == {"program_info": {"program_id": "HELLO"}}
+
+
+def test_init_db_migrates_legacy_sessions_table(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, language TEXT)")
+    conn.execute("INSERT INTO sessions VALUES ('OLD', 'cobol')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DB_NAME", path)
+    database.init_db()
+    database.init_db()  # idempotent
+
+    conn = sqlite3.connect(path)
+    row = conn.execute("SELECT session_id, content_hash FROM sessions").fetchone()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+
+    assert row == ("OLD", None)
+    assert version == len(database.MIGRATIONS)
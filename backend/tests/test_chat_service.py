@@ -0,0 +1,69 @@
+import pytest
+
+from backend.app.services.chat_service import (
+    save_message,
+    load_messages,
+    load_message_page,
+    load_summary,
+    save_summary
+)
+
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def test_load_messages_returns_session_messages_in_order():
+    save_message("S1", "user", "first")
+    save_message("S2", "user", "other session")
+    save_message("S1", "assistant", "second")
+
+    rows = load_messages("S1")
+
+    assert [(role, msg) for _, role, msg in rows] == [
+        ("user", "first"),
+        ("assistant", "second")
+    ]
+
+
+def test_load_messages_after_id_skips_older_messages():
+    save_message("S1", "user", "first")
+    save_message("S1", "assistant", "second")
+    first_id = load_messages("S1")[0][0]
+
+    rows = load_messages("S1", after_id=first_id)
+
+    assert [msg for _, _, msg in rows] == ["second"]
+
+
+def test_summary_defaults_to_empty():
+    assert load_summary("S1") == ("", 0)
+
+
+def test_summary_round_trip_and_replace():
+    save_summary("S1", "talked about MAIN-PARA", 4)
+    save_summary("S1", "talked about MAIN-PARA and CALC-PARA", 8)
+
+    assert load_summary("S1") == ("talked about MAIN-PARA and CALC-PARA", 8)
+
+
+def test_message_pages_follow_cursor():
+    for i in range(5):
+        save_message("S1", "user", f"m{i}")
+    save_message("S2", "user", "other session")
+
+    first, cursor = load_message_page("S1", limit=2)
+    second, cursor = load_message_page("S1", cursor=cursor, limit=2)
+    last, end = load_message_page("S1", cursor=cursor, limit=2)
+
+    assert [m["message"] for m in first + second + last] == [f"m{i}" for i in range(5)]
+    assert end is None
+    assert all(m["created_at"] for m in first)
+
+
+def test_message_page_exact_fit_has_no_next_cursor():
+    save_message("S1", "user", "only")
+
+    messages, cursor = load_message_page("S1", limit=1)
+
+    assert len(messages) == 1
+    assert cursor is None
@@ -0,0 +1,73 @@
+import ast
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.app.llm import client
+from backend.app.llm.explainer import explain
+
+
+def _imported_after(statement: str) -> set:
+    code = f"import sys; {statement}; print('\\n'.join(sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).resolve().parents[2],
+        env={"PATH": ""}
+    )
+    return set(out.stdout.split())
+
+
+def test_parser_modules_load_on_first_use():
+    modules = _imported_after("import backend.app.core.parser_factory")
+    assert "backend.app.parsers.regex_parser.cobol_regex_parser" not in modules
+    assert "backend.app.parsers.jcl_parser.parser" not in modules
+
+    modules = _imported_after(
+        "from backend.app.core.parser_factory import get_parser; get_parser('jcl')"
+    )
+    assert "backend.app.parsers.jcl_parser.parser" in modules
+    assert "backend.app.parsers.regex_parser.cobol_regex_parser" not in modules
+
+
+def _app_imports() -> str:
+    """
+    Imports the app, or without FastAPI every backend module it imports
+    at the top level.
+    """
+    if importlib.util.find_spec("fastapi") is not None:
+        return "import backend.app.main"
+
+    main = Path(__file__).resolve().parents[1] / "app" / "main.py"
+    modules = [
+        node.module for node in ast.parse(main.read_text()).body
+        if isinstance(node, ast.ImportFrom) and node.module.startswith("backend.")
+    ]
+    return "; ".join(f"import {module}" for module in modules)
+
+
+def test_app_import_defers_parsers():
+    modules = _imported_after(_app_imports())
+    assert "backend.app.parsers.regex_parser.cobol_regex_parser" not in modules
+    assert "backend.app.parsers.jcl_parser.parser" not in modules
+
+
+def test_explainer_imports_without_groq_or_key():
+    modules = _imported_after("import backend.app.llm.explainer")
+    assert "groq" not in modules
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_missing_key_surfaces_on_first_call(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.setattr(client, "_client", None)
+
+    explanation = explain({"steps": []}, "jcl")
+
+    assert explanation.startswith("ERROR:")
+    assert "GROQ_API_KEY" in explanation
@@ -0,0 +1,123 @@
+import multiprocessing
+import sqlite3
+import threading
+
+import pytest
+
+from backend.app.db import database
+from backend.app.db.database import transaction
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def test_connections_use_wal():
+    with transaction() as cur:
+        mode = cur.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_transaction_reuses_thread_connection():
+    with transaction() as first:
+        pass
+    with transaction() as second:
+        pass
+    assert first.connection is second.connection
+
+    other = []
+    thread = threading.Thread(
+        target=lambda: other.append(database._pooled_connection())
+    )
+    thread.start()
+    thread.join()
+    assert other[0] is not first.connection
+
+
+def test_transaction_rolls_back_on_error():
+    with pytest.raises(RuntimeError):
+        with transaction() as cur:
+            cur.execute("INSERT INTO sessions (session_id, language) VALUES ('S1', 'cobol')")
+            raise RuntimeError("boom")
+
+    with transaction() as cur:
+        count = cur.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    assert count == 0
+
+
+def test_repointing_db_name_opens_new_connection(tmp_path, monkeypatch):
+    with transaction() as before:
+        pass
+
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "other.db"))
+    with transaction() as after:
+        pass
+
+    assert before.connection is not after.connection
+
+
+def test_threads_reconnect_after_close_connections():
+    opened = threading.Event()
+    closed = threading.Event()
+    counts = []
+
+    def worker():
+        with transaction() as cur:
+            cur.execute("SELECT 1")
+        opened.set()
+        closed.wait(5)
+        with transaction() as cur:
+            counts.append(cur.execute("SELECT COUNT(*) FROM sessions").fetchone()[0])
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert opened.wait(5)
+    database.close_connections()
+    closed.set()
+    thread.join(5)
+
+    assert counts == [0]
+
+
+def test_chat_messages_migration_keeps_ids(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE chat_messages (session_id TEXT, role TEXT, message TEXT)")
+    conn.executemany(
+        "INSERT INTO chat_messages VALUES (?, ?, ?)",
+        [("S1", "user", "first"), ("S1", "assistant", "second")]
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DB_NAME", path)
+    database.init_db()
+
+    with transaction() as cur:
+        rows = cur.execute("SELECT id, message FROM chat_messages ORDER BY id").fetchall()
+        plan = cur.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM chat_messages WHERE session_id = 'S1' AND id > 0"
+        ).fetchall()
+
+    assert rows == [(1, "first"), (2, "second")]
+    assert "idx_chat_messages_session" in str(plan)
+
+
+def _init_worker(path):
+    database.DB_NAME = path
+    database.init_db()
+
+
+def test_concurrent_init_from_several_processes(tmp_path):
+    path = str(tmp_path / "fresh" / "chat.db")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_init_worker, args=(path,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    assert version == len(database.MIGRATIONS)
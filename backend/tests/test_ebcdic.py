@@ -0,0 +1,130 @@
+import pytest
+
+from backend.app.ingest.ebcdic import iter_lines, member_text, read_member, sniff
+from backend.app.parsers.jcl_parser.parser import JCLParser
+from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
+
+COBOL = [
+    "000100 IDENTIFICATION DIVISION.",
+    "000200 PROGRAM-ID. PAYROLL.",
+    "000300*A COMMENT",
+    "000400 DATA DIVISION.",
+    "000500 WORKING-STORAGE SECTION.",
+    "000600 01 WS-TOTAL PIC 9(5).",
+    "CHG001 PROCEDURE DIVISION.",
+    "000800 MAIN-PARA.",
+    "000900     MOVE 1 TO WS-TOTAL.",
+    "001000     STOP RUN.",
+]
+
+JCL = [
+    "//PAYJOB   JOB (ACCT),'PAYROLL',CLASS=A",
+    "//STEP1    EXEC PGM=PAYROLL",
+    "//INFILE   DD DSN=PAY.INPUT,DISP=SHR",
+]
+
+
+def _fixed(lines, codepage="cp037", lrecl=80, tag="PAY"):
+    # Sequence area (columns 73-80) filled like ISPF does
+    return b"".join(
+        (line.ljust(72) + f"{tag}{i:05d}").ljust(lrecl).encode(codepage)
+        for i, line in enumerate(lines, start=1)
+    )
+
+
+def _variable(lines, codepage="cp037"):
+    records = b""
+    for line in lines:
+        data = line.encode(codepage)
+        records += (len(data) + 4).to_bytes(2, "big") + b"\x00\x00" + data
+    return records
+
+
+def test_sniff():
+    assert sniff(_fixed(COBOL)) == ("cp037", "FB")
+    assert sniff(_fixed(COBOL, "latin-1")) == ("latin-1", "FB")
+    assert sniff("\n".join(COBOL).encode()) == ("utf-8", "TEXT")
+
+
+def test_fixed_records_strip_sequence_area():
+    lines = list(iter_lines(_fixed(JCL), "cp037"))
+
+    assert lines == JCL
+    assert list(iter_lines(_fixed(JCL), "cp037", strip_sequence=False))[0].endswith("PAY00001")
+
+
+def test_cobol_member_parses_one_line_per_record():
+    member = member_text(_fixed(COBOL, "cp1047"), codepage="cp1047")
+
+    assert member["language"] == "cobol"
+    assert member["lines"] == len(COBOL)
+    # Non-numeric sequence numbers are blanked too
+    assert member["code"].split("\n")[6] == "       PROCEDURE DIVISION."
+
+    ir = CobolRegexParser().parse(member["code"])
+    assert ir["program_info"]["program_id"] == "PAYROLL"
+    assert [p["name"] for p in ir["paragraphs"]] == ["MAIN-PARA"]
+    assert member["code"].split("\n")[7].strip() == "MAIN-PARA."
+
+
+def test_jcl_member_auto_detected():
+    member = member_text(_fixed(JCL))
+
+    assert member["codepage"] == "cp037" and member["recfm"] == "FB"
+    assert member["language"] == "jcl"
+    ir = JCLParser().parse(member["code"])
+    assert ir["job"]["name"] == "PAYJOB"
+    assert ir["steps"][0]["program"] == "PAYROLL"
+
+
+def test_variable_records():
+    member = member_text(_variable(JCL), codepage="cp037", recfm="VB")
+    assert member["code"].split("\n") == JCL
+
+    with pytest.raises(ValueError):
+        member_text(_variable(JCL)[:-3], codepage="cp037", recfm="VB")
+
+
+def test_text_members_pass_through():
+    member = member_text(("\r\n".join(COBOL) + "\r\n").encode())
+
+    assert member["recfm"] == "TEXT"
+    assert member["code"].split("\n") == COBOL
+
+
+def test_records_spanning_chunks(monkeypatch):
+    from backend.app.ingest import ebcdic
+    monkeypatch.setattr(ebcdic, "CHUNK_RECORDS", 3)
+
+    assert list(iter_lines(_fixed(COBOL, lrecl=100), "cp037", lrecl=100)) == COBOL
+
+
+def test_control_bytes_do_not_split_lines():
+    # EBCDIC NL (0x15) decodes to U+0085, which str.splitlines() breaks on
+    data = _fixed(["//A JOB X"]).replace(b"\x40", b"\x15", 1)
+    assert len(member_text(data, codepage="cp037")["code"].splitlines()) == 1
+
+
+def test_bad_options():
+    with pytest.raises(ValueError):
+        member_text(_fixed(JCL), codepage="no-such-codepage")
+    with pytest.raises(ValueError):
+        member_text(_fixed(JCL), codepage="cp037", recfm="U")
+    with pytest.raises(ValueError):
+        member_text(_fixed(JCL), codepage="utf-16")
+
+
+def test_read_member(tmp_path):
+    path = tmp_path / "PAYJOB"
+    path.write_bytes(_fixed(JCL))
+    assert read_member(str(path))["code"].split("\n") == JCL
+
+    empty = tmp_path / "EMPTY"
+    empty.write_bytes(b"")
+    assert read_member(str(empty))["code"] == ""
+
+
+def test_cp1047_codec():
+    assert "[^]".encode("cp1047") == b"\xad\x5f\xbd"
+    assert b"\xad\x5f\xbd".decode("IBM-1047") == "[^]"
+    assert "HELLO 123".encode("cp1047") == "HELLO 123".encode("cp037")
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from backend.app.core import engine
+from backend.app.core.deadline import RequestCancelled
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def test_follower_takes_over_when_leader_is_cancelled(monkeypatch):
+    runs = []
+
+    async def fake_pipeline(code, language, on_stage=None):
+        runs.append(code)
+        if len(runs) == 1:
+            await asyncio.sleep(0.05)
+            raise RequestCancelled("leader's client went away")
+        return {"language": language, "intermediate_representation": {}, "analysis": {}, "explanation": "ok"}
+
+    monkeypatch.setattr(engine, "run_pipeline", fake_pipeline)
+
+    async def scenario():
+        leader = asyncio.create_task(engine.run_cached_pipeline("PROGRAM", "cobol"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(engine.run_cached_pipeline("PROGRAM", "cobol"))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(scenario())
+
+    assert isinstance(leader, RequestCancelled)
+    assert follower["explanation"] == "ok"
+    assert len(runs) == 2
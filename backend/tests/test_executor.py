@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from backend.app.config.settings import settings
+from backend.app.core import executor
+from backend.app.core.executor import get_process_pool, run_cpu_bound
+from backend.app.core.parser_factory import parse_code
+
+SMALL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. SMALL.
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           DISPLAY 'HI'.
+           STOP RUN.
+"""
+
+
+def _large_program(paragraphs: int) -> str:
+    lines = [
+        "       IDENTIFICATION DIVISION.",
+        "       PROGRAM-ID. LARGE.",
+        "       DATA DIVISION.",
+        "       WORKING-STORAGE SECTION.",
+        "       01 WS-TOTAL PIC 9(7).",
+        "       PROCEDURE DIVISION.",
+    ]
+    for i in range(paragraphs):
+        lines += [
+            f"       PARA-{i}.",
+            f"           ADD {i} TO WS-TOTAL.",
+            f"           DISPLAY 'STEP {i}'.",
+        ]
+    return "\n".join(lines + ["           STOP RUN.", ""])
+
+
+@pytest.fixture
+def pool():
+    executor.shutdown_process_pool()
+    yield
+    executor.shutdown_process_pool()
+
+
+def test_pool_does_not_fork_the_app(pool):
+    assert get_process_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_pool_parse_matches_inline_and_does_not_block_small_parses(pool, monkeypatch):
+    monkeypatch.setattr(settings, "INLINE_PARSE_MAX_BYTES", 4096)
+    large = _large_program(200)
+    assert len(large) > settings.INLINE_PARSE_MAX_BYTES
+
+    async def scenario():
+        pooled = asyncio.create_task(run_cpu_bound(parse_code, large, "cobol", size=len(large)))
+        await asyncio.sleep(0)  # submitted to the pool
+
+        small = await run_cpu_bound(parse_code, SMALL, "cobol", size=len(SMALL))
+        waited_for_pool = pooled.done()
+        return small, waited_for_pool, await pooled
+
+    small, waited_for_pool, pooled = asyncio.run(scenario())
+
+    assert small["program_info"]["program_id"] == "SMALL"
+    assert not waited_for_pool
+    assert pooled == parse_code(large, "cobol")
@@ -0,0 +1,72 @@
+import pytest
+
+from backend.app.db.ir_cache import IRCache, ir_cache
+from backend.app.services.chat_service import save_analyses, save_ir, save_session, load_ir
+from backend.app.services.retention_service import sweep_expired
+
+IR = {"program_info": {"program_id": "HELLO"}}
+
+
+def test_lru_evicts_oldest_past_byte_budget():
+    cache = IRCache(max_bytes=100)
+    cache.put("A", {"a": 1}, 40, 0)
+    cache.put("B", {"b": 1}, 40, 0)
+    cache.get("A")                      # A is now most recent
+    cache.put("C", {"c": 1}, 40, 0)
+
+    assert cache.get("B") is None
+    assert cache.get("A") is not None
+    assert cache.size == 80
+
+
+def test_oversized_entry_is_not_cached():
+    cache = IRCache(max_bytes=10)
+    cache.put("A", IR, 11, 0)
+
+    assert cache.get("A") is None
+    assert cache.size == 0
+
+
+def test_replacing_entry_updates_size():
+    cache = IRCache(max_bytes=100)
+    cache.put("A", IR, 30, 0)
+    cache.put("A", IR, 50, 0)
+
+    assert cache.size == 50
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_save_writes_through_and_load_hits(monkeypatch):
+    save_ir("S1", IR)
+    assert ir_cache.get("S1")[0] is IR
+
+    # Served without touching the database
+    monkeypatch.setattr("backend.app.services.chat_service.transaction", None)
+    assert load_ir("S1") is IR
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_miss_fills_cache_from_database():
+    save_analyses([{
+        "session_id": "S1",
+        "language": "cobol",
+        "content_hash": "H1",
+        "intermediate_representation": IR,
+        "analysis": {},
+        "explanation": "Prints HELLO."
+    }])
+    ir_cache.clear()
+
+    assert load_ir("S1") == IR
+    assert ir_cache.get("S1")[0] == IR
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_sweep_invalidates_cached_sessions():
+    save_ir("S1", IR)
+    save_session("S1", "cobol")
+
+    sweep_expired(1, now=10 ** 12)
+
+    assert ir_cache.get("S1") is None
+    assert load_ir("S1") is None
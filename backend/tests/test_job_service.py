@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.app.core import job_queue
+from backend.app.core.job_queue import JobQueue
+from backend.app.db.database import transaction
+from backend.app.services.job_service import (
+    create_job,
+    update_job,
+    get_job,
+    claim_job,
+    touch_job,
+    requeue_unfinished_jobs,
+    QUEUED,
+    RUNNING,
+    DONE
+)
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def test_new_job_is_queued():
+    create_job("J1", "CODE", "cobol")
+
+    job = get_job("J1")
+    assert job["status"] == QUEUED
+    assert job["stage"] == "queued"
+    assert "code" not in job
+    assert get_job("J1", include_code=True)["code"] == "CODE"
+
+
+def test_claim_job_only_once():
+    create_job("J1", "CODE", "cobol")
+
+    assert claim_job("J1", "S1") is True
+    assert claim_job("J1", "S2") is False
+
+    job = get_job("J1")
+    assert job["status"] == RUNNING
+    assert job["session_id"] == "S1"
+
+
+def test_update_job_stores_result():
+    create_job("J1", "CODE", "cobol")
+    update_job("J1", stage="explained", status=DONE, result={"explanation": "ok"})
+
+    job = get_job("J1")
+    assert job["status"] == DONE
+    assert job["stage"] == "explained"
+    assert job["result"] == {"explanation": "ok"}
+
+
+def test_requeue_resets_only_stale_running_jobs():
+    create_job("J1", "CODE", "cobol")
+    create_job("J2", "CODE", "cobol")
+    create_job("J3", "CODE", "cobol")
+    claim_job("J1", "S1")
+    claim_job("J2", "S2")
+    update_job("J3", status=DONE)
+
+    # Only J1 looks abandoned
+    from backend.app.db.database import get_connection
+    conn = get_connection()
+    conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = 'J1'", (time.time() - 3600,))
+    conn.commit()
+    conn.close()
+
+    assert requeue_unfinished_jobs(stale_after=600) == ["J1"]
+    assert get_job("J2")["status"] == RUNNING
+
+
+def _age(job_id, seconds):
+    with transaction() as cur:
+        cur.execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = ?",
+            (time.time() - seconds, job_id)
+        )
+
+
+def test_heartbeat_keeps_only_the_current_claim_alive():
+    create_job("J1", "CODE", "cobol")
+    claim_job("J1", "S1")
+    _age("J1", 3600)
+
+    assert touch_job("J1", "S1") is True
+    assert requeue_unfinished_jobs(stale_after=600) == []
+
+    _age("J1", 3600)
+    assert requeue_unfinished_jobs(stale_after=600) == ["J1"]
+    assert touch_job("J1", "S1") is False
+
+
+def test_recover_picks_up_stale_and_stranded_jobs():
+    create_job("J1", "CODE", "cobol")
+    create_job("J2", "CODE", "cobol")
+    create_job("J3", "CODE", "cobol")
+    # J1 ran in a process that died; J2 sat in its in-memory queue
+    claim_job("J1", "S1")
+    _age("J1", 3600)
+    claim_job("J3", "S3")
+
+    async def recover_twice():
+        jobs = JobQueue(workers=1, stale_after=600)
+        first = await jobs.recover()
+        second = await jobs.recover()
+        return first, second, jobs.queue.qsize()
+
+    # Jobs already waiting in this process are not queued twice
+    assert asyncio.run(recover_twice()) == (2, 0, 2)
+    assert get_job("J1")["status"] == QUEUED
+    assert get_job("J3")["status"] == RUNNING
+
+
+def test_lapsed_runner_cannot_overwrite_the_new_claim(monkeypatch):
+    create_job("J1", "CODE", "cobol")
+
+    async def lapsing_pipeline(code, language, on_stage=None):
+        # While this runner works, its claim goes stale and another
+        # process claims and finishes the job
+        _age("J1", 3600)
+        requeue_unfinished_jobs(stale_after=600)
+        claim_job("J1", "S2")
+        update_job("J1", "S2", status=DONE, result={"explanation": "from S2"})
+        await on_stage("explained")
+        return {"language": language, "explanation": "from S1", "analysis": {}, "cached": False}
+
+    monkeypatch.setattr(job_queue, "run_cached_pipeline", lapsing_pipeline)
+    monkeypatch.setattr(job_queue, "save_analyses", lambda records: None)
+
+    asyncio.run(JobQueue(workers=1)._run("J1"))
+
+    job = get_job("J1")
+    assert job["status"] == DONE
+    assert job["session_id"] == "S2"
+    assert job["result"] == {"explanation": "from S2"}
+    assert update_job("J1", "S1", status=DONE) is False
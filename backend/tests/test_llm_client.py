@@ -0,0 +1,116 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from backend.app.core.deadline import deadline_context, DeadlineExceeded, RequestCancelled
+from backend.app.db.database import transaction
+from backend.app.llm import client
+from backend.app.llm.usage import usage_context
+from backend.app.services.usage_service import get_session_usage
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def _wait_for_calls(session_id, calls, timeout=3):
+    deadline = time.monotonic() + timeout
+    while get_session_usage(session_id)["totals"]["calls"] < calls and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+
+def test_streamed_chunks_are_joined(fake_llm):
+    fake_llm.replies.append(("MAIN-PARA moves A to B.", 0, 0))
+
+    assert client.call_llm("Explain") == "MAIN-PARA moves A to B."
+    assert fake_llm.requests[0]["stream"] is True
+    assert fake_llm.streams[0].closed
+
+
+def test_timeout_is_cut_to_remaining_deadline(fake_llm, monkeypatch):
+    monkeypatch.setattr(client.settings, "LLM_TIMEOUT_SECONDS", 60)
+    fake_llm.replies.append(("ok", 0, 0))
+
+    with deadline_context(5):
+        client.call_llm("Explain")
+
+    assert fake_llm.requests[0]["timeout"] <= 5
+
+
+def test_expired_deadline_skips_the_call(fake_llm):
+    with deadline_context(0):
+        with pytest.raises(DeadlineExceeded):
+            client.call_llm("Explain")
+
+    assert fake_llm.requests == []
+
+
+def test_cancel_stops_stream_between_chunks(fake_llm):
+    fake_llm.replies.append(("a long answer that streams slowly", 0, 0.05))
+    errors = []
+
+    with deadline_context(30) as deadline:
+        def run():
+            try:
+                client.call_llm("Explain")
+            except RequestCancelled as e:
+                errors.append(e)
+
+        # As asyncio.to_thread does, so the thread sees the deadline
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(run,))
+        thread.start()
+        time.sleep(0.02)
+        deadline.cancel()
+        thread.join(2)
+
+    assert errors
+    assert fake_llm.streams[0].closed
+
+
+def test_hedge_sent_when_first_token_is_late(fake_llm, monkeypatch):
+    monkeypatch.setattr(client.settings, "LLM_HEDGE", True)
+    monkeypatch.setattr(client.settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    client._ttft_samples.extend([0.01] * 20)
+
+    fake_llm.replies.append(("slow primary", 1.0, 0))
+    fake_llm.replies.append(("fast hedge", 0, 0))
+
+    start = time.perf_counter()
+    with usage_context("S1"):
+        assert client.call_llm("Explain") == "fast hedge"
+    assert time.perf_counter() - start < 0.5
+    assert len(fake_llm.requests) == 2
+
+    # Let the loser record its usage while the test database still exists
+    _wait_for_calls("S1", 2)
+
+
+def test_cancelled_hedge_is_billed(fake_llm, monkeypatch):
+    monkeypatch.setattr(client.settings, "LLM_HEDGE", True)
+    monkeypatch.setattr(client.settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    client._ttft_samples.extend([0.01] * 20)
+
+    fake_llm.replies.append(("slow primary", 0.2, 0))
+    fake_llm.replies.append(("fast hedge", 0, 0))
+    prompt = "Explain MAIN-PARA"
+
+    with usage_context("S1"):
+        assert client.call_llm(prompt, template="explain") == "fast hedge"
+
+    # The loser records its usage once it notices it was cancelled
+    _wait_for_calls("S1", 2)
+
+    with transaction() as cur:
+        cur.execute("SELECT status, prompt_tokens FROM llm_usage WHERE session_id = 'S1' ORDER BY status")
+        rows = cur.fetchall()
+    # The fake reports no usage, so the loser's prompt is estimated
+    assert rows == [("hedged", 5), ("ok", 0)]
+
+
+def test_no_hedge_before_enough_samples(fake_llm, monkeypatch):
+    monkeypatch.setattr(client.settings, "LLM_HEDGE", True)
+    fake_llm.replies.append(("only answer", 0.05, 0))
+
+    assert client.call_llm("Explain") == "only answer"
+    assert len(fake_llm.requests) == 1
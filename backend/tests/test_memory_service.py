@@ -0,0 +1,105 @@
+import pytest
+
+from backend.app.config.settings import settings
+from backend.app.core.deadline import RequestAborted
+from backend.app.services import memory_service
+from backend.app.services.chat_service import load_summary, save_message
+from backend.app.services.memory_service import build_chat_context
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+@pytest.fixture
+def fake_summaries(monkeypatch):
+    calls = []
+
+    def summarize(summary, turns):
+        calls.append((summary, turns))
+        return f"{summary} +{len(turns)}".strip()
+
+    monkeypatch.setattr(memory_service, "summarize_conversation", summarize)
+    monkeypatch.setattr(settings, "CHAT_HISTORY_MESSAGES", 2)
+    monkeypatch.setattr(settings, "CHAT_SUMMARY_BATCH", 3)
+    return calls
+
+
+def _chat(session_id, count, start=1):
+    for number in range(start, start + count):
+        save_message(session_id, "user" if number % 2 else "assistant", f"message {number}")
+
+
+def test_short_conversations_are_not_summarized(fake_summaries):
+    # Two over the window, one short of a batch
+    _chat("S1", 4)
+
+    context = build_chat_context("S1")
+
+    assert fake_summaries == []
+    assert context["summary"] == ""
+    assert [m for _, m in context["recent"]] == ["message 1", "message 2", "message 3", "message 4"]
+
+
+def test_overflow_is_folded_a_batch_at_a_time(fake_summaries):
+    _chat("S1", 5)
+
+    context = build_chat_context("S1")
+
+    assert len(fake_summaries) == 1
+    assert [m for _, m in fake_summaries[0][1]] == ["message 1", "message 2", "message 3"]
+    assert context == {
+        "summary": "+3",
+        "recent": [("assistant", "message 4"), ("user", "message 5")],
+    }
+
+    # The summary now covers up to message 3; later turns only read
+    # the messages after it
+    summary, last_id = load_summary("S1")
+    assert summary == "+3" and last_id > 0
+
+    _chat("S1", 2, start=6)
+    assert build_chat_context("S1")["summary"] == "+3"
+    assert len(fake_summaries) == 1
+
+    _chat("S1", 1, start=8)
+    context = build_chat_context("S1")
+    assert fake_summaries[1][0] == "+3"
+    assert [m for _, m in fake_summaries[1][1]] == ["message 4", "message 5", "message 6"]
+    assert context["summary"] == "+3 +3"
+    assert [m for _, m in context["recent"]] == ["message 7", "message 8"]
+    assert load_summary("S1")[1] > last_id
+
+
+def test_summarizer_failure_falls_back_to_a_digest(fake_summaries, monkeypatch):
+    def broken(summary, turns):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(memory_service, "summarize_conversation", broken)
+    _chat("S1", 5)
+
+    context = build_chat_context("S1")
+
+    assert context["summary"] == "user: message 1\nassistant: message 2\nuser: message 3"
+    assert [m for _, m in context["recent"]] == ["message 4", "message 5"]
+    # The window still advanced
+    assert load_summary("S1")[1] > 0
+
+
+def test_aborted_requests_do_not_compact(fake_summaries, monkeypatch):
+    def aborted(summary, turns):
+        raise RequestAborted("client went away")
+
+    monkeypatch.setattr(memory_service, "summarize_conversation", aborted)
+    _chat("S1", 5)
+
+    with pytest.raises(RequestAborted):
+        build_chat_context("S1")
+    assert load_summary("S1") == ("", 0)
+
+
+def test_zero_window_summarizes_everything(fake_summaries, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_HISTORY_MESSAGES", 0)
+    _chat("S1", 3)
+
+    context = build_chat_context("S1")
+
+    assert context == {"summary": "+3", "recent": []}
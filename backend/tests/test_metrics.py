@@ -0,0 +1,53 @@
+import pytest
+
+from backend.app.core.metrics import Registry, timed, STAGE_SECONDS, STAGE_ERRORS
+
+
+def test_counter_renders_with_labels():
+    registry = Registry()
+    errors = registry.counter("errors_total", "Errors.", ["stage"])
+
+    errors.inc(stage="parse")
+    errors.inc(2, stage="parse")
+
+    text = registry.render()
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{stage="parse"} 3' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+
+    latency.observe(0.05, stage="llm")
+    latency.observe(0.5, stage="llm")
+    latency.observe(5.0, stage="llm")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="llm",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="llm"} 3' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter("odd_total", "Odd labels.", ["name"])
+    counter.inc(name='say "hi"\n')
+
+    assert 'odd_total{name="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_timed_records_latency_and_errors():
+    before = STAGE_SECONDS.count(stage="test_stage")
+    errors = STAGE_ERRORS.value(stage="test_stage")
+
+    with timed("test_stage"):
+        pass
+
+    with pytest.raises(ValueError):
+        with timed("test_stage"):
+            raise ValueError("boom")
+
+    assert STAGE_SECONDS.count(stage="test_stage") == before + 2
+    assert STAGE_ERRORS.value(stage="test_stage") == errors + 1
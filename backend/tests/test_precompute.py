@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from backend.app.core import precompute
+from backend.app.core.precompute import Precomputer
+from backend.app.db.database import transaction
+from backend.app.services.answer_service import (
+    load_precomputed_answer,
+    normalize_question,
+    save_answer,
+    speculative_questions
+)
+from backend.app.services.chat_service import save_analyses
+from backend.app.services.retention_service import sweep_expired
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+IR = {
+    "program_info": {"program_id": "PAYROLL"},
+    "paragraphs": [{"id": "P1", "name": "MAIN-PARA", "line": 5}],
+}
+
+
+@pytest.fixture
+def fake_answers(monkeypatch):
+    asked = []
+
+    def answer(ir, user_query, language="cobol", history=None):
+        asked.append(user_query)
+        return f"Answer to {user_query}"
+
+    monkeypatch.setattr(precompute, "explain_with_query", answer)
+    return asked
+
+
+def _analyze(session_id, content_hash="H1"):
+    save_analyses([{
+        "session_id": session_id,
+        "language": "cobol",
+        "content_hash": content_hash,
+        "intermediate_representation": IR,
+        "analysis": {},
+        "explanation": "Pays people."
+    }])
+
+
+def test_normalize_question():
+    assert normalize_question("What does paragraph MAIN-PARA do?") == "what does main-para do"
+    assert normalize_question("  what does the MAIN-PARA do ") == "what does main-para do"
+    assert normalize_question("What files does it use?") == normalize_question("what files does it use")
+
+
+def test_speculative_questions_cover_paragraphs():
+    questions = speculative_questions(IR, "cobol")
+
+    assert "What files does it use?" in questions
+    assert "What does paragraph MAIN-PARA do?" in questions
+
+
+def test_precomputed_answers_are_shared_by_content_hash(fake_answers):
+    _analyze("S1")
+    _analyze("S2")
+
+    stored = Precomputer().precompute("H1", IR, "cobol", "S1")
+
+    assert stored == len(fake_answers) == len(speculative_questions(IR, "cobol"))
+    assert load_precomputed_answer("S2", "what does MAIN-PARA do") == (
+        "Answer to What does paragraph MAIN-PARA do?"
+    )
+    assert load_precomputed_answer("S2", "Why is the sky blue?") is None
+
+    # Already answered: nothing is asked twice
+    assert Precomputer().precompute("H1", IR, "cobol", "S2") == 0
+    assert len(fake_answers) == stored
+
+
+def test_failed_answers_are_not_stored(monkeypatch):
+    _analyze("S1")
+    monkeypatch.setattr(
+        precompute, "explain_with_query",
+        lambda ir, user_query, language="cobol", history=None: "ERROR: rate limited"
+    )
+
+    assert Precomputer().precompute("H1", IR, "cobol") == 0
+    assert load_precomputed_answer("S1", "What files does it use?") is None
+
+
+def test_background_thread_precomputes(fake_answers):
+    _analyze("S1")
+    worker = Precomputer()
+    worker.enabled = True
+    worker.start()
+    try:
+        assert worker.submit("H1", IR, "cobol", "S1")
+
+        deadline = time.time() + 5
+        while load_precomputed_answer("S1", "What files does it use?") is None:
+            assert time.time() < deadline
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+
+
+def test_stop_returns_with_a_full_queue(monkeypatch):
+    started = threading.Event()
+    worker = Precomputer(max_pending=2)
+
+    def busy(content_hash, ir, language, session_id=None):
+        # Like an LLM call that ends once stop() cancels it
+        started.set()
+        worker._stopping.wait(5)
+
+    worker.enabled = True
+    monkeypatch.setattr(worker, "precompute", busy)
+    worker.start()
+
+    assert worker.submit("H1", IR, "cobol")
+    assert started.wait(5)
+    assert worker.submit("H2", IR, "cobol") and worker.submit("H3", IR, "cobol")
+    assert not worker.submit("H4", IR, "cobol")
+
+    stopper = threading.Thread(target=worker.stop, daemon=True)
+    stopper.start()
+    stopper.join(2)
+    assert not stopper.is_alive(), "stop() blocked on the full queue"
+
+
+def test_disabled_precomputer_ignores_submissions():
+    worker = Precomputer()
+    worker.enabled = False
+    worker.start()
+
+    assert not worker.submit("H1", IR, "cobol")
+
+
+def test_sweep_drops_answers_of_deleted_artifacts():
+    save_answer("GONE", "What files does it use?", "None.")
+    with transaction() as cur:
+        cur.execute("UPDATE precomputed_answers SET created_at = created_at - 10")
+
+    deleted = sweep_expired(1)
+
+    assert deleted["precomputed_answers"] == 1
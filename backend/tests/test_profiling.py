@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from backend.app.config.settings import settings
+from backend.app.core.parser_factory import parse_code
+from backend.app.core.profiling import (
+    requested_mode,
+    profile_call,
+    save_profile,
+    list_profiles,
+    load_profile,
+    SAMPLE,
+    CPROFILE
+)
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path / "profiles"))
+    return tmp_path / "profiles"
+
+
+def _busy_parse():
+    code = "       PROCEDURE DIVISION.\n" + "           DISPLAY 'X'.\n" * 2000
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        parse_code(code, "cobol")
+    return "done"
+
+
+def test_requested_mode(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+
+    assert requested_mode(None) is None
+    assert requested_mode("1", trusted=True) == SAMPLE
+    assert requested_mode("cprofile", trusted=True) == CPROFILE
+
+    # Anyone else cannot force an expensive, uncached profiled run
+    assert requested_mode("1") is None
+    assert requested_mode("cprofile", trusted=False) is None
+
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    assert requested_mode(None) == SAMPLE
+
+
+def test_sampled_profile_contains_parser_frames():
+    result, collapsed = profile_call(SAMPLE, _busy_parse)
+
+    assert result == "done"
+    assert "cobol_regex_parser:parse" in collapsed
+    stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+def test_cprofile_profile_is_pstats_text():
+    result, text = profile_call(CPROFILE, _busy_parse)
+
+    assert result == "done"
+    assert "_normalize_code" in text
+
+
+def test_profiles_round_trip_and_prune(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 2)
+
+    ids = [save_profile(SAMPLE, f"a;b {i}\n", {"language": "cobol"}) for i in range(3)]
+
+    listed = [meta["profile_id"] for meta in list_profiles()]
+    assert len(listed) == 2
+    assert load_profile(ids[-1]) == (SAMPLE, "a;b 2\n")
+    assert load_profile("../../etc/passwd") is None
@@ -0,0 +1,226 @@
+from decimal import Decimal
+
+import pytest
+
+from backend.app.ingest.records import RecordDecoder, decode_file, flatten
+from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
+from backend.app.parsers.regex_parser.record_layout import analyze_picture, storage_size
+from backend.app.services.record_service import decode_records, find_record, jsonable
+
+SOURCE = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. CUSTRPT.
+       DATA DIVISION.
+       FILE SECTION.
+       FD  CUST-FILE
+           RECORDING MODE IS F
+           RECORD CONTAINS 60 CHARACTERS.
+       01  CUST-REC.
+           05  CUST-ID          PIC X(6).
+           05  CUST-NAME        PIC X(20).
+           05  CUST-BAL         PIC S9(7)V99 COMP-3.
+           05  CUST-COUNT       PIC S9(4) COMP.
+           05  CUST-DATE.
+               10 CUST-YY       PIC 99.
+               10 CUST-MM       PIC 99.
+               10 CUST-DD       PIC 99.
+           05  CUST-DATE-N REDEFINES CUST-DATE PIC 9(6).
+           05  CUST-HIST OCCURS 3 TIMES.
+               10 HIST-AMT      PIC S9(5) USAGE IS PACKED-DECIMAL.
+               10 HIST-CODE     PIC X.
+           05  CUST-STATUS      PIC X.
+               88 ACTIVE        VALUE 'A'.
+           05  CUST-RATE        COMP-1.
+           05  FILLER           PIC X(2).
+       WORKING-STORAGE SECTION.
+       01  WS-AMOUNTS.
+           05  WS-TRAIL         PIC S9(3)V9.
+           05  WS-LEAD          PIC S99 SIGN LEADING SEPARATE.
+       77  WS-COUNT             PIC 9(4) COMP VALUE 0.
+       PROCEDURE DIVISION.
+           STOP RUN.
+"""
+
+
+def _layouts():
+    return CobolRegexParser(build_scopes=False, build_layouts=True).parse(SOURCE)["layouts"]
+
+
+def _record(name):
+    return next(r for r in _layouts()["records"] if r["name"] == name)
+
+
+def _cust_rec(customer, name, balance_hex, count, date, status):
+    body = (
+        customer.encode("cp037")
+        + name.ljust(20).encode("cp037")
+        + bytes.fromhex(balance_hex)
+        + count.to_bytes(2, "big", signed=True)
+        + date.encode("cp037")
+        + (bytes.fromhex("12345c") + b"\xc1") * 3
+        + status.encode("cp037")
+        + bytes.fromhex("40800000")     # 0.5 in IBM hexadecimal floating point
+        + b"\x40\x40"
+    )
+    return body.ljust(60, b"\x40")
+
+
+def test_picture_analysis_and_sizes():
+    assert analyze_picture("S9(7)V99") == {
+        "category": "numeric", "length": 9, "digits": 9, "scale": 2, "signed": True
+    }
+    assert analyze_picture("X(20)")["category"] == "alphanumeric"
+    assert analyze_picture("-ZZ9.99")["category"] == "numeric-edited"
+
+    assert storage_size("PACKED", analyze_picture("S9(7)V99")) == 5
+    assert storage_size("BINARY", analyze_picture("S9(4)")) == 2
+    assert storage_size("BINARY", analyze_picture("9(9)")) == 4
+    assert storage_size("COMP-2", None) == 8
+    assert storage_size("DISPLAY", analyze_picture("S99"), sign_separate=True) == 3
+
+
+def test_layout_offsets():
+    layouts = _layouts()
+    record = _record("CUST-REC")
+    fields = {child["name"]: child for child in record["children"]}
+
+    assert record["size"] == 58
+    assert fields["CUST-BAL"]["offset"] == 26
+    assert fields["CUST-BAL"]["size"] == 5
+    assert fields["CUST-COUNT"]["offset"] == 31
+    assert fields["CUST-DATE-N"]["offset"] == fields["CUST-DATE"]["offset"] == 33
+    assert fields["CUST-HIST"]["offset"] == 39
+    assert fields["CUST-HIST"]["size"] == 4 and fields["CUST-HIST"]["occurs"] == 3
+    assert fields["CUST-STATUS"]["offset"] == 51
+    assert fields["CUST-STATUS"]["conditions"][0]["name"] == "ACTIVE"
+    assert fields["CUST-RATE"]["category"] == "float"
+
+    assert layouts["files"] == [{
+        "name": "CUST-FILE", "type": "FD", "line": 5, "record_contains": 60,
+        "recording_mode": "F", "records": ["CUST-REC"], "record_length": 58,
+    }]
+    assert any("RECORD CONTAINS 60" in warning for warning in layouts["warnings"])
+    assert _record("WS-AMOUNTS")["size"] == 7
+    assert _record("WS-COUNT")["size"] == 2
+
+
+def test_flatten_expands_occurs_and_skips_redefines_and_filler():
+    names = [field["name"] for field in flatten(_record("CUST-REC"))]
+
+    assert names[:4] == ["CUST-ID", "CUST-NAME", "CUST-BAL", "CUST-COUNT"]
+    assert "HIST-AMT(3)" in names and "HIST-CODE(2)" in names
+    assert "CUST-DATE-N" not in names and "FILLER" not in names
+
+    with_redefines = [f["name"] for f in flatten(_record("CUST-REC"), include_redefines=True)]
+    assert "CUST-DATE-N" in with_redefines
+
+
+def test_decode_ebcdic_records():
+    data = (
+        _cust_rec("C00001", "SMITH", "123456789d", -2, "240131", "A")
+        + _cust_rec("C00002", "JONES", "000001000c", 7, "991231", "C")
+    )
+    decoder = RecordDecoder(_record("CUST-REC"), "cp037", record_length=60, engine="struct")
+    result = decoder.decode(data)
+    columns = result["columns"]
+
+    assert result["rows"] == 2 and result["trailing_bytes"] == 0
+    assert columns["CUST-ID"] == ["C00001", "C00002"]
+    assert columns["CUST-NAME"] == ["SMITH", "JONES"]
+    assert columns["CUST-BAL"] == [Decimal("-1234567.89"), Decimal("10.00")]
+    assert columns["CUST-COUNT"] == [-2, 7]
+    assert columns["CUST-YY"] == [24, 99]
+    assert columns["HIST-AMT(2)"] == [12345, 12345]
+    assert columns["HIST-CODE(3)"] == ["A", "A"]
+    assert columns["CUST-RATE"] == [0.5, 0.5]
+    assert result["invalid"] == {}
+
+
+def test_decode_zoned_signs():
+    record = _record("WS-AMOUNTS")
+
+    # Trailing overpunch: D zone on the last digit; leading separate "-"
+    ebcdic = bytes.fromhex("f0f1f2d3") + bytes.fromhex("60f0f5")
+    columns = RecordDecoder(record, "cp037", engine="struct").decode(ebcdic)["columns"]
+    assert columns == {"WS-TRAIL": [Decimal("-12.3")], "WS-LEAD": [-5]}
+
+    # ASCII: negative zone is 7 ("p" to "y")
+    ascii_data = b"012s" + b"+05"
+    columns = RecordDecoder(record, "latin-1", engine="struct").decode(ascii_data)["columns"]
+    assert columns == {"WS-TRAIL": [Decimal("-12.3")], "WS-LEAD": [5]}
+
+
+def test_invalid_values_become_none():
+    bad = _cust_rec("C00003", "BAD", "12345678ff", 0, "2401AB", "A")
+    result = RecordDecoder(_record("CUST-REC"), record_length=60, engine="struct").decode(bad)
+
+    assert result["columns"]["CUST-BAL"] == [None]
+    assert result["columns"]["CUST-DD"] == [None]
+    assert result["invalid"] == {"CUST-BAL": 1, "CUST-DD": 1}
+
+
+def test_overlapping_fields_are_sliced():
+    data = _cust_rec("C00001", "SMITH", "123456789d", -2, "240131", "A")
+    decoder = RecordDecoder(
+        _record("CUST-REC"), record_length=60, include_redefines=True, engine="struct"
+    )
+    columns = decoder.decode(data)["columns"]
+
+    assert columns["CUST-DATE-N"] == [240131]
+    assert columns["CUST-MM"] == [1]
+
+
+def test_decode_file_with_offset_and_limit(tmp_path):
+    path = tmp_path / "cust.dat"
+    records = [
+        _cust_rec(f"C{i:05d}", "NAME", "000000100c", i, "240101", "A") for i in range(5)
+    ]
+    path.write_bytes(b"".join(records) + b"\x40" * 7)
+
+    result = decode_file(
+        str(path), _record("CUST-REC"), 1, 2, record_length=60, engine="struct"
+    )
+
+    assert result["start"] == 1 and result["rows"] == 2
+    assert result["total_records"] == 5 and result["trailing_bytes"] == 7
+    assert result["columns"]["CUST-COUNT"] == [1, 2]
+
+
+def test_decode_records_by_file_name(tmp_path):
+    path = tmp_path / "cust.dat"
+    path.write_bytes(_cust_rec("C00001", "SMITH", "123456789d", -2, "240131", "A"))
+    layouts = _layouts()
+
+    record, length = find_record(layouts, "cust-file")
+    assert record["name"] == "CUST-REC" and length == 58
+    assert find_record(layouts, "NOPE") is None
+
+    # The FD length is 58 (what the records lay out to), so the 60-byte
+    # test record reads as one record and 2 trailing bytes
+    result = decode_records(str(path), layouts, "CUST-REC")
+    assert result["record"] == "CUST-REC"
+    assert result["columns"]["CUST-BAL"] == ["-1234567.89"]
+    assert result["trailing_bytes"] == 2
+
+
+def test_decoder_rejects_bad_options():
+    with pytest.raises(ValueError):
+        RecordDecoder(_record("CUST-REC"), "no-such-codepage")
+    with pytest.raises(ValueError):
+        RecordDecoder(_record("CUST-REC"), record_length=40)
+    with pytest.raises(ValueError):
+        RecordDecoder(_record("CUST-REC"), engine="fortran")
+
+
+def test_decoder_defaults_to_exact_struct_engine():
+    assert RecordDecoder(_record("CUST-REC")).engine == "struct"
+
+
+def test_jsonable():
+    assert jsonable([Decimal("10.00"), Decimal("-1.5"), float("nan"), "A"]) == ["10.00", "-1.5", None, "A"]
+    # A float would round this to 1234567890123456.8
+    assert jsonable([Decimal("1234567890123456.78")]) == ["1234567890123456.78"]
+
+
+def test_parser_includes_layouts_unless_disabled():
+    assert "layouts" in CobolRegexParser(build_layouts=True).parse(SOURCE)
+    assert "layouts" not in CobolRegexParser(build_layouts=False).parse(SOURCE)
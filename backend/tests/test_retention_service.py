@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from backend.app.db.database import transaction
+from backend.app.db.ir_cache import ir_cache
+from backend.app.services import chat_service
+from backend.app.services.chat_service import save_analyses, save_message, load_ir
+from backend.app.services.retention_service import sweep_expired, storage_stats, reclaim_space
+from backend.app.services.usage_service import get_session_usage, record_usage
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+DAY = 24 * 3600
+
+
+def _result(session_id, content_hash, explanation="Prints HELLO."):
+    return {
+        "session_id": session_id,
+        "language": "cobol",
+        "content_hash": content_hash,
+        "intermediate_representation": {"program_info": {"program_id": session_id}},
+        "analysis": {},
+        "explanation": explanation
+    }
+
+
+def _age(session_id, seconds):
+    with transaction() as cur:
+        cur.execute(
+            "UPDATE sessions SET last_access = last_access - ? WHERE session_id = ?",
+            (seconds, session_id)
+        )
+        cur.execute("UPDATE artifacts SET created_at = created_at - ?", (seconds,))
+
+    # Aged behind the cache's back, so drop what it remembers
+    ir_cache.clear()
+
+
+def test_load_ir_enforces_ttl(monkeypatch):
+    monkeypatch.setattr(chat_service.settings, "SESSION_TTL_SECONDS", DAY)
+    save_analyses([_result("S1", "H1")])
+
+    assert load_ir("S1") is not None
+
+    _age("S1", 2 * DAY)
+    assert load_ir("S1") is None
+
+
+def test_load_ir_touches_last_access(monkeypatch):
+    monkeypatch.setattr(chat_service.settings, "SESSION_TTL_SECONDS", DAY)
+    save_analyses([_result("S1", "H1")])
+    _age("S1", DAY - 10)
+
+    load_ir("S1")
+
+    with transaction() as cur:
+        last_access = cur.execute("SELECT last_access FROM sessions").fetchone()[0]
+    assert last_access > time.time() - 60
+
+
+def test_sweep_deletes_expired_sessions_in_batches():
+    save_analyses([_result(f"OLD{i}", "H1") for i in range(5)])
+    save_analyses([_result("PRIVATE", None, explanation="ERROR: rate limited")])
+    save_analyses([_result("NEW", "H2")])
+    save_message("OLD0", "user", "hello")
+    record_usage("OLD0", "_explain_cobol", "m", 10, 5, 15, 100.0, 40)
+    for session_id in [f"OLD{i}" for i in range(5)] + ["PRIVATE"]:
+        _age(session_id, 2 * DAY)
+
+    deleted = sweep_expired(DAY, batch_size=2)
+
+    assert deleted["sessions"] == 6
+    assert deleted["chat_messages"] == 1
+    assert deleted["ir_store"] == 1
+    assert deleted["artifacts"] == 1  # H1 lost its sessions, H2 is still used
+    assert load_ir("NEW") is not None
+    # Spend outlives the session
+    assert deleted["llm_usage"] == 0
+    assert get_session_usage("OLD0")["totals"]["total_tokens"] == 15
+
+    stats = storage_stats()
+    assert stats["tables"]["sessions"]["rows"] == 1
+    assert stats["evicted"]["sessions"] >= 6
+
+
+def test_sweep_disabled_without_ttl():
+    save_analyses([_result("S1", "H1")])
+    _age("S1", 365 * DAY)
+
+    assert not any(sweep_expired(0).values())
+
+
+def test_reclaim_space_shrinks_free_list():
+    with transaction() as cur:
+        cur.executemany(
+            "INSERT INTO chat_messages (session_id, role, message) VALUES (?, ?, ?)",
+            [("S1", "user", "x" * 4000) for _ in range(200)]
+        )
+    with transaction() as cur:
+        cur.execute("DELETE FROM chat_messages")
+
+    assert storage_stats()["free_pages"] > 0
+    assert reclaim_space(max_pages=10_000) > 0
+    assert storage_stats()["free_pages"] == 0
@@ -0,0 +1,138 @@
+import pytest
+
+from backend.app.core.ir_schema.scopes import ScopeIndex, focus_ir, max_depth, slice_ir
+from backend.app.llm import explainer
+from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
+
+SOURCE = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. PAYROLL.
+       DATA DIVISION.
+       WORKING-STORAGE SECTION.
+       01 WS-TOTAL PIC 9(5).
+       01 WS-CODE PIC 9.
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           IF WS-TOTAL > 100
+               DISPLAY 'BIG'
+               IF WS-CODE = 1
+                   DISPLAY 'ONE'
+               ELSE
+                   DISPLAY 'NOT ONE'
+               END-IF
+           ELSE
+               DISPLAY 'SMALL'
+           END-IF
+           PERFORM CALC-PAY.
+           PERFORM UNTIL WS-TOTAL > 10
+               DISPLAY 'LOOP'
+           END-PERFORM
+           STOP RUN.
+       CALC-PAY.
+           EVALUATE WS-CODE
+               WHEN 1
+                   DISPLAY 'A'
+               WHEN OTHER
+                   DISPLAY 'B'
+           END-EVALUATE
+           IF WS-CODE = 2 DISPLAY 'TWO'.
+           DISPLAY 'DONE'.
+"""
+
+
+@pytest.fixture
+def ir():
+    return CobolRegexParser(build_scopes=True).parse(SOURCE)
+
+
+def _outline(node):
+    return (node["type"], node["name"], node["start"], node["end"],
+            [_outline(child) for child in node["children"]])
+
+
+def _brute_force(node, line):
+    # Linear scan: the deepest scope whose range contains line
+    if not node["start"] <= line <= node["end"]:
+        return None
+    for child in node["children"]:
+        found = _brute_force(child, line)
+        if found is not None:
+            return found
+    return node
+
+
+def test_scope_tree(ir):
+    procedure = ir["scopes"]["children"][2]
+    main, calc = procedure["children"]
+
+    assert _outline(main) == ("PARAGRAPH", "MAIN-PARA", 8, 23, [
+        ("IF", None, 9, 18, [
+            ("IF", None, 11, 15, [("ELSE", None, 13, 15, [])]),
+            ("ELSE", None, 16, 18, []),
+        ]),
+        ("PERFORM", None, 20, 22, []),
+    ])
+    assert _outline(calc) == ("PARAGRAPH", "CALC-PAY", 24, 32, [
+        ("EVALUATE", None, 25, 30, [
+            ("WHEN", None, 26, 27, []),
+            ("WHEN", None, 28, 30, []),
+        ]),
+        ("IF", None, 31, 31, []),
+    ])
+    assert main["children"][0]["condition"] == "WS-TOTAL > 100"
+    assert calc["children"][1]["condition"] == "WS-CODE = 2"
+    assert main["children"][1]["spec"] == "UNTIL WS-TOTAL > 10"
+    assert max_depth(ir["scopes"]) == 2
+
+
+def test_scopes_are_optional():
+    assert "scopes" not in CobolRegexParser(build_scopes=False).parse(SOURCE)
+
+
+def test_index_matches_linear_scan(ir):
+    index = ScopeIndex(ir["scopes"])
+
+    for line in range(0, 40):
+        assert index.deepest(line) is _brute_force(ir["scopes"], line)
+
+
+def test_path_and_enclosing(ir):
+    index = ScopeIndex(ir["scopes"])
+
+    assert [node["type"] for node in index.path(14)] == [
+        "PROGRAM", "DIVISION", "PARAGRAPH", "IF", "IF", "ELSE"
+    ]
+    assert index.enclosing(14, "PARAGRAPH")["name"] == "MAIN-PARA"
+    assert index.enclosing(5, "PARAGRAPH") is None
+    assert index.paragraph("calc-pay")["start"] == 24
+
+
+def test_slice_ir_keeps_only_the_scope(ir):
+    calc = ScopeIndex(ir["scopes"]).paragraph("CALC-PAY")
+
+    sliced = slice_ir(ir, [calc])
+
+    assert {s["line"] for s in sliced["statements"]} == {27, 29, 31, 32}
+    assert [c["type"] for c in sliced["control_flow"]] == ["EVALUATE", "IF"]
+    assert sliced["conditions"] == [ir["control_flow"][-1]["condition"]]
+    assert sliced["variables"] == ir["variables"]
+    assert sliced["scopes"] == [calc]
+
+
+def test_focus_ir(ir):
+    assert focus_ir(ir, "What does the program do?") is None
+    assert focus_ir(ir, "What does CALC-PAY do?")["scopes"][0]["name"] == "CALC-PAY"
+    assert focus_ir(ir, "why is line 14 there")["scopes"][0]["name"] == "MAIN-PARA"
+
+
+def test_chat_prompt_is_sliced_to_the_paragraph(ir, monkeypatch):
+    prompts = []
+    monkeypatch.setattr(
+        explainer, "call_llm",
+        lambda prompt, template="unknown": prompts.append(prompt) or "ok"
+    )
+
+    explainer.explain_with_query(ir, "What does CALC-PAY do?")
+    explainer.explain_with_query(ir, "What does the program do?")
+
+    assert "'BIG'" not in prompts[0] and "'TWO'" in prompts[0]
+    assert "'BIG'" in prompts[1] and "'children'" not in prompts[1]
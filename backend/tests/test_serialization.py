@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from backend.app.core import serialization
+from backend.app.core.serialization import (
+    encode_payload,
+    negotiate_encoding,
+    select_fields
+)
+
+
+def test_negotiate_prefers_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(serialization, "brotli", None)
+
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding(None) is None
+
+
+def test_negotiate_respects_zero_quality(monkeypatch):
+    monkeypatch.setattr(serialization, "brotli", None)
+
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("gzip;q=0.5") == "gzip"
+
+
+def test_encode_payload_compresses_large_bodies(monkeypatch):
+    monkeypatch.setattr(serialization, "brotli", None)
+    payload = {"explanation": "MOVE A TO B. " * 500}
+
+    body, headers = encode_payload(payload, "gzip")
+
+    assert headers["Content-Encoding"] == "gzip"
+    assert int(headers["X-Response-Bytes"]) == len(body)
+    assert int(headers["X-Raw-Bytes"]) > len(body)
+    assert json.loads(gzip.decompress(body)) == payload
+
+
+def test_encode_payload_skips_small_bodies():
+    body, headers = encode_payload({"reply": "ok"}, "gzip, br")
+
+    assert "Content-Encoding" not in headers
+    assert json.loads(body) == {"reply": "ok"}
+
+
+def test_select_fields_keeps_session_id():
+    payload = {"session_id": "S1", "explanation": "E", "intermediate_representation": {}}
+
+    assert select_fields(payload, ["explanation"]) == {"session_id": "S1", "explanation": "E"}
+    assert select_fields(payload, None) is payload
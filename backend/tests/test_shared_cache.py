@@ -0,0 +1,105 @@
+import json
+import pickle
+import time
+
+import pytest
+
+from backend.app.db.shared_cache import SharedCache
+from backend.app.llm import client
+from backend.app.services import chat_service
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+def test_entries_are_visible_to_other_workers(cache_path):
+    first = SharedCache(cache_path, max_bytes=1_000_000)
+    second = SharedCache(cache_path, max_bytes=1_000_000)
+
+    first.put("llm", "K1", b"answer")
+
+    assert second.get("llm", "K1") == b"answer"
+    assert second.get("ir", "K1") is None
+
+
+def test_missing_directories_are_created(tmp_path):
+    cache = SharedCache(str(tmp_path / "not" / "yet" / "cache.db"), max_bytes=1000)
+
+    cache.put("llm", "K1", b"answer")
+
+    assert cache.get("llm", "K1") == b"answer"
+
+
+def test_max_age_expires_entries(cache_path, monkeypatch):
+    cache = SharedCache(cache_path, max_bytes=1_000_000)
+    cache.put("llm", "K1", b"answer")
+
+    later = time.time() + 120
+    monkeypatch.setattr("backend.app.db.shared_cache.time.time", lambda: later)
+
+    assert cache.get("llm", "K1", max_age=60) is None
+    assert cache.get("llm", "K1") == b"answer"
+
+
+def test_evict_keeps_most_recently_used(cache_path):
+    cache = SharedCache(cache_path, max_bytes=1000)
+    for i in range(5):
+        cache.put("ir", f"K{i}", b"x" * 300)
+
+    cache.evict()
+
+    assert cache.get("ir", "K0") is None
+    assert cache.get("ir", "K4") is not None
+
+
+def test_disabled_cache_is_inert(cache_path):
+    cache = SharedCache(cache_path, max_bytes=1000, enabled=False)
+    cache.put("llm", "K1", b"answer")
+
+    assert cache.get("llm", "K1") is None
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_identical_prompts_call_llm_once(cache_path, fake_llm, monkeypatch):
+    fake_llm.replies.append(("It prints.", 0, 0))
+    monkeypatch.setattr(client, "shared_cache", SharedCache(cache_path, max_bytes=1_000_000))
+
+    assert client.call_llm("Explain HELLO") == "It prints."
+    assert client.call_llm("Explain HELLO") == "It prints."
+    assert len(fake_llm.requests) == 1
+
+
+def test_shared_ir_copies_are_json(cache_path, monkeypatch):
+    cache = SharedCache(cache_path, max_bytes=1_000_000)
+    monkeypatch.setattr(chat_service, "shared_cache", cache)
+    ir = {"program_info": {"program_id": "HELLO"}, "statements": []}
+
+    chat_service._cache_ir("S1", ir, 42, 1000.0)
+    assert json.loads(cache.get("ir", "S1")) == [ir, 1000.0, 42]
+    assert chat_service._load_shared_ir("S1", None) == (ir, 1000.0, 42)
+
+    # Anything else in the cache file is a miss, never unpickled
+    cache.put("ir", "S2", pickle.dumps((ir, 1000.0, 42)))
+    assert chat_service._load_shared_ir("S2", None) is None
+
+
+@pytest.mark.parametrize("env, argv, expected", [
+    ({}, ["uvicorn", "backend.app.main:app"], 1),
+    ({}, ["uvicorn", "backend.app.main:app", "--workers", "4"], 4),
+    ({}, ["uvicorn", "backend.app.main:app", "--workers=3"], 3),
+    ({}, ["gunicorn", "-w", "2", "backend.app.main:app"], 2),
+    ({"UVICORN_WORKERS": "5"}, ["uvicorn"], 5),
+    ({"WEB_CONCURRENCY": "6"}, ["uvicorn", "--workers", "4"], 6),
+])
+def test_worker_count_detection(monkeypatch, env, argv, expected):
+    from backend.app.config import settings as settings_module
+
+    for name in ("WEB_CONCURRENCY", "UVICORN_WORKERS"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(settings_module.sys, "argv", argv)
+
+    assert settings_module._worker_count() == expected
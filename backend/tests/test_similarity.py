@@ -0,0 +1,89 @@
+import pytest
+
+from backend.app.config.settings import settings
+from backend.app.llm.similarity import SimilarityIndex
+from backend.app.services.answer_service import (
+    find_similar_answer,
+    ir_names,
+    match_question
+)
+from backend.app.services.chat_service import save_analyses, save_message
+from backend.benchmarks import eval_similarity
+
+IR = {
+    "program_info": {"program_id": "PAYROLL"},
+    "paragraphs": [{"name": "CALC-PAY"}, {"name": "CALC-TAX"}],
+    "variables": [{"name": "WS-TOTAL"}],
+}
+NAMES = ir_names(IR)
+
+
+def test_index_ranks_shared_ngrams_highest():
+    index = SimilarityIndex(["file opened", "total computed", "error handling"])
+
+    best, score = index.best("opens file")
+
+    assert best == 0
+    assert 0 < score <= 1
+    assert SimilarityIndex([]).best("anything") == (None, 0.0)
+
+
+def test_paraphrase_matches_and_other_topics_do_not():
+    cached = ["Where is the file opened?", "How is WS-TOTAL computed?"]
+
+    assert match_question("which paragraph opens the file", cached, NAMES, 0.4)[0] == 0
+    assert match_question("Is there any error handling?", cached, NAMES, 0.4)[0] is None
+
+
+def test_questions_about_different_names_never_match():
+    cached = ["What does CALC-TAX do?"]
+
+    assert match_question("What does CALC-PAY do?", cached, NAMES, 0.0)[0] is None
+    assert match_question("explain paragraph CALC-TAX", cached, NAMES, 0.4)[0] == 0
+
+
+def test_paraphrase_cache_is_off_by_default():
+    assert settings.SIMILARITY_THRESHOLD == 0
+
+
+@pytest.mark.parametrize("threshold", [0.4, 0.5])
+def test_labelled_set(threshold):
+    result = eval_similarity.evaluate(threshold, ir_names(eval_similarity.IR))
+
+    assert result["false_hit_rate"] <= 0.05
+    assert result["hit_rate"] >= 0.4
+    assert result["near_miss_hits"] == 0
+
+
+def test_unanchored_and_contrasting_questions_never_match():
+    assert match_question("Why?", ["What does it do?"], NAMES, 0.0)[0] is None
+    assert match_question("Where is it?", ["Why?"], NAMES, 0.0)[0] is None
+    assert match_question("What is the output file?", ["What is the input file?"], NAMES, 0.0)[0] is None
+    assert match_question(
+        "Does it delete the master file?", ["Does it update the master file?"], NAMES, 0.0
+    )[0] is None
+    # A name anchors a general question
+    assert match_question("explain CALC-PAY", ["What does CALC-PAY do?"], NAMES, 0.4)[0] == 0
+
+
+@pytest.mark.usefixtures("temp_db")
+def test_find_similar_answer_uses_session_history():
+    save_analyses([{
+        "session_id": "S1",
+        "language": "cobol",
+        "content_hash": "H1",
+        "intermediate_representation": IR,
+        "analysis": {},
+        "explanation": "Pays people."
+    }])
+    save_message("S1", "user", "Where is the file opened?")
+    save_message("S1", "assistant", "In MAIN-PARA.")
+    save_message("S1", "user", "How is WS-TOTAL computed?")
+    save_message("S1", "assistant", "ERROR: rate limited")
+
+    answer, matched, score = find_similar_answer("S1", "which paragraph opens the file", IR)
+    assert (answer, matched) == ("In MAIN-PARA.", "Where is the file opened?")
+
+    # Failed answers are never reused
+    assert find_similar_answer("S1", "how is WS-TOTAL computed", IR) is None
+    assert find_similar_answer("S2", "where is the file opened", IR) is None
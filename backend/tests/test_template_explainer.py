@@ -0,0 +1,172 @@
+import time
+
+import pytest
+
+from backend.app.config.settings import settings
+from backend.app.llm import explainer
+from backend.app.llm.template_explainer import complexity, explain_from_template
+from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
+from backend.app.parsers.jcl_parser.parser import JCLParser
+
+JCL = """//PAYROLL JOB (ACCT),CLASS=A,MSGCLASS=X,NOTIFY=OPS01
+//COPY    EXEC PGM=IEBGENER
+//SYSPRINT DD SYSOUT=*
+//SYSUT1  DD DSN=PAY.MASTER,DISP=SHR
+//SYSUT2  DD DSN=PAY.BACKUP,DISP=(NEW,CATLG,DELETE)
+//SYSIN   DD DUMMY
+//REPORT  EXEC PGM=PAYRPT,COND=(4,LT,COPY)
+//WORK    DD DSN=&&TEMP,DISP=(NEW,PASS)
+"""
+
+SIMPLE_COBOL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. HELLO.
+       DATA DIVISION.
+       WORKING-STORAGE SECTION.
+       01 WS-COUNT PIC 9(3).
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           MOVE 1 TO WS-COUNT.
+           DISPLAY 'HELLO WORLD'.
+           STOP RUN.
+"""
+
+BRANCHING_COBOL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. ROUTER.
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           EVALUATE WS-CODE
+               WHEN 1 DISPLAY 'ONE'
+           END-EVALUATE
+           STOP RUN.
+"""
+
+IF_ELSE_COBOL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. SIZER.
+       DATA DIVISION.
+       WORKING-STORAGE SECTION.
+       01 WS-AMT PIC 9(5).
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           IF WS-AMT > 100
+               DISPLAY 'BIG'
+           ELSE
+               DISPLAY 'SMALL'
+           END-IF.
+           STOP RUN.
+"""
+
+UNPARSED_COBOL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. RISKY.
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           CALL 'DBUPDATE'.
+           SUBTRACT 1 FROM WS-A.
+           DIVIDE WS-A BY 2 GIVING WS-B.
+           ADD 1 TO WS-C.
+           EXEC SQL DELETE FROM ACCOUNTS END-EXEC.
+           DISPLAY 'CALL ADD'.
+           STOP RUN.
+"""
+
+
+@pytest.fixture
+def no_llm(monkeypatch):
+    def fail(prompt, template="unknown"):
+        raise AssertionError("the LLM should not be called")
+    monkeypatch.setattr(explainer, "call_llm", fail)
+
+
+def test_jcl_parser_keeps_parenthesized_operands():
+    ir = JCLParser().parse(JCL)
+
+    assert ir["steps"][0]["dds"][2]["disp"] == "(NEW,CATLG,DELETE)"
+    assert ir["steps"][1]["cond"] == "(4,LT,COPY)"
+
+
+def test_jcl_template_decodes_steps_and_dispositions():
+    text = explain_from_template(JCLParser().parse(JCL), "jcl", max_complexity=30)
+
+    assert "Job PAYROLL runs 2 steps" in text
+    assert "IEBGENER, which copies" in text
+    assert "creates dataset PAY.BACKUP and, when the step ends normally, catalogs it" in text
+    assert "if the step abends it deletes it" in text
+    assert "reads (shared) dataset PAY.MASTER" in text
+    assert "temporary dataset TEMP and passes it to later steps" in text
+    assert "bypassed if 4 is less than the return code of COPY" in text
+
+
+def test_simple_cobol_is_templated(no_llm):
+    ir = CobolRegexParser().parse(SIMPLE_COBOL)
+
+    text = explainer.explain(ir, "cobol")
+
+    assert "Program HELLO" in text
+    assert "Moves 1 to WS-COUNT." in text
+    assert text.index("Moves") < text.index("Displays") < text.index("Ends the run")
+
+
+def test_branching_cobol_goes_to_llm(monkeypatch):
+    monkeypatch.setattr(explainer, "call_llm", lambda prompt, template="unknown": "from the LLM")
+    ir = CobolRegexParser().parse(BRANCHING_COBOL)
+
+    assert complexity(ir, "cobol") is None
+    assert explainer.explain(ir, "cobol") == "from the LLM"
+
+
+def test_if_else_is_left_to_the_llm(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(
+        explainer, "call_llm",
+        lambda prompt, template="unknown": prompts.append(prompt) or "from the LLM"
+    )
+    ir = CobolRegexParser().parse(IF_ELSE_COBOL)
+
+    # A flat step list would say both DISPLAYs run, one after the other
+    assert complexity(ir, "cobol") is None
+    assert explain_from_template(ir, "cobol", max_complexity=100, force=True) is None
+
+    monkeypatch.setattr(settings, "TEMPLATE_EXPLAIN_MODE", "auto")
+    assert explainer.explain(ir, "cobol") == "from the LLM"
+    # The prompt gets both branches and the rule to keep them apart
+    assert "'BIG'" in prompts[0] and "'SMALL'" in prompts[0]
+    assert "Never flatten IF/ELSE logic into sequential steps" in prompts[0]
+
+
+def test_unrecognized_statements_go_to_llm():
+    ir = CobolRegexParser().parse(UNPARSED_COBOL)
+
+    assert [(u["verb"], u["line"]) for u in ir["unrecognized"]] == [
+        ("CALL", 5), ("SUBTRACT", 6), ("DIVIDE", 7), ("ADD", 8), ("EXEC", 9)
+    ]
+    assert complexity(ir, "cobol") is None
+    assert CobolRegexParser().parse(SIMPLE_COBOL)["unrecognized"] == []
+
+    # IRs stored before the parser recorded unrecognized verbs
+    legacy = CobolRegexParser().parse(SIMPLE_COBOL)
+    del legacy["unrecognized"]
+    assert complexity(legacy, "cobol") is None
+
+
+def test_complexity_threshold_and_modes(monkeypatch):
+    monkeypatch.setattr(explainer, "call_llm", lambda prompt, template="unknown": "from the LLM")
+    ir = JCLParser().parse(JCL)
+
+    monkeypatch.setattr(settings, "TEMPLATE_MAX_COMPLEXITY", 1)
+    assert explainer.explain(ir, "jcl") == "from the LLM"
+
+    monkeypatch.setattr(settings, "TEMPLATE_EXPLAIN_MODE", "only")
+    assert explainer.explain(ir, "jcl").startswith("Job PAYROLL")
+
+    monkeypatch.setattr(settings, "TEMPLATE_MAX_COMPLEXITY", 30)
+    monkeypatch.setattr(settings, "TEMPLATE_EXPLAIN_MODE", "off")
+    assert explainer.explain(ir, "jcl") == "from the LLM"
+
+
+def test_template_is_sub_millisecond():
+    ir = JCLParser().parse(JCL)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        explain_from_template(ir, "jcl", max_complexity=30)
+
+    assert (time.perf_counter() - start) / 100 < 0.001
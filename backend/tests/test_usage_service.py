@@ -0,0 +1,78 @@
+import pytest
+
+from backend.app.llm.usage import usage_context, current_session
+from backend.app.services.usage_service import (
+    record_usage,
+    get_session_usage,
+    get_usage_summary
+)
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def _record(session_id, template, total, latency, status="ok"):
+    record_usage(
+        session_id=session_id,
+        template=template,
+        model="test-model",
+        prompt_tokens=total - 10,
+        completion_tokens=10,
+        total_tokens=total,
+        latency_ms=latency,
+        prompt_chars=total * 4,
+        status=status
+    )
+
+
+def test_session_usage_grouped_by_template():
+    _record("S1", "_explain_cobol", 500, 1200.0)
+    _record("S1", "explain_with_query", 300, 400.0)
+    _record("S1", "explain_with_query", 100, 200.0)
+    _record("S2", "_explain_jcl", 50, 100.0)
+
+    usage = get_session_usage("S1")
+
+    assert usage["totals"]["calls"] == 3
+    assert usage["totals"]["total_tokens"] == 900
+    assert usage["totals"]["max_latency_ms"] == 1200.0
+
+    query = next(g for g in usage["by_template"] if g["template"] == "explain_with_query")
+    assert query["calls"] == 2
+    assert query["completion_tokens"] == 20
+    assert query["avg_latency_ms"] == 300.0
+
+
+def test_usage_summary_counts_sessions_and_errors():
+    _record("S1", "_explain_cobol", 500, 1000.0)
+    _record("S2", "_explain_cobol", 0, 30.0, status="error")
+
+    summary = get_usage_summary()
+
+    cobol = summary["by_template"][0]
+    assert cobol["template"] == "_explain_cobol"
+    assert cobol["sessions"] == 2
+    assert cobol["errors"] == 1
+    assert summary["totals"]["calls"] == 2
+
+
+def test_empty_session_usage():
+    usage = get_session_usage("missing")
+    assert usage["totals"]["calls"] == 0
+    assert usage["by_template"] == []
+
+
+def test_usage_context_sets_and_resets_session():
+    assert current_session() is None
+    with usage_context("S9"):
+        assert current_session() == "S9"
+    assert current_session() is None
+
+
+def test_cached_calls_are_not_errors():
+    record_usage("S1", "_explain_cobol", "m", 0, 0, 0, 1.0, 10, status="cached")
+    record_usage("S1", "_explain_cobol", "m", 10, 5, 15, 900.0, 10)
+
+    totals = get_usage_summary()["totals"]
+
+    assert totals["errors"] == 0
+    assert totals["cache_hits"] == 1
@@ -0,0 +1,151 @@
+import json
+import time
+
+import pytest
+
+from backend.app.db.database import transaction
+from backend.app.parsers.regex_parser.cobol_regex_parser import CobolRegexParser
+from backend.app.services.chat_service import save_analyses
+from backend.app.services.warehouse_service import (
+    export_rows,
+    file_operations,
+    list_programs,
+    rebuild_warehouse,
+    run_query,
+    variable_references,
+)
+
+PAYROLL = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. PAYROLL.
+       DATA DIVISION.
+       WORKING-STORAGE SECTION.
+       01 WS-RATE PIC 9(3)V99.
+       01 WS-PAY PIC 9(7)V99.
+       01 WS-EOF PIC X VALUE 'N'.
+       01 I PIC 99.
+       PROCEDURE DIVISION.
+       MAIN-PARA.
+           PERFORM UNTIL WS-EOF = 'Y'
+               READ EMP-FILE
+               REWRITE EMP-REC
+           END-PERFORM.
+           PERFORM CALC-PAY VARYING I FROM 1 BY 1 UNTIL I > 10.
+           PERFORM FINAL-PARA.
+           STOP RUN.
+       CALC-PAY.
+           COMPUTE WS-PAY = WS-RATE * 40.
+           PERFORM SAVE-PAY.
+       SAVE-PAY.
+           REWRITE PAY-REC.
+       FINAL-PARA.
+           REWRITE LAST-REC.
+"""
+
+
+def _record(code, session_id="S1", content_hash="H1"):
+    return {
+        "session_id": session_id,
+        "language": "cobol",
+        "content_hash": content_hash,
+        "intermediate_representation": CobolRegexParser().parse(code),
+        "explanation": "ok",
+    }
+
+
+def test_rows_carry_paragraph_and_loop_depth():
+    rows = export_rows(CobolRegexParser().parse(PAYROLL))
+
+    assert [row[1:] for row in rows["wh_file_operations"]] == [
+        ("MAIN-PARA", 1, "READ"),
+        ("MAIN-PARA", 1, "REWRITE"),
+        ("SAVE-PAY", 0, "REWRITE"),
+        ("FINAL-PARA", 0, "REWRITE"),
+    ]
+    performs = {row[3]: row[4] for row in rows["wh_performs"]}
+    assert performs == {None: 0, "CALC-PAY": 1, "FINAL-PARA": 0, "SAVE-PAY": 0}
+
+
+def test_rewrites_inside_loops(temp_db):
+    save_analyses([_record(PAYROLL)])
+
+    assert len(file_operations("rewrite")) == 3
+    in_loop = file_operations("REWRITE", in_loop=True)
+    # Inline PERFORM UNTIL, and SAVE-PAY through the looped CALC-PAY
+    assert [(r["program"], r["paragraph"]) for r in in_loop] == [
+        ("PAYROLL", "MAIN-PARA"), ("PAYROLL", "SAVE-PAY")
+    ]
+
+
+def test_compute_references(temp_db):
+    save_analyses([_record(PAYROLL)])
+
+    found = variable_references("ws-rate", kind="COMPUTE")
+    assert found == [{
+        "program": "PAYROLL", "line": 19, "kind": "COMPUTE", "role": "read",
+        "paragraph": "CALC-PAY", "target": "WS-PAY", "source": "WS-RATE * 40",
+    }]
+    assert variable_references("WS-PAY", role="read") == []
+    # Paragraph names and literals are not data references
+    assert variable_references("SAVE-PAY") == []
+
+
+def test_reanalysis_replaces_rows(temp_db):
+    save_analyses([_record(PAYROLL)])
+    save_analyses([_record(PAYROLL.replace("REWRITE LAST-REC", "DELETE LAST-REC"), "S2", "H2")])
+
+    assert [p["content_hash"] for p in list_programs()] == ["H2"]
+    assert len(file_operations("REWRITE")) == 2
+    assert len(file_operations("DELETE")) == 1
+
+    # Same content again only touches the program row
+    save_analyses([_record(PAYROLL, "S3", "H2")])
+    assert list_programs()[0]["session_id"] == "S3"
+    assert len(file_operations("REWRITE")) == 2
+
+
+def test_rebuild_from_artifacts(temp_db):
+    ir = CobolRegexParser().parse(PAYROLL)
+    with transaction() as cur:
+        cur.execute(
+            "INSERT INTO artifacts (content_hash, language, ir_json, created_at) VALUES (?, ?, ?, ?)",
+            ("H1", "cobol", json.dumps(ir), time.time())
+        )
+
+    assert rebuild_warehouse() == 1
+    assert list_programs()[0]["program"] == "PAYROLL"
+    assert len(file_operations("REWRITE", in_loop=True)) == 2
+
+
+def test_run_query_is_read_only(temp_db):
+    save_analyses([_record(PAYROLL)])
+
+    result = run_query(
+        "SELECT operation, COUNT(*) FROM wh_file_operations GROUP BY operation ORDER BY operation"
+    )
+    assert result == {
+        "columns": ["operation", "COUNT(*)"],
+        "rows": [["READ", 1], ["REWRITE", 3]],
+        "truncated": False,
+    }
+    assert run_query("SELECT name FROM wh_variables", limit=2)["truncated"] is True
+
+    for sql in (
+        "DELETE FROM wh_programs",
+        "DROP TABLE wh_programs",
+        "ATTACH DATABASE ':memory:' AS other",
+        "PRAGMA query_only = 0",
+        "SELECT 1; DELETE FROM wh_programs",
+        "SELECT session_id, role, message FROM chat_messages",
+        "SELECT * FROM sessions",
+        "SELECT content_hash FROM wh_programs UNION SELECT content_hash FROM artifacts",
+        "SELECT sql FROM sqlite_master",
+    ):
+        with pytest.raises(ValueError):
+            run_query(sql)
+    assert len(list_programs()) == 1
+
+
+def test_run_query_timeout(temp_db):
+    endless = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n"
+    with pytest.raises(ValueError, match="exceeded"):
+        run_query(endless, timeout=0.05)
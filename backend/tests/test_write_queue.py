@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from backend.app.db.write_queue import WriteQueue, write_queue, _parse_durability
+from backend.app.services.chat_service import save_analyses, load_ir, save_message, load_messages
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+IR = {"program_info": {"program_id": "HELLO"}}
+
+
+@pytest.fixture
+def running_queue(monkeypatch):
+    monkeypatch.setitem(write_queue.durability, "hold", "async")
+    write_queue.start()
+    yield write_queue
+    write_queue.stop()
+
+
+def _result(session_id):
+    return {
+        "session_id": session_id,
+        "language": "cobol",
+        "content_hash": "H1",
+        "intermediate_representation": IR,
+        "analysis": {},
+        "explanation": "Prints HELLO."
+    }
+
+
+def _hold_writer(queue):
+    """
+    Queues a write that blocks the writer thread until the event is set.
+    """
+    release = threading.Event()
+    queue.submit("hold", lambda cur: release.wait(5))
+    return release
+
+
+def _insert_row(cur, i):
+    cur.execute(
+        "INSERT INTO chat_messages (session_id, role, message) VALUES (?, ?, ?)",
+        ("S1", "user", f"m{i}")
+    )
+
+
+def test_writes_run_inline_until_started():
+    save_message("S1", "user", "hello")
+    assert [m[2] for m in load_messages("S1")] == ["hello"]
+
+
+def test_stop_flushes_queued_writes(running_queue):
+    release = _hold_writer(running_queue)
+    for i in range(20):
+        running_queue.submit("hold", _insert_row, i)
+
+    assert load_messages("S1") == []
+
+    release.set()
+    running_queue.stop()
+    assert [m[2] for m in load_messages("S1")] == [f"m{i}" for i in range(20)]
+
+
+def test_load_ir_reads_queued_analysis(running_queue):
+    release = _hold_writer(running_queue)
+    save_analyses([_result("S1")])
+
+    # Not committed yet, but visible to the same process
+    assert load_ir("S1") == IR
+
+    release.set()
+    running_queue.stop()
+    assert running_queue.peek(("ir", "S1")) is None
+    assert load_ir("S1") == IR
+
+
+def test_sync_write_reports_failure(running_queue, monkeypatch):
+    monkeypatch.setitem(running_queue.durability, "test", "sync")
+
+    def fail(cur):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        running_queue.submit("test", fail)
+
+
+def test_failed_write_does_not_drop_its_batch(running_queue):
+    release = _hold_writer(running_queue)
+    running_queue.submit("hold", _insert_row, 0)
+    failed = running_queue.submit("hold", lambda cur: cur.execute("INSERT INTO missing VALUES (1)"))
+    running_queue.submit("hold", _insert_row, 1)
+
+    release.set()
+    running_queue.stop()
+
+    assert isinstance(failed.exception(), Exception)
+    assert [m[2] for m in load_messages("S1")] == ["m0", "m1"]
+
+
+def test_messages_are_readable_on_return(running_queue, monkeypatch):
+    # Even when configured async, the next turn must see the message
+    monkeypatch.setitem(running_queue.durability, "message", "async")
+    for i in range(5):
+        save_message("S1", "user", f"m{i}")
+        assert load_messages("S1")[-1][2] == f"m{i}"
+
+
+def test_parse_durability():
+    assert _parse_durability("message=async, analysis=SYNC") == {
+        "message": "async",
+        "analysis": "sync"
+    }
+    with pytest.raises(ValueError):
+        WriteQueue("message=eventually")
+
+
+def test_full_queue_applies_back_pressure_without_deadlock():
+    queue = WriteQueue(durability="hold=async,message=async", max_size=1)
+    queue.start()
+    release = threading.Event()
+    queue.submit("hold", lambda cur: release.wait(5), pending={"held": 1})
+
+    def submit_many():
+        for i in range(20):
+            queue.submit(
+                "message", _insert_row, i,
+                pending={("row", i): i}
+            )
+
+    submitter = threading.Thread(target=submit_many)
+    submitter.start()
+    release.set()
+    submitter.join(5)
+    assert not submitter.is_alive(), "submit() deadlocked on a full queue"
+
+    queue.stop()
+    assert [m[2] for m in load_messages("S1")] == [f"m{i}" for i in range(20)]
+    assert queue.peek("held") is None and queue.peek(("row", 19)) is None
@@ -1,3 +1,5 @@
+import time
+
 import streamlit as st
 import requests
 
@@ -6,6 +8,20 @@ import requests
 # -----------------------------
 BACKEND_ANALYZE_URL = "http://127.0.0.1:8000/analyze"
 BACKEND_CHAT_URL = "http://127.0.0.1:8000/chat"
+BACKEND_JOBS_URL = "http://127.0.0.1:8000/jobs"
+BACKEND_SESSIONS_URL = "http://127.0.0.1:8000/sessions"
+
+# Progress shown while a background job moves through the pipeline
+JOB_STAGE_PROGRESS = {
+    "queued": (0.05, "Queued..."),
+    "parsed": (0.35, "Parsed code..."),
+    "summarized": (0.6, "Summarized structure..."),
+    "explained": (1.0, "Explanation ready.")
+}
+
+# Job polling: per-request timeout, and how long to wait for a job at all
+JOB_REQUEST_TIMEOUT_SECONDS = 10
+JOB_MAX_WAIT_SECONDS = 15 * 60
 
 # -----------------------------
 # Page Config
@@ -27,6 +43,33 @@ if "session_id" not in st.session_state:
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
+# The session id lives in the URL so a reload can restore the conversation
+if not st.session_state.session_id and st.query_params.get("session"):
+    st.session_state.session_id = st.query_params["session"]
+    st.session_state.chat_history = None  # fetched from the backend below
+
+
+def load_chat_history(session_id):
+    """
+    Reads the whole conversation from the paginated history API.
+    """
+    history = []
+    cursor = 0
+
+    while cursor is not None:
+        res = requests.get(
+            f"{BACKEND_SESSIONS_URL}/{session_id}/messages",
+            params={"cursor": cursor, "limit": 200}
+        )
+        if res.status_code != 200:
+            break
+
+        page = res.json()
+        history.extend((m["role"], m["message"]) for m in page["messages"])
+        cursor = page["next_cursor"]
+
+    return history
+
 # -----------------------------
 # UI Header
 # -----------------------------
@@ -57,28 +100,56 @@ if st.button("Analyze Code"):
     if not code_input.strip():
         st.warning("Please paste some code before analyzing.")
     else:
-        with st.spinner("Analyzing legacy code..."):
-            payload = {
-                "code": code_input,
-                "language": language,
-                "engine": "regex"  # 🔒 FORCE REGEX (ANTLR REMOVED)
-            }
-
-            try:
-                response = requests.post(BACKEND_ANALYZE_URL, json=payload)
-
-                if response.status_code == 200:
-                    data = response.json()
+        payload = {
+            "code": code_input,
+            "language": language,
+            "engine": "regex"  # 🔒 FORCE REGEX (ANTLR REMOVED)
+        }
+
+        try:
+            # Submit as a background job so long analyses never hit proxy timeouts
+            response = requests.post(
+                BACKEND_JOBS_URL, json=payload, timeout=JOB_REQUEST_TIMEOUT_SECONDS
+            )
+
+            if response.status_code == 202:
+                job_id = response.json()["job_id"]
+                progress = st.progress(0.0, text="Queued...")
+                deadline = time.monotonic() + JOB_MAX_WAIT_SECONDS
+
+                while True:
+                    job = requests.get(
+                        f"{BACKEND_JOBS_URL}/{job_id}", timeout=JOB_REQUEST_TIMEOUT_SECONDS
+                    ).json()
+
+                    value, label = JOB_STAGE_PROGRESS.get(job["stage"], (0.0, ""))
+                    progress.progress(value, text=label)
+
+                    if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+                        break
+                    time.sleep(1)
+
+                if job["status"] not in ("done", "failed"):
+                    st.error(
+                        f"Analysis did not finish within {JOB_MAX_WAIT_SECONDS // 60} minutes."
+                    )
+                    st.text(f"Job {job_id} is still {job['status']}.")
+                elif job["status"] == "done":
+                    data = job["result"]
                     st.session_state.result = data
                     st.session_state.session_id = data.get("session_id")
                     st.session_state.chat_history = []
+                    st.query_params["session"] = st.session_state.session_id
                 else:
-                    st.error(f"Backend error: {response.status_code}")
-                    st.text(response.text)
+                    st.error("Analysis failed.")
+                    st.text(job.get("error") or "")
+            else:
+                st.error(f"Backend error: {response.status_code}")
+                st.text(response.text)
 
-            except Exception as e:
-                st.error("Failed to connect to backend.")
-                st.text(str(e))
+        except Exception as e:
+            st.error("Failed to connect to backend.")
+            st.text(str(e))
 
 # -----------------------------
 # Results Display
@@ -106,6 +177,17 @@ if st.session_state.result:
         with col1:
             st.subheader("📦 Intermediate Representation (IR)")
 
+            # IR is large: fetch it only when technical details are shown
+            if "intermediate_representation" not in result:
+                try:
+                    res = requests.get(
+                        f"{BACKEND_SESSIONS_URL}/{st.session_state.session_id}/ir"
+                    )
+                    if res.status_code == 200:
+                        result["intermediate_representation"] = res.json()
+                except Exception:
+                    pass
+
             ir = (
                 result.get("intermediate_representation")
                 or result.get("ir")
@@ -140,6 +222,12 @@ if st.session_state.result:
 if st.session_state.session_id:
     st.subheader("💬 Ask Questions About This Code")
 
+    if st.session_state.chat_history is None:
+        try:
+            st.session_state.chat_history = load_chat_history(st.session_state.session_id)
+        except Exception:
+            st.session_state.chat_history = []
+
     user_input = st.chat_input("Ask about control flow, variables, logic...")
 
     if user_input: